@@ -0,0 +1,234 @@
+"""
+Content-addressed store of submission files, for archiving every accepted submission.
+
+Each distinct file content is stored once, as `objects/<hh>/<rest of hash>` under the
+store directory, named by its BLAKE2b hash. Next to the objects the store keeps:
+
+    index.tsv      -- student_id, assignment_index, folder, path, hash: which content each
+                      student submitted for each assignment; the path is relative to the
+                      assignment folder ('/'-separated), so files of the same name in
+                      different subfolders are kept apart
+    statcache.tsv  -- path, size, mtime_ns, inode, hash: files hashed on earlier runs; a
+                      file whose size, mtime and inode are unchanged is not read again
+
+Files that need hashing are hashed in parallel in a thread pool (hashlib releases the
+GIL while hashing), and new blobs are copied into place atomically. The bytes are hashed
+again as they are copied, so a file that changes after it was hashed is stored (and
+indexed) under the hash of the content that was actually copied.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Tuple, Optional
+from .config import BLOB_HASH_SIZE, BLOB_READ_SIZE
+from .reporting import Reporter
+from .tsv_namelist import write_lines_atomically
+
+BLOB_INDEX_FILE = 'index.tsv'
+BLOB_STAT_CACHE_FILE = 'statcache.tsv'
+BLOB_OBJECTS_DIR = 'objects'
+
+# (student_id, assignment_index, folder name, file path)
+ArchivedSubmission = Tuple[str, int, str, str]
+
+
+def hash_file(filepath: str) -> str:
+    """Returns the hex BLAKE2b digest of a file's content."""
+    digest = hashlib.blake2b(digest_size=BLOB_HASH_SIZE)
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(BLOB_READ_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _hash_file_or_none(filepath: str) -> Optional[str]:
+    try:
+        return hash_file(filepath)
+    except OSError:
+        return None
+
+
+def get_blob_path(store_dir: str, blob_hash: str) -> str:
+    """Returns the path of the blob with the given hash."""
+    return os.path.join(store_dir, BLOB_OBJECTS_DIR, blob_hash[:2], blob_hash[2:])
+
+
+def _read_tsv(path: str, num_fields: int, reporter: Reporter) -> List[List[str]]:
+    rows = []
+    if not os.path.exists(path):
+        return rows
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for i, line in enumerate(f):
+                parts = line.rstrip('\n').split('\t')
+                if len(parts) != num_fields:
+                    reporter.warning(f"Skipping malformed line {i+1} in '{path}'.")
+                    continue
+                rows.append(parts)
+    except OSError as e:
+        reporter.warning(f"Could not read '{path}': {e}")
+    return rows
+
+
+def load_blob_index(store_dir: str, reporter: Reporter) -> Dict[Tuple[str, int, str], Tuple[str, str]]:
+    """
+    Reads the store's index.
+
+    Returns:
+        Dict[Tuple[str, int, str], Tuple[str, str]]: (folder, hash) per (student_id,
+            assignment_index, path relative to the assignment folder).
+    """
+    return {
+        (student_id, int(assignment_index), relative_path): (folder, blob_hash)
+        for student_id, assignment_index, folder, relative_path, blob_hash in _read_tsv(os.path.join(store_dir, BLOB_INDEX_FILE), 5, reporter)
+    }
+
+
+def _load_stat_cache(store_dir: str, reporter: Reporter) -> Dict[str, Tuple[int, int, int, str]]:
+    return {
+        path: (int(size), int(mtime_ns), int(inode), blob_hash)
+        for path, size, mtime_ns, inode, blob_hash in _read_tsv(os.path.join(store_dir, BLOB_STAT_CACHE_FILE), 5, reporter)
+    }
+
+
+def _store_blob(store_dir: str, source_path: str, blob_hash: str) -> Tuple[bool, str]:
+    """
+    Copies a file into the store under its hash unless the blob exists, hashing the bytes
+    as they are copied. If the file changed since `blob_hash` was computed, the copy is
+    stored under the hash of the bytes actually copied, so a blob always matches its name.
+
+    Returns:
+        Tuple[bool, str]: Whether a new blob was stored, and the hash of the stored content.
+    """
+    if os.path.exists(get_blob_path(store_dir, blob_hash)):
+        return False, blob_hash
+    objects_dir = os.path.join(store_dir, BLOB_OBJECTS_DIR)
+    fd, temp_path = tempfile.mkstemp(prefix='.incoming.', dir=objects_dir)
+    try:
+        digest = hashlib.blake2b(digest_size=BLOB_HASH_SIZE)
+        with os.fdopen(fd, 'wb') as out, open(source_path, 'rb') as src:
+            for chunk in iter(lambda: src.read(BLOB_READ_SIZE), b''):
+                digest.update(chunk)
+                out.write(chunk)
+        copied_hash = digest.hexdigest()
+        blob_path = get_blob_path(store_dir, copied_hash)
+        if copied_hash != blob_hash and os.path.exists(blob_path):
+            os.unlink(temp_path)
+            return False, copied_hash
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        os.replace(temp_path, blob_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+    return True, copied_hash
+
+
+def _index_path(submissions_root: str, folder_name: str, file_path: str) -> str:
+    """Returns the '/'-separated path of a submission file relative to its assignment folder."""
+    relative_path = os.path.relpath(os.path.abspath(file_path), os.path.abspath(os.path.join(submissions_root, folder_name)))
+    return relative_path.replace(os.sep, '/')
+
+
+def archive_submissions(store_dir: str, submissions: List[ArchivedSubmission], submissions_root: str,
+                        reporter: Reporter, max_workers: Optional[int] = None) -> Optional[Dict]:
+    """
+    Ingests submission files into the content-addressed store and records them in its index.
+
+    Args:
+        store_dir (str): Directory of the store (created if needed).
+        submissions (List[ArchivedSubmission]): Accepted submissions to archive.
+        submissions_root (str): Directory holding the assignment folders; index entries are
+                                keyed by the path of each file relative to its folder.
+        reporter (Reporter): Reporter instance for logging.
+        max_workers (Optional[int]): Number of hashing threads (default: chosen by the executor).
+
+    Returns:
+        Optional[Dict]: 'files', 'hashed' (read and hashed this run), 'unchanged' (skipped through
+                        the stat cache), 'stored' (new blobs) and 'deduplicated' (content already
+                        in the store) counts, or None if the store could not be updated.
+    """
+    try:
+        os.makedirs(os.path.join(store_dir, BLOB_OBJECTS_DIR), exist_ok=True)
+    except OSError as e:
+        reporter.error(f"Cannot create submission store '{store_dir}': {e}")
+        return None
+
+    stat_cache = _load_stat_cache(store_dir, reporter)
+    index = load_blob_index(store_dir, reporter)
+    summary = {"files": 0, "hashed": 0, "unchanged": 0, "stored": 0, "deduplicated": 0}
+
+    # Stat every file; only files whose (size, mtime, inode) changed are read again
+    hashes = {}
+    to_hash = []
+    seen = set()
+    for _, _, _, file_path in submissions:
+        abs_path = os.path.abspath(file_path)
+        if abs_path in seen:
+            continue
+        seen.add(abs_path)
+        try:
+            st = os.stat(abs_path)
+        except OSError as e:
+            reporter.warning(f"Cannot archive '{file_path}': {e}")
+            continue
+        cached = stat_cache.get(abs_path)
+        if cached is not None and cached[:3] == (st.st_size, st.st_mtime_ns, st.st_ino) \
+                and os.path.exists(get_blob_path(store_dir, cached[3])):
+            hashes[abs_path] = cached[3]
+            summary['unchanged'] += 1
+        else:
+            stat_cache[abs_path] = (st.st_size, st.st_mtime_ns, st.st_ino, '')
+            to_hash.append(abs_path)
+
+    if to_hash:
+        reporter.info(f"Hashing {len(to_hash)} new or changed submission file(s).")
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            for abs_path, blob_hash in zip(to_hash, pool.map(_hash_file_or_none, to_hash)):
+                if blob_hash is None:
+                    reporter.warning(f"Cannot archive '{abs_path}': the file could not be read.")
+                    del stat_cache[abs_path]
+                    continue
+                summary['hashed'] += 1
+                try:
+                    stored, stored_hash = _store_blob(store_dir, abs_path, blob_hash)
+                    if stored:
+                        summary['stored'] += 1
+                    else:
+                        summary['deduplicated'] += 1
+                    hashes[abs_path] = stored_hash
+                    if stored_hash == blob_hash:
+                        stat_cache[abs_path] = stat_cache[abs_path][:3] + (blob_hash,)
+                    else: # Changed after it was hashed: record what was copied, and re-hash it next run
+                        reporter.warning(f"'{abs_path}' changed while it was being archived; recorded the content that was copied.")
+                        del stat_cache[abs_path]
+                except OSError as e:
+                    reporter.error(f"Failed to store '{abs_path}' in '{store_dir}': {e}")
+                    hashes.pop(abs_path, None)
+                    stat_cache.pop(abs_path, None)
+
+    for student_id, assignment_index, folder_name, file_path in submissions:
+        blob_hash = hashes.get(os.path.abspath(file_path))
+        if blob_hash is not None:
+            index[(student_id, assignment_index, _index_path(submissions_root, folder_name, file_path))] = (folder_name, blob_hash)
+            summary['files'] += 1
+
+    try:
+        write_lines_atomically(
+            os.path.join(store_dir, BLOB_INDEX_FILE),
+            (f"{student_id}\t{assignment_index}\t{folder}\t{relative_path}\t{blob_hash}\n"
+             for (student_id, assignment_index, relative_path), (folder, blob_hash) in sorted(index.items())),
+            reporter
+        )
+        write_lines_atomically(
+            os.path.join(store_dir, BLOB_STAT_CACHE_FILE),
+            (f"{path}\t{size}\t{mtime_ns}\t{inode}\t{blob_hash}\n"
+             for path, (size, mtime_ns, inode, blob_hash) in sorted(stat_cache.items()) if blob_hash),
+            reporter
+        )
+    except OSError as e:
+        reporter.error(f"Failed to write the index of submission store '{store_dir}': {e}")
+        return None
+    return summary
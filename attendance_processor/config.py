@@ -14,4 +14,78 @@ DEFAULT_FILE_EXTENSION = '.py'
 DEFAULT_NAMELIST_FILE = 'namelist.txt'
 
 # Default name for the root directory containing assignment subfolders
-DEFAULT_SUBMISSIONS_DIR = 'submissions'
\ No newline at end of file
+DEFAULT_SUBMISSIONS_DIR = 'submissions'
+
+# Suffix appended to the namelist path for the binary roster cache (sidecar) file
+ROSTER_SIDECAR_SUFFIX = '.rcache'
+
+# Storage formats a namelist can be kept in ('tsv' is the plain text namelist, 'fixed' the
+# memory-mapped fixed-width record file, 'sqlite' an indexed SQLite database, 'sharded' a
+# manifest of TSV namelists split by student ID prefix)
+STORE_FORMATS = ('tsv', 'fixed', 'sqlite', 'sharded')
+DEFAULT_STORE = 'tsv'
+
+# Submission journal (append-only log of accepted submissions), its timestamp index and
+# its key index (SQLite sidecar of the identity of every journaled event)
+JOURNAL_SUFFIX = '.journal'
+JOURNAL_INDEX_SUFFIX = '.idx'
+JOURNAL_KEYS_SUFFIX = '.keys'
+# Rebuild the journal's timestamp index once this many events were appended since the last compaction
+JOURNAL_COMPACT_THRESHOLD = 1000
+
+# Write buffer size used when saving the namelist (bytes)
+SAVE_BUFFER_SIZE = 1 << 20
+
+# Leading and trailing fields of the optional namelist header row:
+# ID <tab> Name <tab> <assignment folder>... <tab> Total <tab> Rate
+NAMELIST_HEADER_LEADING = ('ID', 'Name')
+NAMELIST_HEADER_TRAILING = ('Total', 'Rate')
+
+# Number of leading student ID characters that select the shard of a sharded roster
+SHARD_PREFIX_LENGTH = 6
+
+# Rolling version history of the roster (one delta per changed save) and how many versions it keeps
+HISTORY_SUFFIX = '.history'
+HISTORY_MAX_VERSIONS = 50
+
+# Index of the student IDs extracted per assignment in the last scan, used by 'reconcile'
+SCAN_INDEX_SUFFIX = '.scan'
+
+# Largest value a mark cell holds in count mode ('process --count'); higher counts saturate
+MAX_SUBMISSION_COUNT = 255
+
+# Rows per sorted run when 'merge' has to sort an input namelist externally
+MERGE_RUN_SIZE = 100000
+
+# Content-addressed submission store ('process --archive'): BLAKE2b digest size (bytes) of a blob's
+# name, and the read size used when hashing and copying submission files
+BLOB_HASH_SIZE = 32
+BLOB_READ_SIZE = 1 << 20
+
+# Suffix of the query index sidecar (ID -> row offset and name trigram index, SQLite)
+QUERY_INDEX_SUFFIX = '.qidx'
+
+# Rows formatted and written per chunk by the streaming table renderer ('view')
+TABLE_RENDER_CHUNK_ROWS = 1000
+# Rows per page of 'view --page' when no '--page-size' is given
+DEFAULT_PAGE_SIZE = 50
+
+# Local HTTP/JSON service ('serve'): default address, and how often (seconds) the namelist is
+# checked for changes to hot-reload
+DEFAULT_SERVE_HOST = '127.0.0.1'
+DEFAULT_SERVE_PORT = 8765
+SERVE_POLL_INTERVAL = 1.0
+
+# Memory budget of the roster cache of 'shell' and 'serve --courses' (least recently used
+# rosters are evicted beyond it); overridable with --cache-mb
+ROSTER_CACHE_MAX_BYTES = 256 << 20
+
+# On-disk cache of rendered 'view'/'query' output, kept in '<namelist><VIEW_CACHE_SUFFIX>/':
+# entries older than the maximum age are dropped, then the oldest until the size limit holds
+VIEW_CACHE_SUFFIX = '.vcache'
+VIEW_CACHE_MAX_BYTES = 32 << 20
+VIEW_CACHE_MAX_AGE_SECONDS = 7 * 24 * 3600
+
+# 'stats': number of equal-width bins of the rate histogram, and the rate percentiles reported
+STATS_HISTOGRAM_BINS = 10
+STATS_PERCENTILES = (10, 25, 75, 90)
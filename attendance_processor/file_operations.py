@@ -1,14 +1,17 @@
 import os
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional
 from .reporting import Reporter
+from . import roster_sidecar
+from . import fixed_width
+from . import sqlite_store
+from . import sharding
+from .tsv_namelist import read_namelist_header, load_student_data, save_student_data
 
-def load_student_data(filepath: str, reporter: Reporter) -> Tuple[List[Dict], int]:
+def load_student_data_cached(filepath: str, reporter: Reporter) -> Tuple[List[Dict], int]:
     """
-    Loads student data from the namelist file.
-    Each student is represented as a dictionary.
-    Determines the number of actual mark columns from the file,
-    correctly handling files previously updated with Total and Rate columns.
-    If Total and Rate are present, they are loaded.
+    Loads student data like `load_student_data`, but serves it from the binary sidecar
+    cache when that is still valid for the namelist file. When the cache is missing or
+    stale, the namelist is parsed from text and the cache is rebuilt.
 
     Args:
         filepath (str): Path to the namelist.txt file.
@@ -17,118 +20,15 @@ def load_student_data(filepath: str, reporter: Reporter) -> Tuple[List[Dict], in
     Returns:
         Tuple[List[Dict], int]: A list of student data dictionaries and
                                 the number of actual assignment mark columns found.
-                                Returns an empty list and 0 if errors occur.
     """
-    students = []
-    num_assignment_mark_columns_expected = -1 
+    cached = roster_sidecar.read_roster_sidecar(filepath, reporter)
+    if cached is not None:
+        return cached
 
-    if not os.path.exists(filepath):
-        reporter.error(f"Namelist file not found: {filepath}")
-        return [], 0
-
-    try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-
-        if not lines:
-            reporter.warning(f"Namelist file '{filepath}' is empty.")
-            return [], 0
-
-        first_valid_line_processed = False
-        for i, line_content in enumerate(lines):
-            line_content = line_content.strip()
-            if not line_content: continue
-
-            parts = line_content.split('\t')
-
-            if len(parts) < 2:
-                reporter.warning(f"Skipping malformed line {i+1} in '{filepath}': Not enough parts for ID and Name. Content: '{line_content}'")
-                continue
-
-            student_id = parts[0]
-            name = parts[1]
-            
-            current_line_assignment_mark_strings = []
-            current_line_num_assignment_marks = 0
-            loaded_total = 0 # Default if not found or not in updated format
-            loaded_rate = 0.0 # Default
-
-            is_updated_format = False
-            # Check if the line format includes Total and Rate (previously updated file)
-            # Format: ID, Name, [AssignmentMarks...], Total, Rate. Minimum 4 parts.
-            if len(parts) >= 4:
-                try:
-                    # Attempt to parse last two parts as Total (int) and Rate (float)
-                    float(parts[-1])  # Potential Rate
-                    int(parts[-2])    # Potential Total
-                    is_updated_format = True
-                except ValueError:
-                    is_updated_format = False # Does not match Total/Rate format
-
-            if is_updated_format:
-                # Format: ID, Name, [AssignmentMarks...], Total, Rate
-                current_line_assignment_mark_strings = parts[2:-2]
-                current_line_num_assignment_marks = len(current_line_assignment_mark_strings)
-                try:
-                    loaded_total = int(parts[-2])
-                    loaded_rate = float(parts[-1])
-                except ValueError: # Should be rare due to prior check but as safeguard
-                    reporter.warning(f"Line {i+1} in '{filepath}': Error parsing pre-existing Total/Rate despite format detection. Using defaults. Content: '{line_content}'")
-                    is_updated_format = False # Treat as original format if parsing Total/Rate fails
-                    current_line_assignment_mark_strings = parts[2:] # Re-evaluate assignment marks
-                    current_line_num_assignment_marks = len(current_line_assignment_mark_strings)
-                    loaded_total = 0
-                    loaded_rate = 0.0
-            else:
-                # Original format: ID, Name, [AssignmentMarks...] or just ID, Name
-                current_line_assignment_mark_strings = parts[2:]
-                current_line_num_assignment_marks = len(current_line_assignment_mark_strings)
-            
-            if not first_valid_line_processed:
-                num_assignment_mark_columns_expected = current_line_num_assignment_marks
-                reporter.info(f"Namelist structure: Expecting {num_assignment_mark_columns_expected} assignment mark column(s).")
-                if is_updated_format and num_assignment_mark_columns_expected >= 0:
-                    reporter.info("Detected 'Total' and 'Rate' columns; these values will be loaded.")
-                first_valid_line_processed = True
-            elif current_line_num_assignment_marks != num_assignment_mark_columns_expected:
-                reporter.warning(
-                    f"Skipping line {i+1} in '{filepath}': Inconsistent number of assignment mark columns. "
-                    f"Expected {num_assignment_mark_columns_expected}, found {current_line_num_assignment_marks}. Content: '{line_content}'"
-                )
-                continue
-            
-            try:
-                # Parse only the actual assignment mark strings
-                assignment_marks = [int(m_str) for m_str in current_line_assignment_mark_strings]
-            except ValueError:
-                reporter.warning(f"Skipping malformed line {i+1} in '{filepath}' due to non-integer value in assignment mark columns. Content: '{line_content}'")
-                continue
-            
-            final_assignment_marks = assignment_marks[:num_assignment_mark_columns_expected] + \
-                                     [0] * (num_assignment_mark_columns_expected - len(assignment_marks))
-
-            students.append({
-                "id": student_id,
-                "name": name,
-                "marks": final_assignment_marks,
-                "total": loaded_total, # Store loaded total
-                "rate": loaded_rate    # Store loaded rate
-            })
-
-        if not first_valid_line_processed and lines:
-            reporter.error(f"Could not determine a consistent assignment mark column structure from '{filepath}'. All lines may be malformed.")
-            return [], 0
-        
-        if not students and first_valid_line_processed:
-             reporter.warning(f"No valid student data loaded from '{filepath}' after initial structure detection.")
-        elif not students:
-            reporter.warning(f"No student data could be loaded from '{filepath}'.")
-
-    except Exception as e:
-        reporter.error(f"An unexpected error occurred while reading or parsing namelist file '{filepath}': {e}")
-        return [], 0
-    
-    return students, num_assignment_mark_columns_expected if num_assignment_mark_columns_expected != -1 else 0
+    students, num_assignment_cols = load_student_data(filepath, reporter)
+    if students:
+        roster_sidecar.write_roster_sidecar(filepath, students, num_assignment_cols, reporter)
+    return students, num_assignment_cols
 
 def discover_assignment_folders(root_dir: str, reporter: Reporter) -> List[str]:
     """
@@ -197,32 +97,100 @@ def get_submission_files_in_folder(assignment_folder_path: str, file_extension:
     
     return submission_files
 
-def save_student_data(filepath: str, students: List[Dict], reporter: Reporter, num_assignment_marks_to_write: int):
+def load_roster(filepath: str, store: str, reporter: Reporter, use_cache: bool = False) -> Tuple[List[Dict], int]:
     """
-    Saves the updated student data back to the namelist file, overwriting it.
-    Includes assignment marks, total submissions, and submission rate.
+    Loads student data from a namelist kept in the given storage format.
 
     Args:
-        filepath (str): Path to the namelist.txt file.
-        students (List[Dict]): List of student data dictionaries.
+        filepath (str): Path to the namelist (or store) file.
+        store (str): Storage format, one of `config.STORE_FORMATS`.
         reporter (Reporter): Reporter instance for logging.
-        num_assignment_marks_to_write (int): The number of individual assignment mark columns to write.
-                                       This should be the number of mark columns determined at load time.
+        use_cache (bool): For the 'tsv' store, serve the roster from the binary sidecar when valid.
+
+    Returns:
+        Tuple[List[Dict], int]: A list of student data dictionaries and
+                                the number of assignment mark columns.
+    """
+    if store == 'fixed':
+        return fixed_width.load_fixed_width_data(filepath, reporter)
+    if store == 'sqlite':
+        return sqlite_store.load_sqlite_data(filepath, reporter)
+    if store == 'sharded':
+        return sharding.load_sharded_data(filepath, reporter)
+    if use_cache:
+        return load_student_data_cached(filepath, reporter)
+    return load_student_data(filepath, reporter)
+
+
+def roster_stamp(filepath: str, store: str, reporter: Reporter) -> Optional[Tuple]:
+    """
+    Returns a stamp of the files a roster is loaded from: the size and modification time of
+    the namelist (or store) file and, for a sharded roster, of every shard. Any write to the
+    roster changes its stamp, so long-running callers can compare stamps to decide whether a
+    roster they hold in memory is stale without reading it.
+
+    Returns:
+        Optional[Tuple]: The stamp, or None if a file is missing.
     """
+    paths = [filepath]
+    if store == 'sharded':
+        shards = sharding.read_shard_manifest(filepath, reporter) if os.path.exists(filepath) else None
+        paths.extend(shards.values() if shards else [])
     try:
-        with open(filepath, 'w', encoding='utf-8') as f:
-            for student in students:
-                line_parts = [student['id'], student['name']]
-                
-                # Ensure student's marks list for output is exactly num_assignment_marks_to_write long
-                marks_for_output = student['marks'][:num_assignment_marks_to_write]
-                if len(marks_for_output) < num_assignment_marks_to_write:
-                    marks_for_output.extend([0] * (num_assignment_marks_to_write - len(marks_for_output)))
-                
-                line_parts.extend(str(m) for m in marks_for_output)
-                line_parts.append(str(student['total']))
-                line_parts.append(f"{student['rate']:.2f}") # Format rate to 2 decimal places
-                f.write("\t".join(line_parts) + "\n")
-        reporter.info(f"Successfully saved updated student data to {filepath}")
-    except Exception as e:
-        reporter.error(f"Failed to save student data to '{filepath}': {e}")
\ No newline at end of file
+        return tuple((path, st.st_size, st.st_mtime_ns) for path, st in ((path, os.stat(path)) for path in paths))
+    except OSError:
+        return None
+
+
+def load_assignment_names(filepath: str, store: str, reporter: Reporter) -> Optional[List[str]]:
+    """
+    Returns the assignment folder recorded for each mark column of a namelist, if the storage
+    format keeps them: the header row of a TSV namelist, or the assignments table of a SQLite
+    store (only when every column has a folder). Fixed-width files do not record folder names.
+
+    Args:
+        filepath (str): Path to the namelist (or store) file.
+        store (str): Storage format, one of `config.STORE_FORMATS`.
+        reporter (Reporter): Reporter instance for logging.
+
+    Returns:
+        Optional[List[str]]: Folder names in column order, or None if they are not recorded.
+    """
+    if store == 'tsv':
+        return read_namelist_header(filepath, reporter)
+    if store == 'sqlite':
+        return sqlite_store.load_assignment_names(filepath, reporter)
+    return None
+
+def save_roster(filepath: str, store: str, students: List[Dict], reporter: Reporter, num_assignment_marks_to_write: int,
+                assignment_names: Optional[List[str]] = None,
+                submission_sources: Optional[Dict[Tuple[str, int], str]] = None,
+                write_header: bool = False) -> bool:
+    """
+    Saves student data to a namelist kept in the given storage format.
+    Fixed-width files are updated in place where possible.
+
+    Args:
+        filepath (str): Path to the namelist (or store) file.
+        store (str): Storage format, one of `config.STORE_FORMATS`.
+        students (List[Dict]): List of student data dictionaries.
+        reporter (Reporter): Reporter instance for logging.
+        num_assignment_marks_to_write (int): The number of assignment mark columns to write.
+        assignment_names (Optional[List[str]]): Folder names of the assignment columns, by position.
+                                                Only recorded by stores that keep them ('sqlite').
+        submission_sources (Optional[Dict[Tuple[str, int], str]]): Submission file recorded for
+            (student ID, assignment index) in this run. Only recorded by the 'sqlite' store.
+        write_header (bool): For the 'tsv' store, write `assignment_names` as a header row.
+
+    Returns:
+        bool: True if the roster was saved (the backend has reported any error).
+    """
+    if store == 'fixed':
+        return fixed_width.update_fixed_width_data(filepath, students, reporter, num_assignment_marks_to_write)
+    if store == 'sharded':
+        return sharding.save_sharded_data(filepath, students, reporter, num_assignment_marks_to_write)
+    if store == 'sqlite':
+        return sqlite_store.save_sqlite_data(filepath, students, reporter, num_assignment_marks_to_write,
+                                             assignment_names, submission_sources)
+    return save_student_data(filepath, students, reporter, num_assignment_marks_to_write,
+                             assignment_names if write_header else None)
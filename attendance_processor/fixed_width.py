@@ -0,0 +1,202 @@
+"""
+Fixed-width binary record format for the namelist, accessed through `mmap`.
+
+Every student occupies a record of identical size, so a mark can be recorded with a
+one-byte in-place write (plus an update of the Total and Rate cells) instead of
+rewriting the whole file. The format converts losslessly to and from the TSV namelist.
+
+Layout (little-endian):
+    Header:  magic 'APFW', version (uint16), id width (uint16), name width (uint16),
+             number of mark columns (uint16)
+    Record:  id (UTF-8, NUL padded), name (UTF-8, NUL padded),
+             one uint8 per mark column, total (int32), rate (float64)
+"""
+import mmap
+import os
+import struct
+from typing import List, Dict, Tuple
+from .reporting import Reporter
+
+FIXED_WIDTH_MAGIC = b'APFW'
+FIXED_WIDTH_VERSION = 1
+
+_HEADER = struct.Struct('<4sHHHH')
+_SUMMARY = struct.Struct('<id')
+
+
+def _record_size(id_width: int, name_width: int, num_assignment_cols: int) -> int:
+    return id_width + name_width + num_assignment_cols + _SUMMARY.size
+
+
+def _read_header(buffer) -> Tuple[int, int, int]:
+    magic, version, id_width, name_width, num_assignment_cols = _HEADER.unpack_from(buffer, 0)
+    if magic != FIXED_WIDTH_MAGIC or version != FIXED_WIDTH_VERSION:
+        raise ValueError("not a fixed-width namelist file (bad magic or version)")
+    return id_width, name_width, num_assignment_cols
+
+
+def _padded_marks(student: Dict, num_assignment_cols: int) -> bytes:
+    marks = student['marks'][:num_assignment_cols]
+    return bytes(marks + [0] * (num_assignment_cols - len(marks)))
+
+
+def load_fixed_width_data(filepath: str, reporter: Reporter) -> Tuple[List[Dict], int]:
+    """
+    Loads student data from a fixed-width namelist file.
+
+    Args:
+        filepath (str): Path to the fixed-width namelist file.
+        reporter (Reporter): Reporter instance for logging.
+
+    Returns:
+        Tuple[List[Dict], int]: A list of student data dictionaries and the number of
+                                assignment mark columns. Returns an empty list and 0 on errors.
+    """
+    if not os.path.exists(filepath):
+        reporter.error(f"Namelist file not found: {filepath}")
+        return [], 0
+    if os.path.getsize(filepath) == 0:
+        reporter.warning(f"Namelist file '{filepath}' is empty.")
+        return [], 0
+
+    students = []
+    try:
+        with open(filepath, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            id_width, name_width, num_assignment_cols = _read_header(mm)
+            record_size = _record_size(id_width, name_width, num_assignment_cols)
+            body_size = len(mm) - _HEADER.size
+            if body_size % record_size:
+                reporter.warning(f"Fixed-width namelist '{filepath}' has a trailing partial record; it will be ignored.")
+
+            marks_offset = id_width + name_width
+            summary_offset = marks_offset + num_assignment_cols
+            for offset in range(_HEADER.size, _HEADER.size + (body_size // record_size) * record_size, record_size):
+                total, rate = _SUMMARY.unpack_from(mm, offset + summary_offset)
+                students.append({
+                    "id": mm[offset:offset + id_width].rstrip(b'\0').decode('utf-8'),
+                    "name": mm[offset + id_width:offset + marks_offset].rstrip(b'\0').decode('utf-8'),
+                    "marks": list(mm[offset + marks_offset:offset + summary_offset]),
+                    "total": total,
+                    "rate": rate
+                })
+    except Exception as e:
+        reporter.error(f"An unexpected error occurred while reading fixed-width namelist file '{filepath}': {e}")
+        return [], 0
+
+    reporter.info(f"Namelist structure: Expecting {num_assignment_cols} assignment mark column(s) (fixed-width format).")
+    if not students:
+        reporter.warning(f"No student data could be loaded from '{filepath}'.")
+    return students, num_assignment_cols
+
+
+def save_fixed_width_data(filepath: str, students: List[Dict], reporter: Reporter, num_assignment_marks_to_write: int) -> bool:
+    """
+    Writes the complete roster as a fixed-width namelist file, overwriting it.
+    Field widths are sized to the longest ID and name in the roster.
+
+    Args:
+        filepath (str): Path to the fixed-width namelist file.
+        students (List[Dict]): List of student data dictionaries.
+        reporter (Reporter): Reporter instance for logging.
+        num_assignment_marks_to_write (int): The number of assignment mark columns to write.
+
+    Returns:
+        bool: True if the file was written.
+    """
+    try:
+        encoded = [(s['id'].encode('utf-8'), s['name'].encode('utf-8')) for s in students]
+        id_width = max((len(i) for i, _ in encoded), default=0)
+        name_width = max((len(n) for _, n in encoded), default=0)
+
+        chunks = [_HEADER.pack(FIXED_WIDTH_MAGIC, FIXED_WIDTH_VERSION, id_width, name_width, num_assignment_marks_to_write)]
+        for student, (id_bytes, name_bytes) in zip(students, encoded):
+            chunks.append(id_bytes.ljust(id_width, b'\0'))
+            chunks.append(name_bytes.ljust(name_width, b'\0'))
+            chunks.append(_padded_marks(student, num_assignment_marks_to_write))
+            chunks.append(_SUMMARY.pack(student['total'], student['rate']))
+
+        with open(filepath, 'wb') as f:
+            f.write(b''.join(chunks))
+        reporter.info(f"Successfully saved student data to fixed-width file {filepath}")
+        return True
+    except (ValueError, struct.error) as e:
+        reporter.error(f"Student data cannot be represented in the fixed-width format (marks must be 0-255): {e}")
+    except Exception as e:
+        reporter.error(f"Failed to save student data to '{filepath}': {e}")
+    return False
+
+
+def update_fixed_width_data(filepath: str, students: List[Dict], reporter: Reporter, num_assignment_marks_to_write: int) -> bool:
+    """
+    Records the roster in an existing fixed-width file by writing only the cells that changed:
+    one byte per changed mark plus the Total/Rate cells of the affected records, and the
+    name field of renamed students. Falls back to a full rewrite when the roster no longer
+    fits the file (new or removed students, different column count, or a name longer than
+    the file's name field).
+
+    Args:
+        filepath (str): Path to the fixed-width namelist file.
+        students (List[Dict]): List of student data dictionaries.
+        reporter (Reporter): Reporter instance for logging.
+        num_assignment_marks_to_write (int): The number of assignment mark columns to write.
+
+    Returns:
+        bool: True if the file was updated or rewritten.
+    """
+    if not os.path.exists(filepath) or os.path.getsize(filepath) < _HEADER.size:
+        return save_fixed_width_data(filepath, students, reporter, num_assignment_marks_to_write)
+
+    cells_written = 0
+    records_touched = 0
+    try:
+        with open(filepath, 'r+b') as f, mmap.mmap(f.fileno(), 0) as mm:
+            id_width, name_width, num_assignment_cols = _read_header(mm)
+            record_size = _record_size(id_width, name_width, num_assignment_cols)
+            num_records = (len(mm) - _HEADER.size) // record_size
+
+            if num_assignment_cols != num_assignment_marks_to_write or num_records != len(students):
+                needs_rewrite = True
+            else:
+                row_offsets = {}
+                for row in range(num_records):
+                    offset = _HEADER.size + row * record_size
+                    row_offsets[mm[offset:offset + id_width].rstrip(b'\0').decode('utf-8')] = offset
+                name_bytes = {s['id']: s['name'].encode('utf-8') for s in students}
+                needs_rewrite = any(s['id'] not in row_offsets or len(name_bytes[s['id']]) > name_width for s in students)
+
+            if not needs_rewrite:
+                marks_offset = id_width + name_width
+                summary_offset = marks_offset + num_assignment_cols
+                for student in students:
+                    offset = row_offsets[student['id']]
+                    touched = False
+                    new_name = name_bytes[student['id']].ljust(name_width, b'\0')
+                    if mm[offset + id_width:offset + marks_offset] != new_name:
+                        mm[offset + id_width:offset + marks_offset] = new_name # Renamed student
+                        touched = True
+                    new_marks = _padded_marks(student, num_assignment_cols)
+                    old_marks = mm[offset + marks_offset:offset + summary_offset]
+                    if new_marks != old_marks:
+                        for col, (old, new) in enumerate(zip(old_marks, new_marks)):
+                            if old != new:
+                                mm[offset + marks_offset + col] = new
+                                cells_written += 1
+                    summary = _SUMMARY.pack(student['total'], student['rate'])
+                    if new_marks != old_marks or mm[offset + summary_offset:offset + record_size] != summary:
+                        mm[offset + summary_offset:offset + record_size] = summary
+                        touched = True
+                    records_touched += touched
+                mm.flush()
+    except (ValueError, struct.error) as e:
+        reporter.error(f"Cannot update fixed-width namelist '{filepath}' in place: {e}")
+        return False
+    except Exception as e:
+        reporter.error(f"Failed to update fixed-width namelist '{filepath}': {e}")
+        return False
+
+    if needs_rewrite:
+        reporter.info(f"Roster layout changed; rewriting fixed-width file '{filepath}'.")
+        return save_fixed_width_data(filepath, students, reporter, num_assignment_marks_to_write)
+
+    reporter.info(f"Updated fixed-width file {filepath} in place: {cells_written} mark cell(s) in {records_touched} record(s).")
+    return True
@@ -0,0 +1,255 @@
+"""
+Rolling version history of a roster, stored as compact deltas.
+
+Each save that changes the roster appends one JSON line to `<namelist><HISTORY_SUFFIX>`
+describing how the previous version became the new one:
+
+    columns  -- mark column count before and after
+    changed  -- per student whose marks changed: the XOR of old and new marks, packed
+                as one bit per column ("b" + hex) when all marks are 0/1, otherwise one
+                byte per column ("x" + hex)
+    added    -- full rows of students that appeared
+    removed  -- full rows (and positions) of students that disappeared
+    renamed  -- previous names of students whose name changed
+
+The latest version is the current namelist; any older version is rebuilt by applying the
+deltas backwards, so storage grows with what changed rather than with the roster size.
+"""
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import List, Dict, Tuple, Optional
+from .config import HISTORY_SUFFIX, HISTORY_MAX_VERSIONS
+from .reporting import Reporter
+
+
+def get_history_path(namelist_path: str) -> str:
+    """Returns the path of the version history belonging to a namelist file."""
+    return namelist_path + HISTORY_SUFFIX
+
+
+def _pad(marks: List[int], width: int) -> List[int]:
+    marks = list(marks[:width])
+    return marks + [0] * (width - len(marks))
+
+
+def snapshot_roster(students: List[Dict], num_assignment_cols: int) -> List[Dict]:
+    """Returns a copy of the roster's IDs, names and marks, padded or trimmed to `num_assignment_cols`."""
+    return [{"id": s['id'], "name": s['name'], "marks": _pad(s['marks'], num_assignment_cols)} for s in students]
+
+
+def roster_digest(students: List[Dict], num_assignment_cols: int) -> str:
+    """Digest of a roster's IDs, names and marks, independent of the storage format."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str(num_assignment_cols).encode('utf-8'))
+    for s in snapshot_roster(students, num_assignment_cols):
+        digest.update(("\n" + s['id'] + "\t" + s['name'] + "\t" + ",".join(map(str, s['marks']))).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _encode_xor(old: List[int], new: List[int]) -> str:
+    xor = [a ^ b for a, b in zip(old, new)]
+    if all(m in (0, 1) for m in old) and all(m in (0, 1) for m in new):
+        bits = 0
+        for i, flipped in enumerate(xor):
+            if flipped:
+                bits |= 1 << i
+        return "b" + format(bits, 'x')
+    return "x" + bytes(xor).hex()
+
+
+def _apply_xor(marks: List[int], encoded: str) -> List[int]:
+    if encoded[0] == "b":
+        bits = int(encoded[1:], 16)
+        return [m ^ ((bits >> i) & 1) for i, m in enumerate(marks)]
+    xor = bytes.fromhex(encoded[1:])
+    return [m ^ (xor[i] if i < len(xor) else 0) for i, m in enumerate(marks)]
+
+
+def compute_delta(before: List[Dict], before_cols: int, after: List[Dict], after_cols: int) -> Optional[Dict]:
+    """
+    Computes the delta that turns roster `before` into roster `after`.
+
+    Args:
+        before (List[Dict]): Snapshot (see `snapshot_roster`) of the previous version.
+        before_cols (int): Mark column count of the previous version.
+        after (List[Dict]): Snapshot of the new version.
+        after_cols (int): Mark column count of the new version.
+
+    Returns:
+        Optional[Dict]: The delta, or None if the two versions are identical.
+    """
+    width = max(before_cols, after_cols)
+    before_by_id = {s['id']: (position, s) for position, s in enumerate(before)}
+    after_ids = {s['id'] for s in after}
+
+    changed, added, renamed = [], [], []
+    for s in after:
+        entry = before_by_id.get(s['id'])
+        if entry is None:
+            added.append([s['id'], s['name'], s['marks']])
+            continue
+        old = entry[1]
+        old_marks, new_marks = _pad(old['marks'], width), _pad(s['marks'], width)
+        if old_marks != new_marks:
+            changed.append([s['id'], _encode_xor(old_marks, new_marks)])
+        if old['name'] != s['name']:
+            renamed.append([s['id'], old['name']])
+    removed = [[position, s['id'], s['name'], s['marks']] for position, s in enumerate(before) if s['id'] not in after_ids]
+
+    if not (changed or added or removed or renamed) and before_cols == after_cols \
+            and [s['id'] for s in before] == [s['id'] for s in after]:
+        return None
+    return {
+        "columns": [before_cols, after_cols],
+        "changed": changed,
+        "added": added,
+        "removed": removed,
+        "renamed": renamed,
+        "order": None if [s['id'] for s in before if s['id'] in after_ids] == [s['id'] for s in after if s['id'] in before_by_id]
+                 else [s['id'] for s in before],
+    }
+
+
+def revert_delta(roster: List[Dict], delta: Dict) -> Tuple[List[Dict], int]:
+    """
+    Applies a delta backwards: turns the version it produced back into the previous version.
+
+    Returns:
+        Tuple[List[Dict], int]: The previous version's roster snapshot and mark column count.
+    """
+    before_cols, after_cols = delta['columns']
+    width = max(before_cols, after_cols)
+    xor_by_id = dict(delta['changed'])
+    names_by_id = dict(delta['renamed'])
+    added_ids = {row[0] for row in delta['added']}
+
+    previous = []
+    for s in roster:
+        if s['id'] in added_ids:
+            continue
+        marks = _pad(s['marks'], width)
+        if s['id'] in xor_by_id:
+            marks = _apply_xor(marks, xor_by_id[s['id']])
+        previous.append({"id": s['id'], "name": names_by_id.get(s['id'], s['name']), "marks": _pad(marks, before_cols)})
+    for position, student_id, name, marks in sorted(delta['removed']):
+        previous.insert(position, {"id": student_id, "name": name, "marks": _pad(marks, before_cols)})
+    if delta.get('order'):
+        position_of = {student_id: i for i, student_id in enumerate(delta['order'])}
+        previous.sort(key=lambda s: position_of.get(s['id'], len(position_of)))
+    return previous, before_cols
+
+
+def load_history(namelist_path: str, reporter: Reporter) -> List[Dict]:
+    """Reads all recorded versions of a namelist, oldest first."""
+    history_path = get_history_path(namelist_path)
+    versions = []
+    if not os.path.exists(history_path):
+        return versions
+    try:
+        with open(history_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    versions.append(json.loads(line))
+    except (OSError, ValueError) as e:
+        reporter.error(f"Failed to read version history '{history_path}': {e}")
+        return []
+    return versions
+
+
+def record_version(namelist_path: str, before: List[Dict], before_cols: int, students: List[Dict], num_assignment_cols: int,
+                   action: str, reporter: Reporter) -> Optional[int]:
+    """
+    Appends the delta from `before` to the current roster as a new version.
+    The history keeps at most `config.HISTORY_MAX_VERSIONS` versions; older deltas are dropped,
+    as are all earlier deltas if `before` is not the latest recorded version (an outside edit).
+
+    Args:
+        namelist_path (str): Path of the namelist the history belongs to.
+        before (List[Dict]): Snapshot of the roster before the change.
+        before_cols (int): Mark column count before the change.
+        students (List[Dict]): The roster as saved.
+        num_assignment_cols (int): Mark column count as saved.
+        action (str): Short description of what produced the version (e.g. 'process').
+        reporter (Reporter): Reporter instance for logging.
+
+    Returns:
+        Optional[int]: The new version number, or None if nothing changed or on errors.
+    """
+    after = snapshot_roster(students, num_assignment_cols)
+    delta = compute_delta(before, before_cols, after, num_assignment_cols)
+    if delta is None:
+        return None
+
+    versions = load_history(namelist_path, reporter)
+    delta.update({
+        "version": versions[-1]['version'] + 1 if versions else 1,
+        "created": datetime.now().isoformat(timespec='seconds'),
+        "action": action,
+        "digest": roster_digest(after, num_assignment_cols),
+    })
+    history_path = get_history_path(namelist_path)
+    kept = None
+    if versions and versions[-1]['digest'] != roster_digest(before, before_cols):
+        # The namelist was edited outside of recorded runs; older deltas no longer lead back correctly
+        reporter.warning(f"Namelist changed since version {versions[-1]['version']} was recorded; "
+                         f"earlier versions are dropped from '{history_path}'.")
+        kept = [delta]
+    elif len(versions) >= HISTORY_MAX_VERSIONS:
+        kept = versions[len(versions) - HISTORY_MAX_VERSIONS + 1:] + [delta]
+    try:
+        if kept is not None:
+            temp_path = history_path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.writelines(json.dumps(v, separators=(',', ':')) + "\n" for v in kept)
+            os.replace(temp_path, history_path)
+        else:
+            with open(history_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(delta, separators=(',', ':')) + "\n")
+    except OSError as e:
+        reporter.error(f"Failed to record version in '{history_path}': {e}")
+        return None
+    reporter.info(f"Recorded roster version {delta['version']} in {history_path}")
+    return delta['version']
+
+
+def rebuild_version(namelist_path: str, students: List[Dict], num_assignment_cols: int, target_version: int,
+                    reporter: Reporter, force: bool = False) -> Optional[Tuple[List[Dict], int]]:
+    """
+    Rebuilds an older roster version by applying deltas backwards from the current roster.
+
+    Args:
+        namelist_path (str): Path of the namelist the history belongs to.
+        students (List[Dict]): The current roster (the latest version).
+        num_assignment_cols (int): Mark column count of the current roster.
+        target_version (int): Version to rebuild.
+        reporter (Reporter): Reporter instance for logging.
+        force (bool): Rebuild even if the current roster does not match the latest recorded version.
+
+    Returns:
+        Optional[Tuple[List[Dict], int]]: The rebuilt roster (ID, name and marks only) and its
+                                          mark column count, or None if it cannot be rebuilt.
+    """
+    versions = load_history(namelist_path, reporter)
+    if not versions:
+        reporter.error(f"No version history found for '{namelist_path}'.")
+        return None
+    latest = versions[-1]['version']
+    oldest = versions[0]['version'] - 1
+    if not oldest <= target_version <= latest:
+        reporter.error(f"Version {target_version} is not available; versions {oldest} to {latest} can be rebuilt.")
+        return None
+    if versions[-1]['digest'] != roster_digest(students, num_assignment_cols):
+        if not force:
+            reporter.error("The namelist was changed since the latest recorded version; use --force to undo anyway.")
+            return None
+        reporter.warning("The namelist was changed since the latest recorded version; those changes will be lost.")
+
+    roster = snapshot_roster(students, num_assignment_cols)
+    cols = num_assignment_cols
+    for delta in reversed(versions):
+        if delta['version'] <= target_version:
+            break
+        roster, cols = revert_delta(roster, delta)
+    return roster, cols
@@ -0,0 +1,401 @@
+"""
+Append-only journal of accepted submissions.
+
+Every submission file that `process` accepts for a student is recorded once as a
+tab-separated line in `<namelist><JOURNAL_SUFFIX>`:
+
+    run_id  recorded_at  student_id  assignment_index  folder  mtime  path
+
+Each run only appends the events it has not seen before, so the journal grows with
+new submissions and is never rewritten. The identities of the journaled events are kept
+in a SQLite key index (`<journal><JOURNAL_KEYS_SUFFIX>`) together with the number of
+journal bytes and events it covers, so a run looks up only its own candidate events and
+reads only the journal lines appended since the key index was last brought up to date
+(none, unless a run was interrupted between appending and updating the index). Periodically the journal is compacted: a
+timestamp index (`<journal><JOURNAL_INDEX_SUFFIX>`) of (mtime, byte offset) pairs, sorted
+by mtime, is rebuilt over everything journaled so far. `query --as-of` replays the
+journal up to a point in time by binary-searching that index and scanning only the
+uncompacted tail.
+"""
+import bisect
+import os
+import sqlite3
+import struct
+from contextlib import closing
+from datetime import datetime
+from typing import List, Dict, Tuple, Iterator, Set, Optional
+from .config import JOURNAL_SUFFIX, JOURNAL_INDEX_SUFFIX, JOURNAL_KEYS_SUFFIX
+from .reporting import Reporter
+
+JOURNAL_INDEX_MAGIC = b'APJI'
+JOURNAL_INDEX_VERSION = 1
+
+# magic, version, journal bytes covered by the index, number of entries
+_INDEX_HEADER = struct.Struct('<4sHQI')
+# submission mtime, byte offset of the event line in the journal
+_INDEX_ENTRY = struct.Struct('<dQ')
+
+JOURNAL_KEYS_VERSION = 1
+
+_KEYS_SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+CREATE TABLE keys (
+    student_id TEXT NOT NULL, assignment_index INTEGER NOT NULL, path TEXT NOT NULL, mtime TEXT NOT NULL,
+    PRIMARY KEY (student_id, assignment_index, path, mtime)
+) WITHOUT ROWID;
+"""
+
+# (student_id, assignment_index, folder, path, mtime)
+JournalEvent = Tuple[str, int, str, str, float]
+
+
+def get_journal_path(namelist_path: str) -> str:
+    """Returns the path of the submission journal belonging to a namelist file."""
+    return namelist_path + JOURNAL_SUFFIX
+
+
+def get_journal_index_path(namelist_path: str) -> str:
+    """Returns the path of the journal's timestamp index."""
+    return get_journal_path(namelist_path) + JOURNAL_INDEX_SUFFIX
+
+
+def get_journal_keys_path(namelist_path: str) -> str:
+    """Returns the path of the journal's key index."""
+    return get_journal_path(namelist_path) + JOURNAL_KEYS_SUFFIX
+
+
+def new_run_id() -> str:
+    """Returns an identifier for the current processing run."""
+    return f"{datetime.now().strftime('%Y%m%dT%H%M%S')}-{os.getpid()}"
+
+
+def _format_mtime(mtime: float) -> str:
+    return f"{mtime:.6f}"
+
+
+def _parse_line(line: str) -> Tuple[str, str, str, int, str, float, str]:
+    run_id, recorded_at, student_id, assignment_index, folder, mtime, path = line.rstrip('\n').split('\t', 6)
+    return run_id, recorded_at, student_id, int(assignment_index), folder, float(mtime), path
+
+
+def _iter_journal_lines(journal_path: str, start_offset: int = 0) -> Iterator[Tuple[int, str]]:
+    """Yields (byte offset, line) pairs of the journal, starting at `start_offset`."""
+    with open(journal_path, 'rb') as f:
+        f.seek(start_offset)
+        offset = start_offset
+        for raw_line in f:
+            if raw_line.endswith(b'\n'): # A partial last line is an interrupted append; ignore it
+                yield offset, raw_line.decode('utf-8')
+            offset += len(raw_line)
+
+
+def load_journal_keys(namelist_path: str, reporter: Reporter) -> Set[Tuple[str, int, str, str]]:
+    """
+    Reads the identity of every journaled event by scanning the whole journal. Used only
+    when the key index cannot be opened.
+
+    Returns:
+        Set[Tuple[str, int, str, str]]: (student_id, assignment_index, path, formatted mtime) keys.
+    """
+    journal_path = get_journal_path(namelist_path)
+    keys = set()
+    if not os.path.exists(journal_path):
+        return keys
+    try:
+        for _, line in _iter_journal_lines(journal_path):
+            _, _, student_id, assignment_index, _, mtime, path = _parse_line(line)
+            keys.add((student_id, assignment_index, path, _format_mtime(mtime)))
+    except (OSError, ValueError) as e:
+        reporter.warning(f"Could not fully read submission journal '{journal_path}': {e}")
+    return keys
+
+
+def _read_keys_meta(conn: sqlite3.Connection) -> Dict[str, int]:
+    return dict(conn.execute("SELECT key, value FROM meta").fetchall())
+
+
+def _write_keys_meta(conn: sqlite3.Connection, covered_bytes: int, events: int):
+    conn.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", [
+        ("version", JOURNAL_KEYS_VERSION), ("covered_bytes", covered_bytes), ("events", events),
+    ])
+
+
+def _open_key_index(namelist_path: str, reporter: Reporter) -> Tuple[sqlite3.Connection, int, int]:
+    """
+    Opens the journal's key index and brings it up to date with the journal, reading only
+    the journal lines past the bytes it covers. A missing, outdated or inconsistent index
+    (e.g. covering more bytes than the journal has) is rebuilt from the whole journal.
+
+    Returns:
+        Tuple[sqlite3.Connection, int, int]: The open index, and the journal bytes and number
+            of events it now covers.
+
+    Raises:
+        sqlite3.Error, OSError, ValueError: If the index or the journal cannot be read.
+    """
+    journal_path = get_journal_path(namelist_path)
+    keys_path = get_journal_keys_path(namelist_path)
+    journal_size = os.path.getsize(journal_path) if os.path.exists(journal_path) else 0
+
+    conn = sqlite3.connect(keys_path)
+    try:
+        try:
+            meta = _read_keys_meta(conn)
+        except sqlite3.DatabaseError:
+            meta = {}
+        covered_bytes = meta.get("covered_bytes", 0)
+        events = meta.get("events", 0)
+        if meta.get("version") != JOURNAL_KEYS_VERSION or covered_bytes > journal_size:
+            conn.close()
+            os.unlink(keys_path)
+            conn = sqlite3.connect(keys_path)
+            conn.executescript(_KEYS_SCHEMA)
+            covered_bytes = events = 0
+            if journal_size:
+                reporter.info(f"Rebuilding the key index of submission journal '{journal_path}'.")
+
+        if covered_bytes < journal_size:
+            with conn:
+                for offset, line in _iter_journal_lines(journal_path, covered_bytes):
+                    _, _, student_id, assignment_index, _, mtime, path = _parse_line(line)
+                    conn.execute("INSERT OR IGNORE INTO keys VALUES (?, ?, ?, ?)",
+                                 (student_id, assignment_index, path, _format_mtime(mtime)))
+                    covered_bytes = offset + len(line.encode('utf-8'))
+                    events += 1
+                _write_keys_meta(conn, covered_bytes, events)
+    except BaseException:
+        conn.close()
+        raise
+    return conn, covered_bytes, events
+
+
+def _append_lines(journal_path: str, lines: List[str]):
+    with open(journal_path, 'a', encoding='utf-8', newline='\n') as f:
+        f.writelines(lines)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def append_journal_events(namelist_path: str, events: List[JournalEvent], run_id: str, reporter: Reporter) -> int:
+    """
+    Appends the events that are not in the journal yet, and fsyncs the journal. Each
+    candidate event is looked up in the key index, which is updated once the append is
+    on disk; if the key index is unusable the whole journal is scanned instead.
+
+    Args:
+        namelist_path (str): Path of the namelist the journal belongs to.
+        events (List[JournalEvent]): Candidate events (student_id, assignment_index, folder, path, mtime).
+        run_id (str): Identifier of the current run.
+        reporter (Reporter): Reporter instance for logging.
+
+    Returns:
+        int: The number of events appended.
+    """
+    journal_path = get_journal_path(namelist_path)
+    recorded_at = datetime.now().isoformat(timespec='seconds')
+
+    def format_line(student_id, assignment_index, folder, path, mtime):
+        return "\t".join([run_id, recorded_at, student_id, str(assignment_index), folder, _format_mtime(mtime), path]) + "\n"
+
+    try:
+        conn, covered_bytes, journaled = _open_key_index(namelist_path, reporter)
+    except (sqlite3.Error, OSError, ValueError) as e:
+        reporter.warning(f"Could not use the key index of submission journal '{journal_path}' ({e}); scanning the journal.")
+        conn = None
+
+    if conn is None:
+        known_keys = load_journal_keys(namelist_path, reporter)
+        lines = []
+        for student_id, assignment_index, folder, path, mtime in events:
+            key = (student_id, assignment_index, path, _format_mtime(mtime))
+            if key not in known_keys:
+                known_keys.add(key)
+                lines.append(format_line(student_id, assignment_index, folder, path, mtime))
+        if not lines:
+            return 0
+        try:
+            _append_lines(journal_path, lines)
+        except OSError as e:
+            reporter.error(f"Failed to append to submission journal '{journal_path}': {e}")
+            return 0
+        return len(lines)
+
+    with closing(conn):
+        try:
+            lines = []
+            for student_id, assignment_index, folder, path, mtime in events:
+                cursor = conn.execute("INSERT OR IGNORE INTO keys VALUES (?, ?, ?, ?)",
+                                      (student_id, assignment_index, path, _format_mtime(mtime)))
+                if cursor.rowcount == 1:
+                    lines.append(format_line(student_id, assignment_index, folder, path, mtime))
+            if not lines:
+                conn.rollback()
+                return 0
+            _append_lines(journal_path, lines)
+        except (OSError, sqlite3.Error) as e:
+            conn.rollback()
+            reporter.error(f"Failed to append to submission journal '{journal_path}': {e}")
+            return 0
+        try:
+            _write_keys_meta(conn, covered_bytes + sum(len(line.encode('utf-8')) for line in lines), journaled + len(lines))
+            conn.commit()
+        except sqlite3.Error as e: # The journal is intact; the next run catches the index up from it
+            reporter.warning(f"Could not update the key index of submission journal '{journal_path}': {e}")
+    return len(lines)
+
+
+def parse_as_of(value: str) -> datetime:
+    """
+    Parses an `--as-of` value: an ISO date (`2025-03-17`, meaning the end of that day)
+    or an ISO date and time (`2025-03-17T09:30`).
+
+    Raises:
+        ValueError: If the value is not a valid ISO date or date-time.
+    """
+    if len(value) == 10:
+        return datetime.strptime(value, '%Y-%m-%d').replace(hour=23, minute=59, second=59, microsecond=999999)
+    return datetime.fromisoformat(value)
+
+
+def baseline_events(students: List[Dict], num_assignment_cols: int) -> List[JournalEvent]:
+    """
+    Events for the marks a roster already holds when its journal is started, so that
+    replays include marks recorded before journaling. They carry an empty path and mtime 0.
+    """
+    return [
+        (student['id'], i, '', '', 0.0)
+        for student in students
+        for i, mark in enumerate(student['marks'][:num_assignment_cols]) if mark
+    ]
+
+
+def _read_index(index_path: str) -> Tuple[int, List[float], List[int]]:
+    with open(index_path, 'rb') as f:
+        data = f.read()
+    magic, version, covered_bytes, count = _INDEX_HEADER.unpack_from(data, 0)
+    if magic != JOURNAL_INDEX_MAGIC or version != JOURNAL_INDEX_VERSION:
+        raise ValueError("bad journal index header")
+    mtimes = []
+    offsets = []
+    for mtime, offset in _INDEX_ENTRY.iter_unpack(data[_INDEX_HEADER.size:_INDEX_HEADER.size + count * _INDEX_ENTRY.size]):
+        mtimes.append(mtime)
+        offsets.append(offset)
+    return covered_bytes, mtimes, offsets
+
+
+def _journaled_event_count(namelist_path: str) -> Optional[int]:
+    """Returns the number of journal events recorded by an up-to-date key index, else None."""
+    keys_path = get_journal_keys_path(namelist_path)
+    if not os.path.exists(keys_path):
+        return None
+    try:
+        with closing(sqlite3.connect(keys_path)) as conn:
+            meta = _read_keys_meta(conn)
+    except sqlite3.Error:
+        return None
+    if meta.get("version") != JOURNAL_KEYS_VERSION or meta.get("covered_bytes") != os.path.getsize(get_journal_path(namelist_path)):
+        return None
+    return meta.get("events")
+
+
+def count_uncompacted_events(namelist_path: str) -> int:
+    """
+    Returns the number of journal events appended since the last compaction: the key
+    index's event count minus the timestamp index's, or, if either is unavailable, the
+    number of lines in the uncompacted tail.
+    """
+    journal_path = get_journal_path(namelist_path)
+    if not os.path.exists(journal_path):
+        return 0
+    covered_bytes = indexed = 0
+    try:
+        covered_bytes, mtimes, _ = _read_index(get_journal_index_path(namelist_path))
+        indexed = len(mtimes)
+    except (OSError, ValueError, struct.error):
+        pass
+    journaled = _journaled_event_count(namelist_path)
+    if journaled is not None and journaled >= indexed:
+        return journaled - indexed
+    return sum(1 for _ in _iter_journal_lines(journal_path, covered_bytes))
+
+
+def compact_journal(namelist_path: str, reporter: Reporter) -> bool:
+    """
+    Rebuilds the timestamp index over the whole journal. The journal itself is left untouched.
+
+    Returns:
+        bool: True if the index was written.
+    """
+    journal_path = get_journal_path(namelist_path)
+    index_path = get_journal_index_path(namelist_path)
+    if not os.path.exists(journal_path):
+        reporter.warning(f"No submission journal found at '{journal_path}'; nothing to compact.")
+        return False
+    try:
+        entries = []
+        covered_bytes = 0
+        for offset, line in _iter_journal_lines(journal_path):
+            entries.append((_parse_line(line)[5], offset))
+            covered_bytes = offset + len(line.encode('utf-8'))
+        entries.sort()
+
+        chunks = [_INDEX_HEADER.pack(JOURNAL_INDEX_MAGIC, JOURNAL_INDEX_VERSION, covered_bytes, len(entries))]
+        chunks.extend(_INDEX_ENTRY.pack(mtime, offset) for mtime, offset in entries)
+        temp_path = index_path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(b''.join(chunks))
+        os.replace(temp_path, index_path)
+    except (OSError, ValueError) as e:
+        reporter.error(f"Failed to compact submission journal '{journal_path}': {e}")
+        return False
+    reporter.info(f"Compacted submission journal '{journal_path}': indexed {len(entries)} event(s).")
+    return True
+
+
+def replay_journal_as_of(namelist_path: str, cutoff: datetime, reporter: Reporter) -> Dict[str, Dict[int, int]]:
+    """
+    Replays journaled submissions whose file mtime is at or before `cutoff`.
+
+    Args:
+        namelist_path (str): Path of the namelist the journal belongs to.
+        cutoff (datetime): Point in time to rebuild the marks for.
+        reporter (Reporter): Reporter instance for logging.
+
+    Returns:
+        Dict[str, Dict[int, int]]: For each student ID, the number of journaled files per
+                                   assignment index up to the cutoff.
+    """
+    journal_path = get_journal_path(namelist_path)
+    marks = {}
+    if not os.path.exists(journal_path):
+        reporter.error(f"No submission journal found at '{journal_path}'. Run 'process --journal' first.")
+        return marks
+
+    cutoff_ts = cutoff.timestamp()
+
+    def apply(line: str):
+        _, _, student_id, assignment_index, _, mtime, _ = _parse_line(line)
+        if mtime <= cutoff_ts:
+            per_student = marks.setdefault(student_id, {})
+            per_student[assignment_index] = per_student.get(assignment_index, 0) + 1
+
+    covered_bytes = 0
+    try:
+        try:
+            covered_bytes, mtimes, offsets = _read_index(get_journal_index_path(namelist_path))
+        except (OSError, ValueError, struct.error):
+            covered_bytes, mtimes, offsets = 0, [], []
+            reporter.info("Journal has no valid timestamp index; replaying the whole journal.")
+
+        # Indexed part: only the events up to the cutoff, read in file order
+        selected = sorted(offsets[:bisect.bisect_right(mtimes, cutoff_ts)])
+        with open(journal_path, 'rb') as f:
+            for offset in selected:
+                f.seek(offset)
+                apply(f.readline().decode('utf-8'))
+        # Uncompacted tail
+        for _, line in _iter_journal_lines(journal_path, covered_bytes):
+            apply(line)
+    except (OSError, ValueError) as e:
+        reporter.error(f"Failed to replay submission journal '{journal_path}': {e}")
+    return marks
@@ -1,10 +1,128 @@
 
 import argparse
+import json
 import os
+import sys
+from collections import Counter
 from . import file_operations
 from . import processing
-from .reporting import Reporter, display_student_details, display_attendance_table # Updated import
-from .config import DEFAULT_FILE_EXTENSION, DEFAULT_NAMELIST_FILE, DEFAULT_SUBMISSIONS_DIR
+from . import journal
+from . import sqlite_store
+from . import sharding
+from . import tsv_namelist
+from . import history
+from . import scan_index
+from . import term_archive
+from . import merging
+from . import blob_store
+from . import query_index
+from . import view_filter
+from . import shell
+from . import server
+from . import view_cache
+from . import roster_stats
+from . import missing_lists
+from .reporting import Reporter, display_student_details, display_attendance_table, display_trend_table, display_batch_query_table, display_roster_stats # Updated import
+from .config import DEFAULT_FILE_EXTENSION, DEFAULT_NAMELIST_FILE, DEFAULT_SUBMISSIONS_DIR, STORE_FORMATS, DEFAULT_STORE, JOURNAL_COMPACT_THRESHOLD, HISTORY_MAX_VERSIONS, MAX_SUBMISSION_COUNT, DEFAULT_PAGE_SIZE, DEFAULT_SERVE_HOST, DEFAULT_SERVE_PORT, ROSTER_CACHE_MAX_BYTES
+
+def run_archive_stage(args, accepted_submissions, reporter: Reporter):
+    """Archives the accepted submission files of a 'process' run into the content-addressed store."""
+    reporter.info(f"Archiving {len(accepted_submissions)} accepted submission(s) into '{args.archive_dir}'.")
+    summary = blob_store.archive_submissions(args.archive_dir, accepted_submissions, args.submissions_root_dir, reporter,
+                                           max_workers=args.workers)
+    if summary is not None:
+        reporter.info(
+            f"Archived {summary['files']} file(s): {summary['hashed']} hashed, {summary['unchanged']} unchanged since "
+            f"the last run, {summary['stored']} new blob(s), {summary['deduplicated']} duplicate(s) of stored content."
+        )
+
+
+def handle_sharded_process_action(args, reporter: Reporter):
+    """
+    Handles the 'process' action for a sharded roster: scan all folders once, route each
+    extracted ID to its shard, then mark, recalculate and save every shard in a process pool.
+    """
+    shards = sharding.read_shard_manifest(args.namelist_file, reporter)
+    if not shards:
+        reporter.error("No shards loaded. Exiting process action.")
+        return
+    if args.header or args.journal:
+        reporter.warning("'--header' and '--journal' are not supported with '--store sharded' and are ignored.")
+    reporter.info(f"Sharded roster: {len(shards)} shard(s) keyed by the first {sharding.manifest_prefix_length(shards)} ID character(s).")
+
+    assignment_folders = file_operations.discover_assignment_folders(args.submissions_root_dir, reporter)
+    folder_columns = [(folder_name, i) for i, folder_name in enumerate(assignment_folders)]
+    # Every shard gets the same number of columns: the widest shard, grown to the folder count
+    shard_cols = [tsv_namelist.peek_mark_column_count(path, reporter) for path in shards.values()]
+    if None in shard_cols:
+        reporter.error("Cannot read every shard of the roster. Exiting process action.")
+        return
+    num_assignment_cols = max([len(assignment_folders)] + shard_cols)
+    if args.only:
+        selected_folders = {name for value in args.only for name in value.split(',') if name}
+        folder_columns = [(name, i) for name, i in folder_columns if name in selected_folders]
+        reporter.info(f"Re-marking only: {', '.join(name for name, _ in folder_columns) or '(nothing)'}")
+
+    # Scan phase: extract IDs from every selected folder
+    scanned = []
+    files_per_folder = {}
+    errors_per_folder = {}
+    for folder_name, assignment_index in folder_columns:
+        reporter.info(f"Processing folder: '{folder_name}' (Assignment {assignment_index + 1})")
+        assignment_path = os.path.join(args.submissions_root_dir, folder_name)
+        submission_files = file_operations.get_submission_files_in_folder(assignment_path, args.ext, reporter)
+        files_per_folder[folder_name] = len(submission_files)
+        for file_path in submission_files:
+            student_id = processing.extract_student_id(os.path.basename(file_path), reporter)
+            if student_id:
+                scanned.append((student_id, assignment_index, folder_name, file_path))
+            else:
+                reporter.log_file_error(os.path.basename(file_path), "Could not extract student ID.", folder_name)
+                errors_per_folder[folder_name] = errors_per_folder.get(folder_name, 0) + 1
+
+    # Route to shards and apply in parallel
+    per_shard, unrouted = sharding.route_submissions(scanned, shards)
+    results = sharding.process_shards_in_parallel(
+        per_shard, num_assignment_cols, [i for _, i in folder_columns] if args.only else [], args.workers,
+        count_mode=args.count
+    )
+
+    unknown = list(unrouted)
+    marked_per_folder = {}
+    for shard_path, result in results.items():
+        if result['error']:
+            reporter.error(f"{result['error']} {len(per_shard[shard_path])} submission(s) for it were not applied.")
+        unknown.extend(result['unknown'])
+        for _, _, folder_name, _ in result['accepted']:
+            marked_per_folder[folder_name] = marked_per_folder.get(folder_name, 0) + 1
+    if args.archive_dir:
+        run_archive_stage(args, [submission for result in results.values() for submission in result['accepted']], reporter)
+    for student_id, _, folder_name, file_path in unknown:
+        reporter.log_file_error(os.path.basename(file_path), f"Student ID '{student_id}' not found in namelist.", folder_name)
+        errors_per_folder[folder_name] = errors_per_folder.get(folder_name, 0) + 1
+
+    for folder_name, _ in folder_columns:
+        reporter.folder_summary(
+            folder_name,
+            files_per_folder[folder_name],
+            marked_per_folder.get(folder_name, 0),
+            errors_per_folder.get(folder_name, 0),
+            args.ext
+        )
+
+    reporter.overall_summary(
+        total_folders_processed=len(folder_columns),
+        total_files_found=sum(files_per_folder.values()),
+        total_marks_recorded=sum(marked_per_folder.values()),
+        total_error_files=len(reporter.error_files_details)
+    )
+
+    if args.view_after_process:
+        students_list, num_assignment_cols = sharding.load_sharded_data(args.namelist_file, reporter)
+        display_attendance_table(students_list, num_assignment_cols, reporter)
+
+    reporter.info("Processing action complete.")
+
 
 def handle_process_action(args, reporter: Reporter):
     """Handles the 'process' action: update records based on submissions."""
@@ -13,8 +131,12 @@ def handle_process_action(args, reporter: Reporter):
     reporter.info(f"Submissions directory: {args.submissions_root_dir}")
     reporter.info(f"Processing file extension: {args.ext}")
 
+    if args.store == 'sharded':
+        handle_sharded_process_action(args, reporter)
+        return
+
     # Load student data. num_assignment_cols is the number of actual mark columns.
-    students_list, num_assignment_cols = file_operations.load_student_data(args.namelist_file, reporter)
+    students_list, num_assignment_cols = file_operations.load_roster(args.namelist_file, args.store, reporter)
     
     if num_assignment_cols == -1 and not students_list: # Indicates a failure to determine structure from load_student_data
         reporter.error("Failed to determine namelist structure or load data. Cannot process.")
@@ -22,9 +144,14 @@ def handle_process_action(args, reporter: Reporter):
     if not students_list: # General case for empty or fully unparseable after structure attempt
         reporter.error("No student data loaded. Exiting process action.")
         return
-
+    previous_version = history.snapshot_roster(students_list, num_assignment_cols)
+    previous_num_cols = num_assignment_cols
 
     students_dict = {student['id']: student for student in students_list}
+    journal_events = []
+    if args.journal and not os.path.exists(journal.get_journal_path(args.namelist_file)):
+        # Starting a journal: record the marks the roster already holds so replays include them
+        journal_events = journal.baseline_events(students_list, num_assignment_cols)
     assignment_folders = file_operations.discover_assignment_folders(args.submissions_root_dir, reporter)
 
     if not assignment_folders:
@@ -35,22 +162,62 @@ def handle_process_action(args, reporter: Reporter):
     if assignment_folders: # Only log if folders were found
         reporter.info(f"Found {num_assignment_folders_found} assignment folder(s): {', '.join(assignment_folders)}")
 
-    # Cap processing by the number of assignment columns in the namelist
-    num_assignments_to_process = min(num_assignment_folders_found, num_assignment_cols)
+    # Map each folder to its mark column: by name when the namelist records folder names
+    # (header row / SQLite assignments table), otherwise by sorted position.
+    assignment_names = file_operations.load_assignment_names(args.namelist_file, args.store, reporter)
+    use_header = assignment_names is not None or args.header
+    if use_header and args.store == 'fixed':
+        reporter.error("The fixed-width format does not record assignment folder names; '--header' is not supported with '--store fixed'.")
+        return
+    if assignment_names is None and args.header:
+        # Name the existing columns after the folders they were filled from so far (sorted position)
+        assignment_names = [assignment_folders[i] if i < num_assignment_folders_found else f"A{i+1}" for i in range(num_assignment_cols)]
+        reporter.info("Adding a header row that maps assignment folders to mark columns.")
+
+    if use_header:
+        column_of = {name: i for i, name in enumerate(assignment_names)}
+        for folder_name in assignment_folders:
+            if folder_name not in column_of:
+                column_of[folder_name] = len(assignment_names)
+                assignment_names.append(folder_name)
+                reporter.info(f"New assignment folder '{folder_name}' is assigned mark column {column_of[folder_name] + 1}.")
+        folder_columns = [(folder_name, column_of[folder_name]) for folder_name in assignment_folders]
+        required_cols = len(assignment_names)
+    else:
+        folder_columns = [(folder_name, i) for i, folder_name in enumerate(assignment_folders)]
+        required_cols = num_assignment_folders_found
+        assignment_names = list(assignment_folders)
 
-    if num_assignment_folders_found > num_assignment_cols:
-        reporter.warning(
-            f"Found {num_assignment_folders_found} assignment folders, but namelist "
-            f"only supports {num_assignment_cols} assignment marks. "
-            f"Only the first {num_assignment_cols} assignments (folders) will be actively processed for marking."
+    # Grow the roster when there are more assignment folders than mark columns;
+    # the new columns start at 0 and are written out with the rest of the namelist.
+    if required_cols > num_assignment_cols:
+        reporter.info(
+            f"Found {required_cols} assignment folders, but namelist "
+            f"only has {num_assignment_cols} assignment mark column(s). "
+            f"Adding {required_cols - num_assignment_cols} new column(s)."
         )
+        processing.ensure_mark_capacity(students_list, required_cols, reporter)
+        num_assignment_cols = required_cols
+
+    if args.only:
+        selected_folders = {name for value in args.only for name in value.split(',') if name}
+        unknown_folders = selected_folders - set(assignment_folders)
+        if unknown_folders:
+            reporter.warning(f"Ignoring '--only' folder(s) not found in '{args.submissions_root_dir}': {', '.join(sorted(unknown_folders))}")
+        folder_columns = [(name, i) for name, i in folder_columns if name in selected_folders]
+        reporter.info(f"Re-marking only: {', '.join(name for name, _ in folder_columns) or '(nothing)'}")
+        # Re-marking starts from a clean column so that removed submissions are unmarked
+        for _, assignment_index in folder_columns:
+            for student in students_list:
+                student['marks'][assignment_index] = 0
     
     overall_files_found_in_relevant_folders = 0
     overall_successful_marks_count = 0 # Tracks new '1's set in this run
+    accepted_submissions = [] # (student ID, assignment index, folder name, file path) of every accepted file
+    scanned_ids = {} # Every extracted ID (on the roster or not) and its file count, per (folder, column)
     
-    # Process submissions from folders up to num_assignments_to_process
-    for assignment_index in range(num_assignments_to_process):
-        folder_name = assignment_folders[assignment_index]
+    # Process submissions from each selected folder into its mark column
+    for folder_name, assignment_index in folder_columns:
         reporter.info(f"Processing folder: '{folder_name}' (Assignment {assignment_index + 1})")
         assignment_path = os.path.join(args.submissions_root_dir, folder_name)
         submission_files = file_operations.get_submission_files_in_folder(assignment_path, args.ext, reporter)
@@ -62,16 +229,27 @@ def handle_process_action(args, reporter: Reporter):
 
         if not submission_files:
             reporter.info(f"No '{args.ext}' files found in '{folder_name}'.")
+
+        extracted_ids = [
+            (file_path, processing.extract_student_id(os.path.basename(file_path), reporter))
+            for file_path in submission_files
+        ]
+        # Files per extracted ID, aggregated once per folder (scan index and count mode)
+        folder_counts = Counter(student_id for _, student_id in extracted_ids if student_id)
+        scanned_ids[(folder_name, assignment_index)] = dict(folder_counts)
         
-        for file_path in submission_files:
+        for file_path, student_id in extracted_ids:
             filename = os.path.basename(file_path)
-            student_id = processing.extract_student_id(filename, reporter)
 
             if student_id:
                 if student_id in students_dict:
-                    student_record = students_dict[student_id]
-                    if processing.mark_submission(student_record, assignment_index, num_assignment_cols, reporter):
+                    if args.count:
+                        # Recorded in bulk from folder_counts below
+                        folder_successful_marks_count += 1
+                        accepted_submissions.append((student_id, assignment_index, folder_name, file_path))
+                    elif processing.mark_submission(students_dict[student_id], assignment_index, num_assignment_cols, reporter):
                         folder_successful_marks_count +=1
+                        accepted_submissions.append((student_id, assignment_index, folder_name, file_path))
                 else:
                     reporter.log_file_error(filename, f"Student ID '{student_id}' not found in namelist.", folder_name)
                     folder_errors_this_folder_count +=1
@@ -79,6 +257,8 @@ def handle_process_action(args, reporter: Reporter):
                 reporter.log_file_error(filename, "Could not extract student ID.", folder_name)
                 folder_errors_this_folder_count += 1
         
+        if args.count:
+            processing.record_submission_counts(students_dict, assignment_index, folder_counts, num_assignment_cols, reporter)
         overall_successful_marks_count += folder_successful_marks_count
         reporter.folder_summary(
             folder_name,
@@ -93,10 +273,46 @@ def handle_process_action(args, reporter: Reporter):
     # or num_assignments_to_process if we only want to rate based on folders we could process.
     processing.calculate_final_statistics(students_list, num_assignment_cols, num_assignment_cols, reporter)
     
-    file_operations.save_student_data(args.namelist_file, students_list, reporter, num_assignment_cols)
+    saved = file_operations.save_roster(
+        args.namelist_file, args.store, students_list, reporter, num_assignment_cols,
+        assignment_names=assignment_names,
+        submission_sources={(sid, idx): path for sid, idx, _, path in accepted_submissions},
+        write_header=use_header
+    )
+    if not saved:
+        reporter.warning("The roster was not saved; no history version is recorded for this run.")
+    elif not args.no_history:
+        history.record_version(args.namelist_file, previous_version, previous_num_cols,
+                               students_list, num_assignment_cols, "process", reporter)
+
+    if args.only:
+        # Folders that were not rescanned keep their entries from the previous scan
+        previous_index = scan_index.open_scan_index(args.namelist_file, reporter)
+        if previous_index is not None:
+            with previous_index:
+                scanned_folders = {folder_name for folder_name, _ in scanned_ids}
+                for key, ids in previous_index.scanned_ids().items():
+                    if key[0] not in scanned_folders:
+                        scanned_ids[key] = ids
+    scan_index.write_scan_index(args.namelist_file, list(students_dict), scanned_ids, reporter)
+
+    if args.archive_dir:
+        run_archive_stage(args, accepted_submissions, reporter)
+
+    if args.journal:
+        for student_id, assignment_index, folder_name, file_path in accepted_submissions:
+            try:
+                mtime = os.path.getmtime(file_path)
+            except OSError:
+                continue # File vanished after the scan; it is not journaled
+            journal_events.append((student_id, assignment_index, folder_name, file_path, mtime))
+        appended = journal.append_journal_events(args.namelist_file, journal_events, journal.new_run_id(), reporter)
+        reporter.info(f"Appended {appended} new event(s) to the submission journal.")
+        if args.compact_journal or journal.count_uncompacted_events(args.namelist_file) >= JOURNAL_COMPACT_THRESHOLD:
+            journal.compact_journal(args.namelist_file, reporter)
 
     reporter.overall_summary(
-        total_folders_processed=num_assignments_to_process, # Folders we actually looped through for marking
+        total_folders_processed=len(folder_columns), # Folders we actually looped through for marking
         total_files_found=overall_files_found_in_relevant_folders, # Files matching ext in those folders
         total_marks_recorded=overall_successful_marks_count, # New marks set in this run
         total_error_files=len(reporter.error_files_details)
@@ -109,13 +325,121 @@ def handle_process_action(args, reporter: Reporter):
     reporter.info("Processing action complete.")
 
 
+def _read_identifiers(source: str, reporter: Reporter):
+    """Reads one identifier per line from a file, or from stdin if `source` is '-'. Blank lines are skipped."""
+    try:
+        if source == '-':
+            lines = sys.stdin.read().splitlines()
+        else:
+            with open(source, 'r', encoding='utf-8') as f:
+                lines = f.read().splitlines()
+    except OSError as e:
+        reporter.error(f"Cannot read identifiers from '{source}': {e}")
+        return None
+    return [line.strip() for line in lines if line.strip()]
+
+
+def handle_batch_query_action(args, reporter: Reporter):
+    """Handles 'query --from-file': resolve many identifiers against one load of the roster."""
+    identifiers = _read_identifiers(args.from_file, reporter)
+    if identifiers is None:
+        return
+    reporter.info(f"Querying for {len(identifiers)} identifier(s) from '{args.from_file}'.")
+
+    students_list, num_assignment_cols = file_operations.load_roster(args.namelist_file, args.store, reporter, use_cache=True)
+    if not students_list:
+        reporter.error("Cannot query: No student data loaded.")
+        return
+
+    lookup = query_index.RosterLookup(students_list)
+    results = [(identifier, lookup.resolve(identifier)) for identifier in identifiers]
+
+    matched = {s['id']: s for _, matches in results for s in matches}
+    if matched and args.as_of:
+        reporter.info(f"Rebuilding marks as of {args.as_of.isoformat(sep=' ')} from the submission journal.")
+        journaled_marks = journal.replay_journal_as_of(args.namelist_file, args.as_of, reporter)
+        for s in matched.values():
+            per_assignment = journaled_marks.get(s['id'], {})
+            s['marks'] = [1 if per_assignment.get(i) else 0 for i in range(num_assignment_cols)]
+    for s in matched.values():
+        processing.update_student_statistics(s, num_assignment_cols)
+
+    not_found = sum(1 for _, matches in results if not matches)
+    if args.format == 'jsonl':
+        for identifier, matches in results:
+            print(json.dumps({
+                "query": identifier,
+                "matches": [
+                    {"id": s['id'], "name": s['name'], "marks": s['marks'][:num_assignment_cols], "total": s['total'], "rate": s['rate']}
+                    for s in matches
+                ]
+            }))
+    elif args.format == 'tsv':
+        print("\t".join(["Query", "ID", "Name"] + [f"A{i+1}" for i in range(num_assignment_cols)] + ["Total", "Rate"]))
+        for identifier, matches in results:
+            for s in matches:
+                print("\t".join([identifier, s['id'], s['name']] + [str(m) for m in s['marks'][:num_assignment_cols]]
+                                + [str(s['total']), f"{s['rate']:.2f}"]))
+    else:
+        display_batch_query_table(results, num_assignment_cols, reporter)
+    if not_found:
+        reporter.warning(f"{not_found} of {len(identifiers)} identifier(s) matched no student.")
+    reporter.info("Query action complete.")
+
+
 def handle_query_action(args, reporter: Reporter):
     """Handles the 'query' action: display details for a specific student."""
+    if args.from_file:
+        if args.identifier:
+            reporter.error("Give either an identifier or '--from-file', not both.")
+            return
+        if args.format != 'table':
+            reporter.stream = sys.stderr # Keep stdout parseable as JSON lines or TSV
+        reporter.info("Action: Batch Query")
+        reporter.info(f"Namelist file: {args.namelist_file}")
+        handle_batch_query_action(args, reporter)
+        return
+    if not args.identifier:
+        reporter.error("Nothing to query: give an identifier or '--from-file'.")
+        return
     reporter.info("Action: Query Student")
     reporter.info(f"Namelist file: {args.namelist_file}")
     reporter.info(f"Querying for: '{args.identifier}'")
 
-    students_list, num_assignment_cols = file_operations.load_student_data(args.namelist_file, reporter)
+    # Seek straight to the matching rows through the query index sidecar when it can answer;
+    # that reads no more of the namelist than a view cache hit would, so skip the cache then
+    indexed = query_index.query_indexed_students(args.namelist_file, args.identifier, reporter) if args.store == 'tsv' else None
+
+    cache_key = None
+    if indexed is None and not args.no_cache and not args.as_of: # As-of views depend on the journal, not only the roster
+        cache_key = view_cache.view_cache_key(args.namelist_file, args.store, "query", {"identifier": args.identifier}, reporter)
+        if cache_key is not None and view_cache.replay_cached_view(cache_key, reporter):
+            reporter.info("Query action complete.")
+            return
+
+    if args.store == 'sqlite':
+        # Let SQLite evaluate the ID/name match instead of loading the whole roster
+        students_list, num_assignment_cols = sqlite_store.query_sqlite_students(args.namelist_file, args.identifier, reporter)
+        if not students_list:
+            reporter.warning(f"No student found with ID or name matching '{args.identifier}'.")
+            reporter.info("Query action complete.")
+            return
+    elif args.store == 'sharded':
+        # An ID only needs the shard holding it; fall back to all shards for name searches
+        shard = sharding.load_shard_for_id(args.namelist_file, args.identifier, reporter)
+        if shard is not None and any(s['id'].lower() == args.identifier.lower() for s in shard[0]):
+            students_list, num_assignment_cols = shard
+        else:
+            students_list, num_assignment_cols = sharding.load_sharded_data(args.namelist_file, reporter)
+    else:
+        if indexed is not None:
+            students_list, num_assignment_cols = indexed
+            if not students_list:
+                reporter.warning(f"No student found with ID or name matching '{args.identifier}'.")
+                reporter.info("Query action complete.")
+                return
+        else:
+            students_list, num_assignment_cols = file_operations.load_roster(args.namelist_file, args.store, reporter, use_cache=True)
     
     if num_assignment_cols == -1 and not students_list:
         reporter.error("Cannot query: Failed to determine namelist structure or load data.")
@@ -137,17 +461,34 @@ def handle_query_action(args, reporter: Reporter):
         if not found_student_list and query_term_lower in student['name'].lower():
             found_student_list.append(student) # Could find multiple by name fragment
 
+    if found_student_list and args.as_of:
+        reporter.info(f"Rebuilding marks as of {args.as_of.isoformat(sep=' ')} from the submission journal.")
+        journaled_marks = journal.replay_journal_as_of(args.namelist_file, args.as_of, reporter)
+        for s in found_student_list:
+            per_assignment = journaled_marks.get(s['id'], {})
+            s['marks'] = [1 if per_assignment.get(i) else 0 for i in range(num_assignment_cols)]
+
+    render = lambda: _display_query_results(found_student_list, args.identifier, num_assignment_cols, reporter)
+    if cache_key is not None:
+        view_cache.render_and_cache(cache_key, render, args.namelist_file, args.store, reporter)
+    else:
+        render()
+    reporter.info("Query action complete.")
+
+
+def _display_query_results(found_student_list, identifier: str, num_assignment_cols: int, reporter: Reporter) -> bool:
+    """Displays the students found by a query. Returns True if any were found."""
     if found_student_list:
         if len(found_student_list) > 1:
-            reporter.info(f"Found {len(found_student_list)} students matching '{args.identifier}'. Displaying all:")
+            reporter.info(f"Found {len(found_student_list)} students matching '{identifier}'. Displaying all:")
         for s in found_student_list:
             # Ensure total/rate are calculated for display if they weren't perfectly loaded or are from an old run
             temp_list_for_calc = [s] # Calculate for this student only
             processing.calculate_final_statistics(temp_list_for_calc, num_assignment_cols, num_assignment_cols, reporter)
             display_student_details(s, num_assignment_cols, reporter)
-    else:
-        reporter.warning(f"No student found with ID or name matching '{args.identifier}'.")
-    reporter.info("Query action complete.")
+        return True
+    reporter.warning(f"No student found with ID or name matching '{identifier}'.")
+    return False
 
 
 def handle_view_action(args, reporter: Reporter):
@@ -155,22 +496,433 @@ def handle_view_action(args, reporter: Reporter):
     reporter.info("Action: View Table")
     reporter.info(f"Namelist file: {args.namelist_file}")
 
-    students_list, num_assignment_cols = file_operations.load_student_data(args.namelist_file, reporter)
+    cache_key = None
+    if not args.no_cache:
+        options = {"where": args.where, "sort": args.sort, "limit": args.limit, "page": args.page, "page_size": args.page_size}
+        cache_key = view_cache.view_cache_key(args.namelist_file, args.store, "view", options, reporter)
+        if cache_key is not None and view_cache.replay_cached_view(cache_key, reporter):
+            reporter.info("View action complete.")
+            return
 
-    if num_assignment_cols == -1 and not students_list:
-        reporter.error("Cannot view table: Failed to determine namelist structure or load data.")
+    selected = None
+    if args.store == 'sqlite' and (args.where or args.sort or args.limit is not None):
+        # Filter, sort and limit in SQL; None if the filter has to be evaluated in Python
+        try:
+            selected = sqlite_store.select_sqlite_students(args.namelist_file, args.where, args.sort, args.limit, reporter)
+        except ValueError as e:
+            reporter.error(f"Cannot view table: {e}")
+            return
+
+    if selected is not None:
+        students_list, num_assignment_cols, roster_size = selected
+        if not roster_size:
+            reporter.error("Cannot view table: No student data loaded.")
+            return
+        render = lambda: display_selected_rows(students_list, roster_size, num_assignment_cols, args, reporter)
+    else:
+        students_list, num_assignment_cols = file_operations.load_roster(args.namelist_file, args.store, reporter, use_cache=True)
+
+        if num_assignment_cols == -1 and not students_list:
+            reporter.error("Cannot view table: Failed to determine namelist structure or load data.")
+            return
+        if not students_list:
+            reporter.error("Cannot view table: No student data loaded.")
+            return
+
+        # Ensure totals/rates are fresh for display, especially if `load_student_data`
+        processing.calculate_final_statistics(students_list, num_assignment_cols, num_assignment_cols, reporter)
+
+        render = lambda: display_roster_view(students_list, num_assignment_cols, args, reporter)
+    if cache_key is not None:
+        view_cache.render_and_cache(cache_key, render, args.namelist_file, args.store, reporter)
+    else:
+        render()
+    reporter.info("View action complete.")
+
+
+def display_roster_view(students_list, num_assignment_cols: int, args, reporter: Reporter):
+    """
+    Applies the view options of `args` (where, sort, limit, page, page_size) to a loaded
+    roster with up-to-date totals and rates, and displays the resulting table.
+
+    Returns:
+        bool: True if a table was displayed.
+    """
+    if args.where or args.sort or args.limit is not None:
+        try:
+            selected = view_filter.select_students(students_list, num_assignment_cols, args.where, args.sort, args.limit)
+        except ValueError as e:
+            reporter.error(f"Cannot view table: {e}")
+            return False
+        return display_selected_rows(selected, len(students_list), num_assignment_cols, args, reporter)
+    return display_selected_rows(students_list, None, num_assignment_cols, args, reporter)
+
+
+def display_selected_rows(students_list, roster_size, num_assignment_cols: int, args, reporter: Reporter):
+    """
+    Displays rows already selected from a roster of `roster_size` students (None if no
+    selection was applied) with the paging options of `args` (page, page_size).
+
+    Returns:
+        bool: True if a table was displayed.
+    """
+    if roster_size is not None:
+        reporter.info(f"Showing {len(students_list)} of {roster_size} student(s).")
+        if not students_list:
+            reporter.warning("No students match the given filter.")
+            return False
+
+    page, page_size = args.page, args.page_size
+    if page is not None or page_size is not None:
+        page = page if page is not None else 1
+        page_size = page_size if page_size is not None else DEFAULT_PAGE_SIZE
+        if page < 1 or page_size < 1:
+            reporter.error("Cannot view table: --page and --page-size must be at least 1.")
+            return False
+
+    return display_attendance_table(students_list, num_assignment_cols, reporter, page, page_size)
+
+
+def handle_convert_action(args, reporter: Reporter):
+    """Handles the 'convert' action: copy a namelist from one storage format to another."""
+    reporter.info("Action: Convert Namelist")
+    reporter.info(f"Source: {args.source_file} ({args.source_store})")
+    reporter.info(f"Destination: {args.dest_file} ({args.dest_store})")
+
+    students_list, num_assignment_cols = file_operations.load_roster(args.source_file, args.source_store, reporter)
+    if not students_list:
+        reporter.error("Cannot convert: No student data loaded.")
+        return
+
+    if not file_operations.save_roster(args.dest_file, args.dest_store, students_list, reporter, num_assignment_cols):
+        return
+    reporter.info("Convert action complete.")
+
+def _roster_assignment_names(namelist_file: str, store: str, num_assignment_cols: int, reporter: Reporter):
+    """Returns the recorded folder names of the first `num_assignment_cols` columns, or None."""
+    assignment_names = file_operations.load_assignment_names(namelist_file, store, reporter)
+    if assignment_names is None or len(assignment_names) < num_assignment_cols:
+        return None
+    return assignment_names[:num_assignment_cols]
+
+
+def handle_history_action(args, reporter: Reporter):
+    """Handles the 'history' action: list the recorded versions of the roster."""
+    reporter.info("Action: Show Roster History")
+    reporter.info(f"Namelist file: {args.namelist_file}")
+
+    versions = history.load_history(args.namelist_file, reporter)
+    if not versions:
+        reporter.warning(f"No version history recorded for '{args.namelist_file}'.")
         return
+
+    print(f"Version {versions[0]['version'] - 1}: oldest version that can be rebuilt")
+    for v in versions:
+        before_cols, after_cols = v['columns']
+        changes = [
+            f"{len(v['changed'])} student(s) with changed marks",
+            f"+{len(v['added'])} / -{len(v['removed'])} student(s)",
+        ]
+        if v['renamed']:
+            changes.append(f"{len(v['renamed'])} renamed")
+        if before_cols != after_cols:
+            changes.append(f"columns {before_cols} -> {after_cols}")
+        print(f"Version {v['version']}: {v['created']} [{v['action']}] {', '.join(changes)}")
+    reporter.info("History action complete.")
+
+
+def handle_undo_action(args, reporter: Reporter):
+    """Handles the 'undo' action: restore an earlier version of the roster."""
+    reporter.info("Action: Undo")
+    reporter.info(f"Namelist file: {args.namelist_file}")
+
+    if args.store == 'sharded':
+        reporter.error("Version history is not recorded for '--store sharded'.")
+        return
+    students_list, num_assignment_cols = file_operations.load_roster(args.namelist_file, args.store, reporter)
     if not students_list:
-        reporter.error("Cannot view table: No student data loaded.")
+        reporter.error("Cannot undo: No student data loaded.")
+        return
+
+    versions = history.load_history(args.namelist_file, reporter)
+    target_version = args.to_version
+    if target_version is None:
+        target_version = versions[-1]['version'] - 1 if versions else 0
+    rebuilt = history.rebuild_version(args.namelist_file, students_list, num_assignment_cols, target_version, reporter, force=args.force)
+    if rebuilt is None:
+        return
+    restored_list, restored_cols = rebuilt
+    for student in restored_list:
+        student.update({"total": 0, "rate": 0.0})
+    processing.calculate_final_statistics(restored_list, restored_cols, restored_cols, reporter)
+
+    assignment_names = _roster_assignment_names(args.namelist_file, args.store, restored_cols, reporter)
+    if not file_operations.save_roster(
+        args.namelist_file, args.store, restored_list, reporter, restored_cols,
+        assignment_names=assignment_names, write_header=assignment_names is not None
+    ):
+        reporter.error(f"Could not restore roster version {target_version}.")
+        return
+    # The undo is itself a version, so it can be undone in turn
+    history.record_version(args.namelist_file, history.snapshot_roster(students_list, num_assignment_cols), num_assignment_cols,
+                           restored_list, restored_cols, f"undo to version {target_version}", reporter)
+    reporter.info(f"Restored roster version {target_version}.")
+    reporter.info("Undo action complete.")
+
+
+def handle_reconcile_action(args, reporter: Reporter):
+    """Handles the 'reconcile' action: back-fill marks of newly added students from the last scan."""
+    reporter.info("Action: Reconcile Roster")
+    reporter.info(f"Namelist file: {args.namelist_file}")
+
+    if args.store == 'sharded':
+        reporter.error("Scan indexes are not recorded for '--store sharded'.")
+        return
+    index = scan_index.open_scan_index(args.namelist_file, reporter)
+    if index is None:
+        reporter.error(f"No scan index found for '{args.namelist_file}'. Run 'process' first.")
+        return
+
+    students_list, num_assignment_cols = file_operations.load_roster(args.namelist_file, args.store, reporter)
+    if not students_list:
+        index.close()
+        reporter.error("Cannot reconcile: No student data loaded.")
+        return
+    previous_version = history.snapshot_roster(students_list, num_assignment_cols)
+    previous_num_cols = num_assignment_cols
+
+    with index:
+        new_students = [s for s in students_list if not index.was_on_roster(s['id'])]
+        reporter.info(f"{len(new_students)} student(s) were added since the last scan.")
+        required_cols = max((column + 1 for _, column, _, _ in index.assignments), default=0)
+        if new_students and required_cols > num_assignment_cols:
+            processing.ensure_mark_capacity(students_list, required_cols, reporter)
+            num_assignment_cols = required_cols
+
+        backfilled = 0
+        for student in new_students:
+            for folder_name, column, file_count in index.submissions_for(student['id']):
+                if student['marks'][column] != 0:
+                    continue
+                if args.count: # The indexed number of files, capped like in 'process --count'
+                    recorded = processing.record_submission_counts({student['id']: student}, column, {student['id']: file_count},
+                                                                   num_assignment_cols, reporter)
+                else:
+                    recorded = processing.mark_submission(student, column, num_assignment_cols, reporter)
+                if not recorded:
+                    continue
+                backfilled += 1
+                reporter.info(f"Back-filled '{folder_name}' (Assignment {column + 1}) for student {student['id']}.")
+        scanned_ids = index.scanned_ids() if new_students else None
+
+    if not new_students:
+        reporter.info("Nothing to reconcile.")
         return
 
-    # Ensure totals/rates are fresh for display, especially if `load_student_data`
     processing.calculate_final_statistics(students_list, num_assignment_cols, num_assignment_cols, reporter)
+    assignment_names = _roster_assignment_names(args.namelist_file, args.store, num_assignment_cols, reporter)
+    if not file_operations.save_roster(
+        args.namelist_file, args.store, students_list, reporter, num_assignment_cols,
+        assignment_names=assignment_names, write_header=assignment_names is not None
+    ):
+        reporter.error("Cannot reconcile: the roster was not saved.")
+        return
+    history.record_version(args.namelist_file, previous_version, previous_num_cols,
+                           students_list, num_assignment_cols, "reconcile", reporter)
+    # The new students are now accounted for; a later reconcile only considers students added after this one
+    scan_index.write_scan_index(args.namelist_file, [s['id'] for s in students_list], scanned_ids, reporter)
+    reporter.info(f"Back-filled {backfilled} mark(s) for {len(new_students)} new student(s).")
+    reporter.info("Reconcile action complete.")
 
-    display_attendance_table(students_list, num_assignment_cols, reporter)
-    reporter.info("View action complete.")
 
-def main():
+def handle_ingest_action(args, reporter: Reporter):
+    """Handles the 'ingest' action: add a finished namelist to a multi-term archive."""
+    reporter.info("Action: Ingest Namelist into Archive")
+    reporter.info(f"Archive file: {args.archive_file}")
+    reporter.info(f"Namelist file: {args.namelist_file} (term '{args.term}', course '{args.course}')")
+
+    students_list, num_assignment_cols = file_operations.load_roster(args.namelist_file, args.store, reporter)
+    if not students_list:
+        reporter.error("Cannot ingest: No student data loaded.")
+        return
+
+    if os.path.exists(args.archive_file):
+        archive = term_archive.load_archive(args.archive_file, reporter)
+        if archive is None:
+            return
+    else:
+        archive = term_archive.new_archive()
+    if term_archive.ingest_roster(archive, args.term, args.course, students_list, num_assignment_cols):
+        reporter.info(f"Replaced the archived block of term '{args.term}', course '{args.course}'.")
+    term_archive.save_archive(args.archive_file, archive, reporter)
+    reporter.info("Ingest action complete.")
+
+
+def handle_trends_action(args, reporter: Reporter):
+    """Handles the 'trends' action: aggregate attendance across archived terms and courses."""
+    if args.json:
+        reporter.stream = sys.stderr # Keep stdout parseable as JSON
+    reporter.info("Action: Attendance Trends")
+    reporter.info(f"Archive file: {args.archive_file}")
+
+    archive = term_archive.load_archive(args.archive_file, reporter)
+    if archive is None:
+        return
+    blocks = term_archive.select_blocks(archive, args.term, args.course)
+    reporter.info(f"Aggregating {len(blocks)} of {len(archive['blocks'])} archived term/course block(s).")
+
+    if args.by == 'student':
+        rows = term_archive.student_attendance(archive, blocks)
+        columns = ['id', 'name', 'terms', 'attended', 'sessions', 'rate']
+    elif args.by == 'session':
+        rows = term_archive.session_number_averages(blocks)
+        columns = ['session', 'blocks', 'attended', 'enrolled', 'rate']
+    else:
+        rows = term_archive.term_summaries(blocks)
+        columns = ['term', 'course', 'students', 'sessions', 'attended', 'rate']
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        display_trend_table(rows, columns, reporter)
+    reporter.info("Trends action complete.")
+
+
+def handle_stats_action(args, reporter: Reporter):
+    """Handles the 'stats' action: per-assignment counts and the distribution of submission rates."""
+    if args.json:
+        reporter.stream = sys.stderr # Keep stdout parseable as JSON
+    reporter.info("Action: Roster Statistics")
+    if args.block:
+        term, course = args.block
+        reporter.info(f"Archive file: {args.namelist_file} (term '{term}', course '{course}')")
+        archive = term_archive.load_archive(args.namelist_file, reporter)
+        if archive is None:
+            return
+        blocks = term_archive.select_blocks(archive, [term], [course])
+        if not blocks:
+            reporter.error(f"No archived block for term '{term}' and course '{course}'.")
+            return
+        stats = roster_stats.archive_block_statistics(blocks[0])
+    else:
+        reporter.info(f"Namelist file: {args.namelist_file}")
+        students_list, num_assignment_cols = file_operations.load_roster(args.namelist_file, args.store, reporter, use_cache=True)
+        if not students_list:
+            reporter.error("Cannot compute statistics: No student data loaded.")
+            return
+        assignment_names = _roster_assignment_names(args.namelist_file, args.store, num_assignment_cols, reporter)
+        stats = roster_stats.roster_statistics(students_list, num_assignment_cols, assignment_names)
+
+    if args.json:
+        print(json.dumps(stats, indent=2))
+    else:
+        display_roster_stats(stats, reporter)
+    reporter.info("Stats action complete.")
+
+
+def handle_missing_action(args, reporter: Reporter):
+    """Handles the 'missing' action: per assignment, the students of the active roster with a 0."""
+    if not args.output:
+        reporter.stream = sys.stderr # The lists go to stdout, which must stay parseable
+    reporter.info("Action: Missing Submitters")
+    if args.block:
+        term, course = args.block
+        reporter.info(f"Archive file: {args.namelist_file} (term '{term}', course '{course}')")
+        if args.where:
+            reporter.error("'--where' cannot be used with '--block' (archive blocks hold attendance bitmaps only).")
+            return
+        archive = term_archive.load_archive(args.namelist_file, reporter)
+        if archive is None:
+            return
+        blocks = term_archive.select_blocks(archive, [term], [course])
+        if not blocks:
+            reporter.error(f"No archived block for term '{term}' and course '{course}'.")
+            return
+        students_list = [{"id": archive['ids'][code], "name": archive['names'][code]} for code in blocks[0]['codes']]
+        num_assignment_cols = len(blocks[0]['sessions'])
+        submitted = blocks[0]['sessions']
+        assignment_names = None
+    else:
+        reporter.info(f"Namelist file: {args.namelist_file}")
+        students_list, num_assignment_cols = file_operations.load_roster(args.namelist_file, args.store, reporter, use_cache=True)
+        if not students_list:
+            reporter.error("Cannot list missing submitters: No student data loaded.")
+            return
+        assignment_names = _roster_assignment_names(args.namelist_file, args.store, num_assignment_cols, reporter)
+        submitted = term_archive.roster_bitmaps(students_list, num_assignment_cols)
+
+    try:
+        selectors = [name for value in args.assignment for name in value.split(',') if name] if args.assignment else []
+        columns = missing_lists.resolve_assignments(selectors, num_assignment_cols, assignment_names) if selectors else list(range(num_assignment_cols))
+        if args.where:
+            processing.calculate_final_statistics(students_list, num_assignment_cols, num_assignment_cols, reporter)
+        active = missing_lists.active_roster_bitmap(students_list, num_assignment_cols, args.where)
+    except ValueError as e:
+        reporter.error(f"Invalid missing options: {e}")
+        return
+    if args.where:
+        reporter.info(f"Active roster: {bin(active).count('1')} of {len(students_list)} student(s) match '{args.where}'.")
+
+    try:
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8', newline='') as out:
+                counts = missing_lists.write_missing(out, args.format, students_list, submitted, active, columns, assignment_names)
+            reporter.info(f"Wrote missing-submitter lists to '{args.output}'.")
+        else:
+            counts = missing_lists.write_missing(sys.stdout, args.format, students_list, submitted, active, columns, assignment_names)
+    except OSError as e:
+        reporter.error(f"Could not write '{args.output}': {e}")
+        return
+    reporter.info("Missing per assignment: " + ", ".join(f"A{column+1} {count}" for column, count in counts.items()))
+    reporter.info("Missing action complete.")
+
+
+def handle_merge_action(args, reporter: Reporter):
+    """Handles the 'merge' action: combine several copies of a namelist into one."""
+    reporter.info("Action: Merge Namelists")
+    reporter.info(f"Input files: {', '.join(args.input_files)}")
+    reporter.info(f"Output file: {args.output_file}")
+
+    summary = merging.merge_namelists(args.input_files, args.output_file, reporter, count_mode=args.count)
+    if summary is None:
+        return
+    reporter.info(
+        f"Merged {summary['students']} student(s): {summary['conflicts']} name conflict(s), "
+        f"{summary['partial']} student(s) missing from some input(s)."
+    )
+    reporter.info("Merge action complete.")
+
+
+def _cache_bytes(cache_mb):
+    """Converts a --cache-mb value to bytes (None keeps the configured default)."""
+    return int(cache_mb * (1 << 20)) if cache_mb is not None else None
+
+
+def handle_shell_action(args, reporter: Reporter):
+    """Handles the 'shell' action: an interactive prompt over a roster kept in memory."""
+    reporter.info("Action: Interactive Shell")
+    reporter.info(f"Namelist file: {args.namelist_file}")
+    shell.run_shell(args.namelist_file, args.store, reporter, _cache_bytes(args.cache_mb))
+
+
+def handle_serve_action(args, reporter: Reporter):
+    """Handles the 'serve' action: a local HTTP/JSON service over a roster kept in memory."""
+    reporter.info("Action: Serve Roster")
+    reporter.info(f"Namelist file: {args.namelist_file}")
+    if args.courses:
+        reporter.info(f"Serving every namelist in: {args.courses}")
+    server.run_server(args.namelist_file, args.store, args.host, args.port, reporter,
+                      args.courses, _cache_bytes(args.cache_mb))
+
+
+def _as_of_argument(value: str):
+    try:
+        return journal.parse_as_of(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid date '{value}' (expected YYYY-MM-DD or YYYY-MM-DDTHH:MM)")
+
+def build_parser() -> argparse.ArgumentParser:
+    """Builds the command-line parser with a subparser per action."""
     parser = argparse.ArgumentParser(
         description="Student Submission Processor CLI.",
         formatter_class=argparse.RawTextHelpFormatter # For better help text formatting
@@ -210,6 +962,72 @@ def main():
         dest="view_after_process",
         help="Display the updated attendance table in the console after processing is complete."
     )
+    parser_process.add_argument(
+        "--header",
+        action="store_true",
+        help=(
+            "Add a header row to the namelist that maps assignment folder names to mark columns.\n"
+            "Once present, folders are matched to columns by name instead of sorted position,\n"
+            "and new folders get new columns."
+        )
+    )
+    parser_process.add_argument(
+        "--only",
+        nargs="+",
+        metavar="FOLDER",
+        help=(
+            "Rescan and re-mark only these assignment folders (space- or comma-separated).\n"
+            "All other mark columns are left untouched and their folders are not scanned."
+        )
+    )
+    parser_process.add_argument(
+        "--count",
+        action="store_true",
+        help=(
+            "Count mode: store the number of submission files of each student in the assignment's\n"
+            f"cell (up to {MAX_SUBMISSION_COUNT}) instead of 1. Totals and rates still count a\n"
+            "cell with any submissions as one."
+        )
+    )
+    parser_process.add_argument(
+        "--journal",
+        action="store_true",
+        help=(
+            "Append every accepted submission (student, assignment, path, mtime, run id) to the\n"
+            "append-only journal next to the namelist (<namelist>.journal)."
+        )
+    )
+    parser_process.add_argument(
+        "--compact-journal",
+        action="store_true",
+        help=f"Rebuild the journal's timestamp index now (it is also rebuilt every {JOURNAL_COMPACT_THRESHOLD} new events)."
+    )
+    parser_process.add_argument(
+        "--no-history",
+        action="store_true",
+        help="Do not record this run in the roster's version history (<namelist>.history)."
+    )
+    parser_process.add_argument(
+        "--archive",
+        dest="archive_dir",
+        metavar="DIR",
+        help=(
+            "Archive every accepted submission file into a content-addressed store in DIR:\n"
+            "identical files are stored once, and files unchanged since the last run are not re-read."
+        )
+    )
+    parser_process.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of worker processes for '--store sharded', and hashing threads for '--archive'."
+    )
+    parser_process.add_argument(
+        "--store",
+        choices=STORE_FORMATS,
+        default=DEFAULT_STORE,
+        help=f"Storage format of the namelist file (default: {DEFAULT_STORE})."
+    )
     parser_process.set_defaults(func=handle_process_action)
 
     # --- Query Subparser ---
@@ -227,8 +1045,42 @@ def main():
     )
     parser_query.add_argument(
         "identifier",
+        nargs='?',
         help="Student ID (exact match) or name (case-insensitive, partial match) to query."
     )
+    parser_query.add_argument(
+        "--from-file",
+        metavar="FILE",
+        help=(
+            "Query every identifier in FILE (one per line; '-' reads stdin) against a single load\n"
+            "of the namelist, and print all results together."
+        )
+    )
+    parser_query.add_argument(
+        "--format",
+        choices=("table", "jsonl", "tsv"),
+        default="table",
+        help=(
+            "Output of '--from-file': one combined table, JSON lines (one per identifier) or TSV (default: table).\n"
+            "With jsonl and tsv, log messages go to stderr."
+        )
+    )
+    parser_query.add_argument(
+        "--as-of",
+        type=_as_of_argument,
+        help="Show marks as they were at this date (YYYY-MM-DD) or time (YYYY-MM-DDTHH:MM), replayed from the journal."
+    )
+    parser_query.add_argument(
+        "--store",
+        choices=STORE_FORMATS,
+        default=DEFAULT_STORE,
+        help=f"Storage format of the namelist file (default: {DEFAULT_STORE})."
+    )
+    parser_query.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Render from the namelist even if the same output is in the view cache (<namelist>.vcache)."
+    )
     parser_query.set_defaults(func=handle_query_action)
 
     # --- View Subparser ---
@@ -244,8 +1096,447 @@ def main():
         "namelist_file",
         help="Path to the student namelist text file to view."
     )
+    parser_view.add_argument(
+        "--store",
+        choices=STORE_FORMATS,
+        default=DEFAULT_STORE,
+        help=f"Storage format of the namelist file (default: {DEFAULT_STORE})."
+    )
+    parser_view.add_argument(
+        "--where",
+        metavar="EXPR",
+        help=(
+            "Only show students matching a filter expression over the columns id, name, total,\n"
+            "rate and A1..An, e.g. \"rate < 0.5 and A3 == 0\" or \"'smith' in name\"."
+        )
+    )
+    parser_view.add_argument(
+        "--sort",
+        metavar="KEYS",
+        help=(
+            "Sort by comma-separated columns, '-' prefix for descending; use the '=' form when\n"
+            "the first key is descending (e.g. --sort=-total,name)."
+        )
+    )
+    parser_view.add_argument(
+        "--limit",
+        type=int,
+        metavar="K",
+        help="Show at most K students (with --sort, the first K in sort order)."
+    )
+    parser_view.add_argument(
+        "--page",
+        type=int,
+        metavar="N",
+        help="Only show page N (1-based) of the table; columns keep the widths of the full table."
+    )
+    parser_view.add_argument(
+        "--page-size",
+        type=int,
+        metavar="M",
+        help=f"Rows per page (default: {DEFAULT_PAGE_SIZE})."
+    )
+    parser_view.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Render from the namelist even if the same output is in the view cache (<namelist>.vcache)."
+    )
     parser_view.set_defaults(func=handle_view_action)
-    
+
+    # --- Convert Subparser ---
+    parser_convert = subparsers.add_parser(
+        "convert",
+        help="Convert a namelist between storage formats (e.g., TSV, fixed-width and SQLite).",
+        description=(
+            "Loads a namelist in one storage format and writes the same records in another.\n"
+            "The fixed-width format is memory-mapped, so 'process --store fixed' records new\n"
+            "marks with in-place writes instead of rewriting the whole file."
+        )
+    )
+    parser_convert.add_argument(
+        "source_file",
+        help="Path to the namelist file to convert."
+    )
+    parser_convert.add_argument(
+        "dest_file",
+        help="Path of the converted namelist file to write."
+    )
+    parser_convert.add_argument(
+        "--from",
+        dest="source_store",
+        choices=STORE_FORMATS,
+        default=DEFAULT_STORE,
+        help=f"Storage format of the source file (default: {DEFAULT_STORE})."
+    )
+    parser_convert.add_argument(
+        "--to",
+        dest="dest_store",
+        choices=STORE_FORMATS,
+        required=True,
+        help="Storage format of the destination file."
+    )
+    parser_convert.set_defaults(func=handle_convert_action)
+
+    # --- History Subparser ---
+    parser_history = subparsers.add_parser(
+        "history",
+        help="List the recorded versions of the roster.",
+        description=(
+            "Lists the versions recorded in <namelist>.history. Every 'process' run that changes\n"
+            "the roster records a compact delta (changed mark bits, added/removed students),\n"
+            f"and the last {HISTORY_MAX_VERSIONS} versions are kept."
+        )
+    )
+    parser_history.add_argument(
+        "namelist_file",
+        help="Path to the student namelist file whose history to list."
+    )
+    parser_history.set_defaults(func=handle_history_action)
+
+    # --- Undo Subparser ---
+    parser_undo = subparsers.add_parser(
+        "undo",
+        help="Restore an earlier version of the roster from its history.",
+        description=(
+            "Rebuilds an earlier version by applying the recorded deltas backwards from the\n"
+            "current namelist, recalculates totals/rates and saves it. The undo is recorded\n"
+            "as a new version, so it can be undone as well."
+        )
+    )
+    parser_undo.add_argument(
+        "namelist_file",
+        help="Path to the student namelist file to restore."
+    )
+    parser_undo.add_argument(
+        "--to",
+        dest="to_version",
+        type=int,
+        default=None,
+        help="Version to restore (default: the version before the latest one). See 'history'."
+    )
+    parser_undo.add_argument(
+        "--force",
+        action="store_true",
+        help="Restore even if the namelist was changed since the latest recorded version."
+    )
+    parser_undo.add_argument(
+        "--store",
+        choices=STORE_FORMATS,
+        default=DEFAULT_STORE,
+        help=f"Storage format of the namelist file (default: {DEFAULT_STORE})."
+    )
+    parser_undo.set_defaults(func=handle_undo_action)
+
+    # --- Reconcile Subparser ---
+    parser_reconcile = subparsers.add_parser(
+        "reconcile",
+        help="Back-fill marks of students added to the namelist since the last 'process' run.",
+        description=(
+            "Every 'process' run saves the IDs it extracted per assignment, including IDs that\n"
+            "were not on the roster, to <namelist>.scan. 'reconcile' marks students added to the\n"
+            "namelist since then from that index, without rescanning the submissions directory."
+        )
+    )
+    parser_reconcile.add_argument(
+        "namelist_file",
+        help="Path to the student namelist file to reconcile."
+    )
+    parser_reconcile.add_argument(
+        "--count",
+        action="store_true",
+        help=(
+            "Count mode, as in 'process --count': back-fill the indexed number of submission files\n"
+            f"(up to {MAX_SUBMISSION_COUNT}) instead of 1."
+        )
+    )
+    parser_reconcile.add_argument(
+        "--store",
+        choices=STORE_FORMATS,
+        default=DEFAULT_STORE,
+        help=f"Storage format of the namelist file (default: {DEFAULT_STORE})."
+    )
+    parser_reconcile.set_defaults(func=handle_reconcile_action)
+
+    # --- Merge Subparser ---
+    parser_merge = subparsers.add_parser(
+        "merge",
+        help="Merge several copies of a namelist (e.g. one per TA) into one.",
+        description=(
+            "Joins the namelists on student ID with a streaming sort-merge and writes the result\n"
+            "sorted by ID. A mark is set if any copy has it (or the largest count with --count).\n"
+            "Conflicting names and students missing from some copies are reported."
+        )
+    )
+    parser_merge.add_argument(
+        "output_file",
+        help="Path of the merged namelist file to write."
+    )
+    parser_merge.add_argument(
+        "input_files",
+        nargs="+",
+        help="Paths of the namelist files to merge."
+    )
+    parser_merge.add_argument(
+        "--count",
+        action="store_true",
+        help="Keep submission counts (the largest of the copies) instead of 0/1 marks."
+    )
+    parser_merge.set_defaults(func=handle_merge_action)
+
+    # --- Ingest Subparser ---
+    parser_ingest = subparsers.add_parser(
+        "ingest",
+        help="Add a finished namelist to a multi-term attendance archive.",
+        description=(
+            "Stores the namelist's marks in a columnar archive file as the block of one term and\n"
+            "course (student IDs are dictionary-encoded, each session is a packed bitmap).\n"
+            "Ingesting the same term and course again replaces its block."
+        )
+    )
+    parser_ingest.add_argument(
+        "archive_file",
+        help="Path to the archive file (created if it does not exist)."
+    )
+    parser_ingest.add_argument(
+        "namelist_file",
+        help="Path to the finished namelist file to ingest."
+    )
+    parser_ingest.add_argument(
+        "--term",
+        required=True,
+        help="Term the namelist belongs to (e.g., '2024S1')."
+    )
+    parser_ingest.add_argument(
+        "--course",
+        required=True,
+        help="Course the namelist belongs to (e.g., 'CS101')."
+    )
+    parser_ingest.add_argument(
+        "--store",
+        choices=STORE_FORMATS,
+        default=DEFAULT_STORE,
+        help=f"Storage format of the namelist file (default: {DEFAULT_STORE})."
+    )
+    parser_ingest.set_defaults(func=handle_ingest_action)
+
+    # --- Trends Subparser ---
+    parser_trends = subparsers.add_parser(
+        "trends",
+        help="Aggregate attendance across the terms and courses of an archive.",
+        description=(
+            "Computes aggregates from an archive created with 'ingest':\n"
+            "  --by student  attendance of every student across the selected terms/courses\n"
+            "  --by session  average attendance per session number across them\n"
+            "  --by term     summary of every selected term/course"
+        )
+    )
+    parser_trends.add_argument(
+        "archive_file",
+        help="Path to the archive file."
+    )
+    parser_trends.add_argument(
+        "--by",
+        choices=("student", "session", "term"),
+        default="student",
+        help="What to aggregate by (default: student)."
+    )
+    parser_trends.add_argument(
+        "--term",
+        nargs="+",
+        help="Only include these terms."
+    )
+    parser_trends.add_argument(
+        "--course",
+        nargs="+",
+        help="Only include these courses."
+    )
+    parser_trends.add_argument(
+        "--json",
+        action="store_true",
+        help="Print the aggregates as JSON instead of a table (log messages go to stderr)."
+    )
+    parser_trends.set_defaults(func=handle_trends_action)
+
+    # --- Stats Subparser ---
+    parser_stats = subparsers.add_parser(
+        "stats",
+        help="Summarize a namelist: per-assignment counts, rate percentiles and histogram.",
+        description=(
+            "Computes, in one pass over the marks, how many students submitted each assignment\n"
+            "(and how many files, in count mode), and the distribution of the submission rates:\n"
+            "mean, median, percentiles and a histogram. No table is rendered.\n"
+            "With --block TERM COURSE, summarizes that block of a term archive from its bitmaps."
+        )
+    )
+    parser_stats.add_argument(
+        "namelist_file",
+        nargs='?',
+        default=DEFAULT_NAMELIST_FILE,
+        help=f"Path to the student namelist text file, or archive with --block (default: {DEFAULT_NAMELIST_FILE})."
+    )
+    parser_stats.add_argument(
+        "--store",
+        choices=STORE_FORMATS,
+        default=DEFAULT_STORE,
+        help=f"Storage format of the namelist file (default: {DEFAULT_STORE})."
+    )
+    parser_stats.add_argument(
+        "--block",
+        nargs=2,
+        metavar=("TERM", "COURSE"),
+        help="Treat the file as a term archive (see 'ingest') and summarize this block of it."
+    )
+    parser_stats.add_argument(
+        "--json",
+        action="store_true",
+        help="Print the statistics as JSON instead of a summary (log messages go to stderr)."
+    )
+    parser_stats.set_defaults(func=handle_stats_action)
+
+    # --- Missing Subparser ---
+    parser_missing = subparsers.add_parser(
+        "missing",
+        help="List, per assignment, the students who did not submit (CSV or JSON lines).",
+        description=(
+            "For every assignment (or those given with --assignment), lists the students of the\n"
+            "active roster with a 0, computed as the complement of the assignment's submitters.\n"
+            "All lists are written in one run: CSV rows of Assignment, Folder, ID, Name, or one\n"
+            "JSON object per assignment and line. The active roster is every student, or only\n"
+            "those matching --where. With --block TERM COURSE, FILE is a term archive."
+        )
+    )
+    parser_missing.add_argument(
+        "namelist_file",
+        nargs='?',
+        default=DEFAULT_NAMELIST_FILE,
+        help=f"Path to the student namelist text file, or archive with --block (default: {DEFAULT_NAMELIST_FILE})."
+    )
+    parser_missing.add_argument(
+        "--store",
+        choices=STORE_FORMATS,
+        default=DEFAULT_STORE,
+        help=f"Storage format of the namelist file (default: {DEFAULT_STORE})."
+    )
+    parser_missing.add_argument(
+        "--assignment",
+        nargs="+",
+        metavar="ASSIGNMENT",
+        help="Only these assignments, as A-numbers (A3) or recorded folder names (space- or comma-separated)."
+    )
+    parser_missing.add_argument(
+        "--where",
+        metavar="EXPR",
+        help="Restrict the active roster to students matching a filter expression (see 'view --where')."
+    )
+    parser_missing.add_argument(
+        "--block",
+        nargs=2,
+        metavar=("TERM", "COURSE"),
+        help="Treat the file as a term archive (see 'ingest') and list the missing students of this block."
+    )
+    parser_missing.add_argument(
+        "--format",
+        choices=("csv", "json"),
+        default="csv",
+        help="CSV rows, or one JSON object per assignment and line (default: csv)."
+    )
+    parser_missing.add_argument(
+        "--output",
+        metavar="FILE",
+        help="Write the lists to FILE instead of standard output (log messages then go to stderr)."
+    )
+    parser_missing.set_defaults(func=handle_missing_action)
+
+    # --- Shell Subparser ---
+    parser_shell = subparsers.add_parser(
+        "shell",
+        help="Interactive prompt that keeps the namelist loaded between commands.",
+        description=(
+            "Loads the namelist once and answers 'query', 'view', 'filter' and 'process'\n"
+            "commands against it, reloading only when the namelist changes on disk.\n"
+            "Type 'help' at the prompt for the list of commands."
+        )
+    )
+    parser_shell.add_argument(
+        "namelist_file",
+        nargs='?',
+        default=DEFAULT_NAMELIST_FILE,
+        help=f"Path to the student namelist text file (default: {DEFAULT_NAMELIST_FILE})."
+    )
+    parser_shell.add_argument(
+        "--store",
+        choices=STORE_FORMATS,
+        default=DEFAULT_STORE,
+        help=f"Storage format of the namelist file (default: {DEFAULT_STORE})."
+    )
+    parser_shell.add_argument(
+        "--cache-mb",
+        type=float,
+        metavar="MB",
+        help=f"Memory budget of the roster cache used by 'use', in MB (default: {ROSTER_CACHE_MAX_BYTES >> 20});\n"
+             "least recently used rosters are evicted beyond it."
+    )
+    parser_shell.set_defaults(func=handle_shell_action)
+
+    # --- Serve Subparser ---
+    parser_serve = subparsers.add_parser(
+        "serve",
+        help="Serve student lookups, filtered views and stats as JSON over local HTTP.",
+        description=(
+            "Loads the namelist once and answers JSON requests from memory:\n"
+            "  GET /students/<id or name>\n"
+            "  GET /students?where=EXPR&sort=KEYS&limit=K&offset=N\n"
+            "  GET /stats\n"
+            "  GET /health\n"
+            "The roster is reloaded in the background when the namelist changes on disk;\n"
+            "requests in flight keep using the roster they started with."
+        )
+    )
+    parser_serve.add_argument(
+        "namelist_file",
+        nargs='?',
+        default=DEFAULT_NAMELIST_FILE,
+        help=f"Path to the student namelist text file (default: {DEFAULT_NAMELIST_FILE})."
+    )
+    parser_serve.add_argument(
+        "--store",
+        choices=STORE_FORMATS,
+        default=DEFAULT_STORE,
+        help=f"Storage format of the namelist file (default: {DEFAULT_STORE})."
+    )
+    parser_serve.add_argument(
+        "--host",
+        default=DEFAULT_SERVE_HOST,
+        help=f"Address to listen on (default: {DEFAULT_SERVE_HOST})."
+    )
+    parser_serve.add_argument(
+        "--port",
+        type=int,
+        default=DEFAULT_SERVE_PORT,
+        help=f"Port to listen on (default: {DEFAULT_SERVE_PORT})."
+    )
+    parser_serve.add_argument(
+        "--courses",
+        metavar="DIR",
+        help=(
+            "Serve every namelist file in DIR as a course, under /courses/<file name>/...,\n"
+            "instead of the single namelist_file."
+        )
+    )
+    parser_serve.add_argument(
+        "--cache-mb",
+        type=float,
+        metavar="MB",
+        help=f"Memory budget of the roster cache of --courses, in MB (default: {ROSTER_CACHE_MAX_BYTES >> 20});\n"
+             "least recently used rosters are evicted beyond it."
+    )
+    parser_serve.set_defaults(func=handle_serve_action)
+
+    return parser
+
+
+def main():
+    parser = build_parser()
     args = parser.parse_args()
     reporter = Reporter() # Instantiate Reporter once
     
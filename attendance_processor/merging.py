@@ -0,0 +1,192 @@
+"""
+Merging of several copies of a namelist (e.g. one kept by each TA).
+
+The inputs are joined on student ID with a streaming sort-merge: every input is read
+row by row, and inputs that are not already sorted by ID are first sorted externally in
+runs of `config.MERGE_RUN_SIZE` rows spilled to temporary files. `heapq.merge` then
+walks all inputs in ID order, so memory use stays flat however large the namelists are.
+The merged namelist is written sorted by ID.
+"""
+import heapq
+import os
+import tempfile
+from itertools import groupby
+from typing import List, Dict, Iterator, Optional, Tuple
+from . import processing
+from .config import MERGE_RUN_SIZE, NAMELIST_HEADER_LEADING, NAMELIST_HEADER_TRAILING
+from .reporting import Reporter
+from .tsv_namelist import is_header_row, iter_namelist_lines, read_namelist_header, iter_student_data, peek_mark_column_count, write_lines_atomically
+
+# (student ID, name, marks in output columns)
+MergeRow = Tuple[str, str, List[int]]
+
+
+def _plan_columns(input_paths: List[str], reporter: Reporter) -> Tuple[Optional[List[str]], Optional[List[List[int]]]]:
+    """
+    Decides the output columns and, per input, which output column each of its mark columns
+    goes to. With a header row in every input, columns are matched by folder name; otherwise
+    they are matched by position.
+
+    Returns:
+        Tuple[Optional[List[str]], Optional[List[List[int]]]]: Output folder names (None when
+            matching by position) and the output column of every mark column, per input (None
+            if an input cannot be read).
+    """
+    headers = [read_namelist_header(path, reporter) for path in input_paths]
+    if all(header is not None for header in headers):
+        assignment_names = []
+        column_of = {}
+        mappings = []
+        for header in headers:
+            for name in header:
+                if name not in column_of:
+                    column_of[name] = len(assignment_names)
+                    assignment_names.append(name)
+            mappings.append([column_of[name] for name in header])
+        return assignment_names, mappings
+
+    if any(header is not None for header in headers):
+        reporter.warning("Only some namelists have a header row; matching mark columns by position.")
+    column_counts = [peek_mark_column_count(path, reporter) for path in input_paths]
+    if None in column_counts:
+        return None, None
+    return None, [list(range(count)) for count in column_counts]
+
+
+def _iter_input_rows(path: str, mapping: List[int], num_output_cols: int, reporter: Reporter) -> Iterator[MergeRow]:
+    """
+    Streams the rows of one input with its marks placed in the output columns. Rows whose
+    number of marks does not match the input's mark columns are skipped with a warning.
+    """
+    for student in iter_student_data(path, reporter):
+        if len(student['marks']) != len(mapping):
+            reporter.warning(
+                f"Skipping student '{student['id']}' in '{path}': Inconsistent number of assignment mark columns. "
+                f"Expected {len(mapping)}, found {len(student['marks'])}."
+            )
+            continue
+        marks = [0] * num_output_cols
+        for mark, column in zip(student['marks'], mapping):
+            marks[column] = mark
+        yield student['id'], student['name'], marks
+
+
+def _is_sorted_by_id(path: str) -> bool:
+    """Checks in one streaming pass over the raw lines whether a namelist is sorted by ID."""
+    previous = None
+    for line_content in iter_namelist_lines(path):
+        parts = line_content.strip().split('\t')
+        if len(parts) < 2 or is_header_row(parts):
+            continue
+        if previous is not None and parts[0] < previous:
+            return False
+        previous = parts[0]
+    return True
+
+
+def _write_run(rows: List[MergeRow], run_path: str) -> str:
+    rows.sort(key=lambda row: row[0])
+    with open(run_path, 'w', encoding='utf-8', newline='\n') as f:
+        f.writelines("\t".join([student_id, name] + [str(m) for m in marks]) + "\n" for student_id, name, marks in rows)
+    return run_path
+
+
+def _iter_run(run_path: str) -> Iterator[MergeRow]:
+    with open(run_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            parts = line.rstrip('\n').split('\t')
+            yield parts[0], parts[1], [int(m) for m in parts[2:]]
+
+
+def _sorted_rows(path: str, mapping: List[int], num_output_cols: int, temp_dir: str, input_number: int,
+                 reporter: Reporter) -> Iterator[MergeRow]:
+    """
+    Returns the rows of one input in ID order: streamed directly if the file is already
+    sorted, otherwise through an external sort of runs spilled to `temp_dir`.
+    """
+    if _is_sorted_by_id(path):
+        return _iter_input_rows(path, mapping, num_output_cols, reporter)
+
+    reporter.info(f"'{path}' is not sorted by student ID; sorting it in runs of {MERGE_RUN_SIZE} rows.")
+    run_paths = []
+    run = []
+    for row in _iter_input_rows(path, mapping, num_output_cols, reporter):
+        run.append(row)
+        if len(run) >= MERGE_RUN_SIZE:
+            run_paths.append(_write_run(run, os.path.join(temp_dir, f"input{input_number}-run{len(run_paths)}.tsv")))
+            run = []
+    if run:
+        run_paths.append(_write_run(run, os.path.join(temp_dir, f"input{input_number}-run{len(run_paths)}.tsv")))
+    return heapq.merge(*(_iter_run(run_path) for run_path in run_paths), key=lambda row: row[0])
+
+
+def _tag_rows(rows: Iterator[MergeRow], source: int) -> Iterator[Tuple[str, int, str, List[int]]]:
+    for student_id, name, marks in rows:
+        yield student_id, source, name, marks
+
+
+def merge_namelists(input_paths: List[str], output_path: str, reporter: Reporter, count_mode: bool = False) -> Optional[Dict]:
+    """
+    Merges several namelists into one, joined on student ID. A mark is set if it is set in
+    any input (OR); in count mode the largest count is kept. Totals and rates are recalculated.
+
+    Name conflicts (one ID with different names) are reported as warnings and the name from
+    the first input listing the ID is kept. Rows missing from some inputs are reported too.
+
+    Args:
+        input_paths (List[str]): Paths of the namelists to merge (TSV, optionally compressed).
+        output_path (str): Path of the merged namelist to write.
+        reporter (Reporter): Reporter instance for logging.
+        count_mode (bool): Keep submission counts (maximum) instead of 0/1 marks.
+
+    Returns:
+        Optional[Dict]: Summary with 'students', 'conflicts' and 'partial' (rows missing from
+                        some inputs) counts, or None if the merge failed.
+    """
+    missing = [path for path in input_paths if not os.path.exists(path)]
+    if missing:
+        reporter.error(f"Namelist file(s) not found: {', '.join(missing)}")
+        return None
+
+    assignment_names, mappings = _plan_columns(input_paths, reporter)
+    if mappings is None:
+        return None
+    num_output_cols = len(assignment_names) if assignment_names is not None else max((len(m) for m in mappings), default=0)
+    reporter.info(f"Merging {len(input_paths)} namelist(s) into {num_output_cols} assignment mark column(s).")
+    summary = {"students": 0, "conflicts": 0, "partial": 0}
+
+    def merged_lines(streams):
+        if assignment_names is not None:
+            yield "\t".join(list(NAMELIST_HEADER_LEADING) + assignment_names + list(NAMELIST_HEADER_TRAILING)) + "\n"
+        tagged = [_tag_rows(stream, source) for source, stream in enumerate(streams)]
+        # heapq.merge is stable, so copies of an ID come in input order
+        for student_id, group in groupby(heapq.merge(*tagged, key=lambda row: row[0]), key=lambda row: row[0]):
+            rows = list(group) # All copies of one student: at most a few per input
+            names = list(dict.fromkeys(name for _, _, name, _ in rows))
+            if len(names) > 1:
+                summary['conflicts'] += 1
+                reporter.warning(f"Name conflict for ID '{student_id}': {' / '.join(names)}; keeping '{names[0]}'.")
+            sources = sorted({source for _, source, _, _ in rows})
+            if len(sources) < len(input_paths):
+                summary['partial'] += 1
+                reporter.info(f"ID '{student_id}' is only in: {', '.join(input_paths[source] for source in sources)}")
+
+            marks = [max(column) for column in zip(*(row_marks for _, _, _, row_marks in rows))]
+            if not count_mode:
+                marks = [1 if mark > 0 else 0 for mark in marks]
+            student = {"id": student_id, "name": names[0], "marks": marks}
+            processing.update_student_statistics(student, num_output_cols)
+            summary['students'] += 1
+            yield "\t".join([student_id, names[0]] + [str(m) for m in marks] + [str(student['total']), f"{student['rate']:.2f}"]) + "\n"
+
+    try:
+        with tempfile.TemporaryDirectory(prefix='namelist-merge-') as temp_dir:
+            streams = [
+                _sorted_rows(path, mapping, num_output_cols, temp_dir, input_number, reporter)
+                for input_number, (path, mapping) in enumerate(zip(input_paths, mappings))
+            ]
+            write_lines_atomically(output_path, merged_lines(streams), reporter)
+    except Exception as e:
+        reporter.error(f"Failed to merge namelists into '{output_path}': {e}")
+        return None
+    return summary
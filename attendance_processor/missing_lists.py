@@ -0,0 +1,99 @@
+"""
+Lists of students who did not submit, per assignment, for the `missing` action.
+
+Each assignment's submitters are a bitmap over roster positions (bit i is set if the i-th
+student's mark is above 0; see `term_archive.roster_bitmaps`), built in one pass over the
+roster. The active roster is a bitmap as well: every student, or only those matching a
+filter expression (see `view_filter`). The students to chase for an assignment are then
+`active & ~submitters`, a few big-integer operations, and only the set bits of that
+result are walked to emit rows.
+
+Lists are written as they are computed, one assignment after another, as CSV (one row
+per missing student) or JSON lines (one object per assignment).
+"""
+import csv
+import json
+from typing import List, Dict, Optional, TextIO
+from . import view_filter
+from .term_archive import missing_positions
+
+CSV_HEADER = ["Assignment", "Folder", "ID", "Name"]
+
+
+def active_roster_bitmap(students: List[Dict], num_assignment_cols: int, where: Optional[str] = None) -> int:
+    """
+    Returns the bitmap of the active roster: all students, or those matching `where`.
+    Totals and rates must be up to date when filtering on them.
+
+    Raises:
+        ValueError: If the filter expression is invalid.
+    """
+    if not where:
+        return (1 << len(students)) - 1
+    mask = view_filter.compile_filter(where, num_assignment_cols)(
+        view_filter.roster_columns(students, num_assignment_cols), len(students)
+    )
+    bitmap = bytearray((len(students) + 7) // 8)
+    for position, keep in enumerate(mask):
+        if keep:
+            bitmap[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(bitmap, 'little')
+
+
+def resolve_assignments(selectors: List[str], num_assignment_cols: int, assignment_names: Optional[List[str]] = None) -> List[int]:
+    """
+    Resolves assignment selectors, A-numbers ("A3", case-insensitive) or recorded folder
+    names, to 0-based column indices, in the given order and without duplicates.
+
+    Raises:
+        ValueError: If a selector matches no assignment.
+    """
+    columns = []
+    for selector in selectors:
+        if assignment_names and selector in assignment_names:
+            column = assignment_names.index(selector)
+        else:
+            try:
+                column = int(view_filter.resolve_column(selector, num_assignment_cols)[1:]) - 1
+            except ValueError: # Also raised for id/name/total/rate, which strip to no number
+                known = f"A1..A{num_assignment_cols}" + (" or a folder name" if assignment_names else "")
+                raise ValueError(f"unknown assignment '{selector}' (expected {known})") from None
+        if column not in columns:
+            columns.append(column)
+    return columns
+
+
+def iter_missing(students: List[Dict], submitted: List[int], active: int, columns: List[int]):
+    """Yields (column, missing students in roster order) for each column, computed lazily."""
+    for column in columns:
+        yield column, [students[position] for position in missing_positions(active, submitted[column])]
+
+
+def write_missing(out: TextIO, output_format: str, students: List[Dict], submitted: List[int], active: int,
+                  columns: List[int], assignment_names: Optional[List[str]] = None) -> Dict[int, int]:
+    """
+    Streams the missing-submitter lists of `columns` to `out` as CSV or JSON lines.
+
+    Returns:
+        Dict[int, int]: Number of missing students per column.
+    """
+    counts = {}
+    writer = csv.writer(out, lineterminator='\n') if output_format == 'csv' else None
+    if writer is not None:
+        writer.writerow(CSV_HEADER)
+    for column, missing in iter_missing(students, submitted, active, columns):
+        label = f"A{column+1}"
+        folder = assignment_names[column] if assignment_names else None
+        if writer is not None:
+            writer.writerows([label, folder or "", s['id'], s['name']] for s in missing)
+        else:
+            out.write(json.dumps({
+                "assignment": label,
+                "name": folder,
+                "missing": len(missing),
+                "students": [{"id": s['id'], "name": s['name']} for s in missing],
+            }) + "\n")
+        out.flush()
+        counts[column] = len(missing)
+    return counts
+
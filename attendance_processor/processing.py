@@ -7,8 +7,8 @@ Handles the core logic of processing submissions:
 - Calculating total submissions and rates.
 """
 import re
-from typing import List, Dict, Optional
-from .config import STUDENT_ID_REGEX
+from typing import List, Dict, Optional, Mapping
+from .config import STUDENT_ID_REGEX, MAX_SUBMISSION_COUNT
 from .reporting import Reporter
 
 
@@ -61,6 +61,65 @@ def mark_submission(student_record: Dict, assignment_index: int, max_mark_cols:
     return False
 
 
+def record_submission_counts(students_dict: Dict[str, Dict], assignment_index: int, counts: Mapping[str, int],
+                             max_mark_cols: int, reporter: Reporter) -> int:
+    """
+    Count mode: stores the number of submission files of each student in one assignment
+    column, saturating at `config.MAX_SUBMISSION_COUNT` (the cell is a uint8 in binary stores).
+    `counts` is the per-folder aggregate (e.g. a `collections.Counter` of extracted IDs);
+    IDs not on the roster are ignored.
+
+    Args:
+        students_dict (Dict[str, Dict]): Student data dictionaries by ID.
+        assignment_index (int): The 0-based index of the assignment.
+        counts (Mapping[str, int]): Number of submission files per student ID.
+        max_mark_cols (int): Maximum number of mark columns available.
+        reporter (Reporter): Reporter instance for logging.
+
+    Returns:
+        int: The number of students whose count was recorded.
+    """
+    if not 0 <= assignment_index < max_mark_cols:
+        reporter.warning(
+            f"Assignment index {assignment_index + 1} is out of bounds. "
+            f"Max assignment columns available: {max_mark_cols}. Counts not recorded for this assignment."
+        )
+        return 0
+    recorded = 0
+    for student_id, count in counts.items():
+        student_record = students_dict.get(student_id)
+        if student_record is not None:
+            student_record['marks'][assignment_index] = min(count, MAX_SUBMISSION_COUNT)
+            recorded += 1
+    return recorded
+
+
+def ensure_mark_capacity(students_list: List[Dict], required_cols: int, reporter: Reporter) -> int:
+    """
+    Makes sure every student's marks list can hold at least `required_cols` assignment marks.
+    Lists that are too short are padded with 0 to exactly `required_cols`, once per run: the
+    roster is reloaded by every run, so spare capacity would not outlive it. Longer lists are
+    left alone; every consumer reads marks up to the column count only.
+
+    Args:
+        students_list (List[Dict]): The list of student data dictionaries.
+        required_cols (int): The number of assignment mark columns needed.
+        reporter (Reporter): Reporter instance for logging.
+
+    Returns:
+        int: The number of student records whose marks storage was enlarged.
+    """
+    grown = 0
+    for student in students_list:
+        capacity = len(student['marks'])
+        if capacity < required_cols:
+            student['marks'].extend([0] * (required_cols - capacity))
+            grown += 1
+    if grown:
+        reporter.info(f"Enlarged marks storage of {grown} student record(s) to hold {required_cols} assignment column(s).")
+    return grown
+
+
 def calculate_final_statistics(students_list: List[Dict], num_assignments_processed: int, max_mark_cols: int, reporter: Reporter):
     """
     Calculates total submissions and submission rate for each student.
@@ -87,12 +146,20 @@ def calculate_final_statistics(students_list: List[Dict], num_assignments_proces
     reporter.info(f"Calculating totals and rates based on {num_assignments_for_rate} assignment(s).")
 
     for student in students_list:
-        # Calculate total based on marks up to num_assignments_for_rate
-        # Student marks list should be at least max_mark_cols long.
-        relevant_marks = student['marks'][:num_assignments_for_rate]
-        student['total'] = sum(relevant_marks)
+        update_student_statistics(student, num_assignments_for_rate)
 
-        if num_assignments_for_rate > 0:
-            student['rate'] = student['total'] / num_assignments_for_rate
-        else:
-            student['rate'] = 0.0
\ No newline at end of file
+
+def update_student_statistics(student: Dict, num_assignments_for_rate: int):
+    """
+    Sets the total submissions and submission rate of one student from the first
+    `num_assignments_for_rate` marks. A mark above 1 is a submission count (count mode);
+    it still counts as one submission.
+    """
+    # Student marks list should be at least num_assignments_for_rate long.
+    relevant_marks = student['marks'][:num_assignments_for_rate]
+    student['total'] = sum(1 for mark in relevant_marks if mark > 0)
+
+    if num_assignments_for_rate > 0:
+        student['rate'] = student['total'] / num_assignments_for_rate
+    else:
+        student['rate'] = 0.0
\ No newline at end of file
@@ -0,0 +1,245 @@
+"""
+Persistent query index for the namelist file, kept in a SQLite sidecar.
+
+The sidecar maps every student row of the namelist to its byte offset, with an index on
+the lowercased ID, and holds a trigram inverted index over the lowercased names. `query`
+looks the identifier up in the sidecar and then seeks straight to the matching rows, so
+only those rows are read and parsed:
+
+    ID lookup         -- one indexed lookup
+    name fragment     -- rows containing every trigram of the fragment (an indexed posting
+                         list intersection), verified by a substring test on the row itself;
+                         fragments shorter than three characters fall back to reading the file
+
+The sidecar records the size and modification time of the namelist it was built from and is
+rebuilt on the next query once either changes. Compressed namelists cannot be seeked into
+and are not indexed.
+"""
+import os
+import sqlite3
+import sys
+from contextlib import closing
+from typing import List, Dict, Tuple, Optional, Set
+from .config import QUERY_INDEX_SUFFIX
+from .reporting import Reporter
+from .tsv_namelist import get_compression_suffix, is_header_row, mark_field_count
+
+QUERY_INDEX_VERSION = 3
+TRIGRAM_LENGTH = 3
+
+_SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+CREATE TABLE rows (row INTEGER PRIMARY KEY, id_lower TEXT NOT NULL, offset INTEGER NOT NULL);
+CREATE INDEX idx_rows_id ON rows(id_lower);
+CREATE TABLE trigrams (trigram TEXT NOT NULL, row INTEGER NOT NULL, PRIMARY KEY (trigram, row)) WITHOUT ROWID;
+"""
+
+
+def get_query_index_path(namelist_path: str) -> str:
+    """Returns the path of the query index sidecar belonging to a namelist file."""
+    return namelist_path + QUERY_INDEX_SUFFIX
+
+
+def name_trigrams(text: str) -> Set[str]:
+    """Returns the trigrams of a lowercased name or name fragment."""
+    text = text.lower()
+    return {text[i:i + TRIGRAM_LENGTH] for i in range(len(text) - TRIGRAM_LENGTH + 1)}
+
+
+def _namelist_stamp(namelist_path: str) -> Tuple[int, int]:
+    st = os.stat(namelist_path)
+    return st.st_size, st.st_mtime_ns
+
+
+def _parse_row(line: str, num_assignment_cols: int) -> Optional[Dict]:
+    """Parses one indexed namelist row, which has exactly `num_assignment_cols` marks."""
+    parts = line.strip().split('\t')
+    if len(parts) < 2 or mark_field_count(parts) != num_assignment_cols:
+        return None
+    try:
+        marks = [int(m) for m in parts[2:2 + num_assignment_cols]]
+        has_summary = len(parts) == num_assignment_cols + 4
+        total = int(parts[-2]) if has_summary else 0
+        rate = float(parts[-1]) if has_summary else 0.0
+    except ValueError:
+        return None
+    return {"id": parts[0], "name": parts[1], "marks": marks, "total": total, "rate": rate}
+
+
+def _is_valid_marks(parts: List[str], num_marks: int) -> bool:
+    try:
+        for m in parts[2:2 + num_marks]:
+            int(m)
+    except ValueError:
+        return False
+    return True
+
+
+def build_query_index(namelist_path: str, reporter: Reporter) -> bool:
+    """
+    (Re)builds the query index sidecar of a TSV namelist in one pass over the file. Rows are
+    validated like `tsv_namelist.iter_student_data` validates them when loading: the first
+    valid row sets the number of mark columns, and rows with another number of marks or
+    non-integer marks are left out of the index, so `query` finds exactly the students that
+    `view` loads.
+
+    Returns:
+        bool: True if the sidecar was written.
+    """
+    index_path = get_query_index_path(namelist_path)
+    temp_path = index_path + '.tmp'
+    try:
+        size, mtime_ns = _namelist_stamp(namelist_path)
+        num_assignment_cols = None
+        skipped = 0
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        with closing(sqlite3.connect(temp_path)) as conn:
+            conn.executescript(_SCHEMA)
+            with conn, open(namelist_path, 'rb') as f:
+                offset = 0
+                row_number = 0
+                for raw_line in f:
+                    parts = raw_line.decode('utf-8').strip().split('\t')
+                    line_offset = offset
+                    offset += len(raw_line)
+                    if len(parts) < 2 or (num_assignment_cols is None and is_header_row(parts)):
+                        continue
+                    num_marks = mark_field_count(parts)
+                    if num_assignment_cols is None:
+                        num_assignment_cols = num_marks
+                    if num_marks != num_assignment_cols or not _is_valid_marks(parts, num_marks):
+                        skipped += 1 # Skipped by the loader as well, which reports it
+                        continue
+                    conn.execute("INSERT INTO rows (row, id_lower, offset) VALUES (?, ?, ?)",
+                                 (row_number, parts[0].lower(), line_offset))
+                    conn.executemany("INSERT OR IGNORE INTO trigrams (trigram, row) VALUES (?, ?)",
+                                     ((trigram, row_number) for trigram in name_trigrams(parts[1])))
+                    row_number += 1
+                conn.executemany("INSERT INTO meta (key, value) VALUES (?, ?)", [
+                    ("version", QUERY_INDEX_VERSION), ("size", size), ("mtime_ns", mtime_ns),
+                    ("num_assignment_cols", num_assignment_cols or 0),
+                ])
+        os.replace(temp_path, index_path)
+    except (OSError, UnicodeDecodeError, sqlite3.Error) as e:
+        reporter.warning(f"Could not build query index '{index_path}': {e}")
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        return False
+    reporter.info(f"Built query index of {row_number} row(s) in {index_path}")
+    if skipped:
+        reporter.warning(f"Left {skipped} malformed or inconsistent row(s) of '{namelist_path}' out of the query index.")
+    return True
+
+
+def _read_meta(conn: sqlite3.Connection) -> Dict[str, int]:
+    return dict(conn.execute("SELECT key, value FROM meta").fetchall())
+
+
+def _index_is_current(namelist_path: str, index_path: str) -> bool:
+    if not os.path.exists(index_path):
+        return False
+    try:
+        with closing(sqlite3.connect(index_path)) as conn:
+            meta = _read_meta(conn)
+    except sqlite3.Error:
+        return False
+    return meta.get("version") == QUERY_INDEX_VERSION and (meta.get("size"), meta.get("mtime_ns")) == _namelist_stamp(namelist_path)
+
+
+def query_indexed_students(namelist_path: str, identifier: str, reporter: Reporter) -> Optional[Tuple[List[Dict], int]]:
+    """
+    Looks up students through the query index, rebuilding it first if it is missing or stale.
+    An exact (case-insensitive) ID match is returned on its own; otherwise all students whose
+    name contains `identifier` (case-insensitive), in namelist order.
+
+    Args:
+        namelist_path (str): Path to the TSV namelist file.
+        identifier (str): Student ID or name fragment.
+        reporter (Reporter): Reporter instance for logging.
+
+    Returns:
+        Optional[Tuple[List[Dict], int]]: The matching student data dictionaries and the number
+            of assignment mark columns, or None if the index cannot answer the query (compressed
+            namelist, fragment shorter than a trigram, or no usable index); the caller then
+            falls back to loading the namelist.
+    """
+    if not os.path.exists(namelist_path) or get_compression_suffix(namelist_path) is not None:
+        return None
+    index_path = get_query_index_path(namelist_path)
+    if not _index_is_current(namelist_path, index_path) and not build_query_index(namelist_path, reporter):
+        return None
+
+    term = identifier.lower()
+    try:
+        with closing(sqlite3.connect(index_path)) as conn:
+            num_assignment_cols = _read_meta(conn)["num_assignment_cols"]
+            offsets = [offset for (offset,) in conn.execute(
+                "SELECT offset FROM rows WHERE id_lower = ? ORDER BY row LIMIT 1", (term,)
+            )]
+            exact_id = bool(offsets)
+            if not exact_id:
+                trigrams = sorted(name_trigrams(term))
+                if not trigrams:
+                    return None
+                placeholders = ",".join("?" * len(trigrams))
+                offsets = [offset for (offset,) in conn.execute(
+                    f"SELECT r.offset FROM trigrams t JOIN rows r ON r.row = t.row "
+                    f"WHERE t.trigram IN ({placeholders}) GROUP BY t.row HAVING COUNT(*) = ? ORDER BY t.row",
+                    trigrams + [len(trigrams)]
+                )]
+    except (sqlite3.Error, KeyError) as e:
+        reporter.warning(f"Could not use query index '{index_path}': {e}")
+        return None
+
+    students = []
+    with open(namelist_path, 'rb') as f:
+        for offset in offsets:
+            f.seek(offset)
+            student = _parse_row(f.readline().decode('utf-8'), num_assignment_cols)
+            # Trigram hits are candidates; keep only rows that really contain the fragment
+            if student is not None and (exact_id or term in student['name'].lower()):
+                students.append(student)
+    reporter.info(f"Query index: read {len(offsets)} candidate row(s) of '{namelist_path}'.")
+    return students, num_assignment_cols
+
+
+class RosterLookup:
+    """
+    In-memory lookup structure over a loaded roster, for resolving many identifiers against
+    one load: a hash of lowercased IDs and a trigram inverted index of lowercased names.
+    Identifiers are matched like `query`: an exact ID on its own, otherwise every student
+    whose name contains the identifier.
+    """
+
+    def __init__(self, students: List[Dict]):
+        self.students = students
+        self._by_id = {}
+        self._by_trigram = {}
+        for position, student in enumerate(students):
+            self._by_id.setdefault(student['id'].lower(), position)
+            for trigram in name_trigrams(student['name']):
+                self._by_trigram.setdefault(trigram, []).append(position)
+
+    def resolve(self, identifier: str) -> List[Dict]:
+        """Returns the students matching `identifier`, in roster order."""
+        term = identifier.lower()
+        position = self._by_id.get(term)
+        if position is not None:
+            return [self.students[position]]
+        trigrams = name_trigrams(term)
+        if trigrams:
+            # Walk the shortest posting list and keep positions present in all others
+            postings = sorted((self._by_trigram.get(trigram, []) for trigram in trigrams), key=len)
+            others = [set(posting) for posting in postings[1:]]
+            candidates = (p for p in postings[0] if all(p in other for other in others))
+        else:
+            candidates = range(len(self.students)) # Too short for trigrams
+        return [self.students[p] for p in candidates if term in self.students[p]['name'].lower()]
+
+    def estimated_size(self) -> int:
+        """Estimates the memory held by the lookup structure itself (not the students), in bytes."""
+        size = sys.getsizeof(self._by_id) + sys.getsizeof(self._by_trigram)
+        for trigram, postings in self._by_trigram.items():
+            size += sys.getsizeof(trigram) + sys.getsizeof(postings)
+        return size
@@ -1,28 +1,48 @@
+import sys
 from tabulate import tabulate
+from .config import TABLE_RENDER_CHUNK_ROWS
+
+try:
+    from wcwidth import wcswidth
+except ImportError: # Optional, as in tabulate: only needed for wide (e.g. CJK) characters
+    wcswidth = None
 
 """
 Handles all console output for the attendance processing application,
 including informational messages, warnings, errors, and summaries.
 """
 
+def _text_width(text: str) -> int:
+    """Returns the display width of `text`, counting wide characters the way tabulate does."""
+    if wcswidth is not None:
+        width = wcswidth(text)
+        if width >= 0:
+            return width
+    return len(text)
+
+
 class Reporter:
     """
     A simple class to handle reporting messages to the console.
+
+    Messages go to stdout unless `stream` is set, e.g. to `sys.stderr` by actions whose
+    stdout is machine-readable output (JSON, CSV) that log lines must not mix into.
     """
-    def __init__(self):
+    def __init__(self, stream=None):
         self.error_files_details = []
+        self.stream = stream
 
     def info(self, message: str):
         """Prints an informational message."""
-        print(f"[INFO] {message}")
+        print(f"[INFO] {message}", file=self.stream)
 
     def warning(self, message: str):
         """Prints a warning message."""
-        print(f"[WARNING] {message}")
+        print(f"[WARNING] {message}", file=self.stream)
 
     def error(self, message: str):
         """Prints an error message."""
-        print(f"[ERROR] {message}")
+        print(f"[ERROR] {message}", file=self.stream)
 
     def log_file_error(self, filename: str, reason: str, folder_name: str = ""):
         """Logs a file-specific error and stores its details."""
@@ -120,47 +140,223 @@ def display_student_details(student: dict, num_assignment_cols: int, reporter: R
     
 
 
-def display_attendance_table(students_list: list, num_assignment_cols: int, reporter: Reporter):
+def _attendance_row_cells(student: dict, num_assignment_cols: int) -> list:
     """
-    Displays the full student list as a formatted table using the tabulate module.
-    (This function remains the same as the previous version using tabulate)
+    Returns the display cells of one student's row in the attendance table, stripped of
+    surrounding whitespace as tabulate strips them.
+    """
+    row = [student['id'].strip(), student['name'].strip()]
+    student_marks = student.get('marks', [])
+    for i in range(num_assignment_cols):
+        row.append(str(student_marks[i]) if i < len(student_marks) else '0')
+    row.append(str(student.get('total', 0)))
+    row.append(f"{student.get('rate', 0.0):.2f} ({student.get('rate', 0.0)*100:.0f} %)")
+    return row
+
+
+def _is_int_text(text: str) -> bool:
+    try:
+        int(text)
+        return True
+    except ValueError:
+        return False
+
+
+def _is_number_text(text: str) -> bool:
+    try:
+        float(text)
+        return True
+    except ValueError:
+        return False
+
+
+class _ColumnStats:
+    """
+    Running statistics of one table column, mirroring how tabulate types and sizes a column:
+    a column whose cells are all numbers is centred (and reformatted with "g" if any is not
+    an integer), any other column is left-aligned.
+    """
+    __slots__ = ("header_width", "text_width", "float_width", "is_int", "is_number")
+
+    def __init__(self, header: str):
+        self.header_width = _text_width(header)
+        self.text_width = 0
+        self.float_width = 0
+        self.is_int = True
+        self.is_number = True
+
+    def add(self, cell: str):
+        self.text_width = max(self.text_width, _text_width(cell))
+        if self.is_int and not _is_int_text(cell):
+            self.is_int = False
+        if self.is_number:
+            if _is_number_text(cell):
+                self.float_width = max(self.float_width, len(format(float(cell), 'g')))
+            else:
+                self.is_number = False
+
+    @property
+    def reformat_floats(self) -> bool:
+        return self.is_number and not self.is_int
+
+    @property
+    def width(self) -> int:
+        cell_width = self.float_width if self.reformat_floats else self.text_width
+        return max(cell_width, self.header_width + 2) # tabulate's minimum header padding
+
+
+def _pad(text: str, width: int, centre: bool) -> str:
+    fill = width - _text_width(text)
+    if centre:
+        left = fill // 2
+        return " " * left + text + " " * (fill - left)
+    return text + " " * fill
+
+
+def _grid_line(widths: list, left: str, fill: str, middle: str, right: str) -> str:
+    return left + middle.join(fill * (w + 2) for w in widths) + right + "\n"
+
+
+def _grid_row(cells: list, widths: list, centred: list) -> str:
+    return "│" + "│".join(" " + _pad(c, w, a) + " " for c, w, a in zip(cells, widths, centred)) + "│\n"
+
+
+def display_attendance_table(students_list: list, num_assignment_cols: int, reporter: Reporter,
+                             page: int = None, page_size: int = None):
+    """
+    Displays the student list as a table in tabulate's "fancy_grid" format, streamed to
+    stdout: column widths and alignments come from one statistics pass over the rows, and
+    the rows are then formatted and written in chunks of `TABLE_RENDER_CHUNK_ROWS`, so the
+    formatted table is never held in memory.
+
+    Args:
+        students_list (list): Student data dictionaries to display.
+        num_assignment_cols (int): Number of assignment mark columns.
+        reporter (Reporter): The reporter instance.
+        page (int): 1-based page to display (all rows if not given). Column widths are taken
+                    from all rows, so every page lines up the same way.
+        page_size (int): Rows per page, required with `page`.
+
+    Returns:
+        bool: True if a table was displayed.
     """
     if not students_list:
         reporter.info("No student data to display in table.")
-        return
+        return False
 
-    reporter.info("Attendance/Submission Analysis Table:")
+    headers = ["ID", "Name"] + [f"A{i+1}" for i in range(num_assignment_cols)] + ["Total", "Rate"]
 
-    headers = ["ID", "Name"]
-    if num_assignment_cols > 0:
-        headers.extend([f"A{i+1}" for i in range(num_assignment_cols)])
-    headers.extend(["Total", "Rate"])
+    rows = students_list
+    if page is not None:
+        num_pages = (len(students_list) + page_size - 1) // page_size
+        if page > num_pages:
+            reporter.warning(f"Page {page} is past the end of the table ({num_pages} page(s) of {page_size} row(s)).")
+            return False
+        first = (page - 1) * page_size
+        rows = students_list[first:first + page_size]
+        reporter.info(f"Page {page} of {num_pages} (rows {first + 1}-{first + len(rows)} of {len(students_list)}).")
 
-    table_data = []
+    reporter.info("Attendance/Submission Analysis Table:")
+
+    stats = [_ColumnStats(header) for header in headers]
     for student in students_list:
-        row = [student['id'], student['name']]
-        if num_assignment_cols > 0:
-            student_marks = student.get('marks', [])
-            for i in range(num_assignment_cols):
-                row.append(str(student_marks[i]) if i < len(student_marks) else '0')
-        
-        row.append(str(student.get('total', 0)))
-        row.append(f"{student.get('rate', 0.0):.2f} ({student.get('rate', 0.0)*100:.0f} %)")
-        table_data.append(row)
+        for column, cell in zip(stats, _attendance_row_cells(student, num_assignment_cols)):
+            column.add(cell)
+    widths = [column.width for column in stats]
+    centred = [column.is_number for column in stats]
+    float_columns = [i for i, column in enumerate(stats) if column.reformat_floats]
+
+    write = sys.stdout.write
+    write(_grid_line(widths, "╒", "═", "╤", "╕"))
+    write(_grid_row(headers, widths, centred))
+    write(_grid_line(widths, "╞", "═", "╪", "╡"))
+    separator = _grid_line(widths, "├", "─", "┼", "┤")
+    for chunk_start in range(0, len(rows), TABLE_RENDER_CHUNK_ROWS):
+        lines = []
+        for student in rows[chunk_start:chunk_start + TABLE_RENDER_CHUNK_ROWS]:
+            cells = _attendance_row_cells(student, num_assignment_cols)
+            for i in float_columns:
+                cells[i] = format(float(cells[i]), 'g')
+            lines.append(_grid_row(cells, widths, centred))
+        write(separator.join(lines) if chunk_start == 0 else separator + separator.join(lines))
+    write(_grid_line(widths, "╘", "═", "╧", "╛"))
+    sys.stdout.flush()
+
+    print("— " * 40 + "Bottom Line" + " —" * 40)
+    return True
 
-    # Print the table using tabulate
-    # You can choose different table formats like "grid", "fancy_grid", "pipe", "orgtbl", "pretty", "rst", etc.
-    # "fancy_grid" is a good default.
 
+def display_batch_query_table(results: list, num_assignment_cols: int, reporter: Reporter):
+    """
+    Displays the results of a batch query as one table: a row per matching student, labelled
+    with the identifier that matched it, and a row for every identifier without a match.
+    """
+    headers = ["Query", "ID", "Name"] + [f"A{i+1}" for i in range(num_assignment_cols)] + ["Total", "Rate"]
+    table_data = []
+    for identifier, matches in results:
+        if not matches:
+            table_data.append([identifier, "(not found)", ""] + [""] * num_assignment_cols + ["", ""])
+        for student in matches:
+            row = [identifier, student['id'], student['name']]
+            row.extend(str(m) for m in student['marks'][:num_assignment_cols])
+            row.append(str(student.get('total', 0)))
+            row.append(f"{student.get('rate', 0.0):.2f} ({student.get('rate', 0.0)*100:.0f} %)")
+            table_data.append(row)
     try:
         print(tabulate(table_data, headers=headers, tablefmt="fancy_grid", stralign="left", numalign="center"))
     except Exception as e:
         reporter.error(f"Failed to generate table with tabulate: {e}")
-        reporter.warning("Falling back to basic print (if implemented) or no table.")
-        # I can implement a very basic fallback print here if tabulate fails for some reason.
-        # For now, I'll just log the error.
 
-    print("— " * 40 + "Bottom Line" + " —" * 40)
+
+def display_trend_table(rows: list, columns: list, reporter: Reporter):
+    """
+    Displays aggregate rows (dictionaries) as a table, with one column per key in `columns`.
+    'rate' values are shown as fractions and percentages, like the attendance table.
+    """
+    if not rows:
+        reporter.info("No archived data matches the selection.")
+        return
+
+    table_data = []
+    for row in rows:
+        table_data.append([
+            f"{row[key]:.2f} ({row[key]*100:.0f} %)" if key == 'rate' else row[key]
+            for key in columns
+        ])
+    try:
+        print(tabulate(table_data, headers=[key.capitalize() for key in columns], tablefmt="pretty", stralign="left"))
+    except Exception as e:
+        reporter.error(f"Failed to generate trend table with tabulate: {e}")
+
+
+def display_roster_stats(stats: dict, reporter: Reporter):
+    """
+    Displays a roster summary (see `roster_stats.summarize`): a per-assignment table, the
+    rate distribution and a text histogram of the rates.
+    """
+    print(f"Students: {stats['students']}    Assignments: {len(stats['assignments'])}")
+    if not stats['assignments']:
+        return
+
+    with_names = any(a['name'] for a in stats['assignments'])
+    with_files = any(a['files'] != a['submitted'] for a in stats['assignments']) # Count mode
+    headers = ["Assignment"] + (["Folder"] if with_names else []) + ["Submitted", "Missing"] + (["Files"] if with_files else []) + ["Rate"]
+    table_data = []
+    for a in stats['assignments']:
+        row = [a['assignment']] + ([a['name'] or ""] if with_names else []) + [a['submitted'], a['missing']]
+        row += ([a['files']] if with_files else []) + [f"{a['rate']:.2f} ({a['rate']*100:.0f} %)"]
+        table_data.append(row)
+    try:
+        print(tabulate(table_data, headers=headers, tablefmt="pretty", stralign="left"))
+    except Exception as e:
+        reporter.error(f"Failed to generate stats table with tabulate: {e}")
+
+    if stats['rate']:
+        print("Submission rate per student: " + "  ".join(f"{key} {value:.2f}" for key, value in stats['rate'].items()))
+        largest = max(b['students'] for b in stats['histogram']) or 1
+        for b in stats['histogram']:
+            bar = "#" * round(40 * b['students'] / largest)
+            print(f"  {b['from']:.1f}-{b['to']:.1f} | {bar} {b['students']}")
 
 
 # Import DEFAULT_FILE_EXTENSION for use in Reporter, or pass it as an argument.
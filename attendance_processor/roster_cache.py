@@ -0,0 +1,140 @@
+"""
+In-memory rosters for long-running front ends (`shell`, `serve`).
+
+A `RosterSnapshot` is one fully loaded roster: its students with fresh totals and rates,
+the ID/name lookup of `query`, and the stamp (sizes and modification times) of the files
+it was loaded from. Snapshots are never modified after loading, so they can be shared
+between threads and replaced by a single reference assignment.
+
+`RosterCache` keeps the snapshots of many namelists (e.g. one per course) within a memory
+budget. Entries are keyed by namelist path and validated against the current file stamp on
+every lookup, so a namelist that changed on disk is a miss and is reloaded. When the
+estimated size of the cached snapshots exceeds the budget, the least recently used ones
+are evicted. Hits, misses, stale reloads and evictions are counted.
+"""
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Dict, Optional
+from . import file_operations
+from . import processing
+from .config import ROSTER_CACHE_MAX_BYTES
+from .query_index import RosterLookup
+from .reporting import Reporter
+
+
+def _estimate_bytes(students: List[Dict], lookup: RosterLookup) -> int:
+    """Estimates the memory held by a loaded roster and its lookup structure."""
+    size = sys.getsizeof(students)
+    for student in students:
+        size += sys.getsizeof(student) + sys.getsizeof(student['id']) + sys.getsizeof(student['name'])
+        size += sys.getsizeof(student['marks']) + sys.getsizeof(student.get('rate', 0.0))
+    return size + lookup.estimated_size()
+
+
+class RosterSnapshot:
+    """An immutable, fully loaded roster with its lookup structure and file stamp."""
+    __slots__ = ("students", "num_assignment_cols", "lookup", "stamp", "loaded_at", "size_bytes")
+
+    def __init__(self, students: List[Dict], num_assignment_cols: int, stamp):
+        self.students = students
+        self.num_assignment_cols = num_assignment_cols
+        self.lookup = RosterLookup(students)
+        self.stamp = stamp
+        self.loaded_at = time.time()
+        self.size_bytes = _estimate_bytes(students, self.lookup)
+
+
+def load_snapshot(namelist_file: str, store: str, reporter: Reporter) -> Optional[RosterSnapshot]:
+    """
+    Loads a roster into a snapshot, with totals and rates recalculated.
+
+    Returns:
+        Optional[RosterSnapshot]: The snapshot, or None if the namelist is missing, holds no
+            students, or changed while it was being loaded (the caller may retry later).
+    """
+    stamp = file_operations.roster_stamp(namelist_file, store, reporter)
+    if stamp is None:
+        reporter.error(f"Namelist not found: {namelist_file}")
+        return None
+    students, num_assignment_cols = file_operations.load_roster(namelist_file, store, reporter, use_cache=True)
+    if file_operations.roster_stamp(namelist_file, store, reporter) != stamp:
+        reporter.warning(f"'{namelist_file}' changed while loading.")
+        return None
+    if not students:
+        reporter.warning(f"'{namelist_file}' has no student data.")
+        return None
+    processing.calculate_final_statistics(students, num_assignment_cols, num_assignment_cols, reporter)
+    return RosterSnapshot(students, num_assignment_cols, stamp)
+
+
+class RosterCache:
+    """Least-recently-used cache of roster snapshots within a memory budget. Thread-safe."""
+
+    def __init__(self, max_bytes: Optional[int] = None):
+        self.max_bytes = max_bytes if max_bytes is not None else ROSTER_CACHE_MAX_BYTES
+        self._entries: "OrderedDict[tuple, RosterSnapshot]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.evictions = 0
+
+    def get(self, namelist_file: str, store: str, reporter: Reporter) -> Optional[RosterSnapshot]:
+        """
+        Returns the snapshot of a namelist, from the cache if its file stamp is unchanged,
+        otherwise freshly loaded (and cached, evicting least recently used snapshots as needed).
+
+        Returns:
+            Optional[RosterSnapshot]: The snapshot, or None if the roster cannot be loaded.
+        """
+        key = (namelist_file, store)
+        stamp = file_operations.roster_stamp(namelist_file, store, reporter)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None and stamp is not None and cached.stamp == stamp:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return cached
+            self.misses += 1
+            if cached is not None:
+                self.stale += 1
+                self._remove(key)
+
+        # Load outside the lock, so other rosters stay available meanwhile
+        snapshot = load_snapshot(namelist_file, store, reporter)
+        if snapshot is None:
+            return None
+        if snapshot.size_bytes > self.max_bytes:
+            reporter.warning(f"'{namelist_file}' (~{snapshot.size_bytes // (1 << 20)} MB) exceeds the roster cache budget; not cached.")
+            return snapshot
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key) # Loaded concurrently by another caller; keep the newest
+            self._entries[key] = snapshot
+            self.current_bytes += snapshot.size_bytes
+            while self.current_bytes > self.max_bytes:
+                evicted_key, _ = next(iter(self._entries.items()))
+                self._remove(evicted_key)
+                self.evictions += 1
+                reporter.info(f"Evicted roster '{evicted_key[0]}' from the cache.")
+        return snapshot
+
+    def _remove(self, key):
+        self.current_bytes -= self._entries.pop(key).size_bytes
+
+    def stats(self) -> Dict:
+        """Returns the cache's counters and current memory use."""
+        with self._lock:
+            return {
+                "rosters": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale": self.stale,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,181 @@
+"""
+Binary sidecar cache for the namelist file.
+
+The namelist (TSV) stays the source of truth. After it has been parsed once, the
+parsed roster is stored next to it in a compact struct-packed file so that later
+`query` and `view` runs can skip text parsing. The sidecar records the size,
+modification time and content hash of the namelist it was built from and is
+ignored (and rebuilt) as soon as any of them no longer matches.
+"""
+import hashlib
+import os
+import struct
+from typing import List, Dict, Tuple, Optional
+from .config import ROSTER_SIDECAR_SUFFIX
+from .reporting import Reporter
+
+SIDECAR_MAGIC = b'APRS'
+SIDECAR_VERSION = 1
+
+# magic, version, namelist size, namelist mtime (ns), namelist digest, mark columns, students
+_HEADER = struct.Struct('<4sHQq16sII')
+# id length, name length
+_RECORD_LENGTHS = struct.Struct('<HH')
+# total, rate
+_RECORD_SUMMARY = struct.Struct('<id')
+
+
+def get_sidecar_path(namelist_path: str) -> str:
+    """Returns the path of the binary sidecar belonging to a namelist file."""
+    return namelist_path + ROSTER_SIDECAR_SUFFIX
+
+
+def compute_file_digest(filepath: str) -> bytes:
+    """
+    Computes a short BLAKE2b digest of a file's contents, reading it in chunks.
+
+    Args:
+        filepath (str): Path of the file to hash.
+
+    Returns:
+        bytes: A 16-byte digest.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def write_roster_sidecar(namelist_path: str, students: List[Dict], num_assignment_cols: int, reporter: Reporter) -> bool:
+    """
+    Writes the parsed roster to the binary sidecar of `namelist_path`.
+    Failing to write the sidecar is never fatal; the namelist is simply parsed again next time.
+
+    Args:
+        namelist_path (str): Path to the namelist file the roster was parsed from.
+        students (List[Dict]): Student data dictionaries as returned by `load_student_data`.
+        num_assignment_cols (int): Number of assignment mark columns in the roster.
+        reporter (Reporter): Reporter instance for logging.
+
+    Returns:
+        bool: True if the sidecar was written.
+    """
+    sidecar_path = get_sidecar_path(namelist_path)
+    try:
+        stat_result = os.stat(namelist_path)
+        chunks = [_HEADER.pack(
+            SIDECAR_MAGIC, SIDECAR_VERSION, stat_result.st_size, stat_result.st_mtime_ns,
+            compute_file_digest(namelist_path), num_assignment_cols, len(students)
+        )]
+        for student in students:
+            id_bytes = student['id'].encode('utf-8')
+            name_bytes = student['name'].encode('utf-8')
+            marks = student['marks'][:num_assignment_cols]
+            marks = marks + [0] * (num_assignment_cols - len(marks))
+            chunks.append(_RECORD_LENGTHS.pack(len(id_bytes), len(name_bytes)))
+            chunks.append(id_bytes)
+            chunks.append(name_bytes)
+            chunks.append(bytes(marks)) # Marks are stored one unsigned byte per column
+            chunks.append(_RECORD_SUMMARY.pack(student['total'], student['rate']))
+
+        with open(sidecar_path, 'wb') as f:
+            f.write(b''.join(chunks))
+        return True
+    except (ValueError, struct.error):
+        # A mark outside 0..255 or an over-long field cannot be represented; keep using the text file.
+        reporter.warning(f"Roster in '{namelist_path}' cannot be stored in the binary cache; it will be parsed from text.")
+    except Exception as e:
+        reporter.warning(f"Could not write binary cache '{sidecar_path}': {e}")
+    return False
+
+
+def read_recorded_digest(namelist_path: str) -> Optional[bytes]:
+    """
+    Returns the content digest recorded in the sidecar of `namelist_path`, reading only the
+    header, if the namelist's size and modification time still match it; otherwise None.
+    """
+    try:
+        with open(get_sidecar_path(namelist_path), 'rb') as f:
+            header = f.read(_HEADER.size)
+        magic, version, size, mtime_ns, digest, _, _ = _HEADER.unpack(header)
+        stat_result = os.stat(namelist_path)
+    except (OSError, struct.error):
+        return None
+    if magic != SIDECAR_MAGIC or version != SIDECAR_VERSION:
+        return None
+    if (stat_result.st_size, stat_result.st_mtime_ns) != (size, mtime_ns):
+        return None
+    return digest
+
+
+def read_roster_sidecar(namelist_path: str, reporter: Reporter) -> Optional[Tuple[List[Dict], int]]:
+    """
+    Loads the roster from the binary sidecar of `namelist_path` if it is still valid.
+
+    The sidecar is valid when the namelist's size and modification time match the values
+    recorded in it. If only the modification time differs (e.g. the file was touched or copied),
+    the content hash decides, and the recorded timestamp is refreshed on a match.
+
+    Args:
+        namelist_path (str): Path to the namelist file.
+        reporter (Reporter): Reporter instance for logging.
+
+    Returns:
+        Optional[Tuple[List[Dict], int]]: The student data dictionaries and the number of
+                                          assignment mark columns, or None if the sidecar is
+                                          missing, stale or unreadable.
+    """
+    sidecar_path = get_sidecar_path(namelist_path)
+    if not os.path.exists(sidecar_path) or not os.path.exists(namelist_path):
+        return None
+
+    try:
+        with open(sidecar_path, 'rb') as f:
+            data = f.read()
+
+        magic, version, size, mtime_ns, digest, num_assignment_cols, num_students = _HEADER.unpack_from(data, 0)
+        if magic != SIDECAR_MAGIC or version != SIDECAR_VERSION:
+            return None
+
+        stat_result = os.stat(namelist_path)
+        if stat_result.st_size != size:
+            return None
+        if stat_result.st_mtime_ns != mtime_ns:
+            if compute_file_digest(namelist_path) != digest:
+                return None
+            # Same content with a new timestamp: refresh the header so the next check is a plain stat.
+            with open(sidecar_path, 'r+b') as f:
+                f.write(_HEADER.pack(magic, version, size, stat_result.st_mtime_ns, digest, num_assignment_cols, num_students))
+
+        students = []
+        offset = _HEADER.size
+        for _ in range(num_students):
+            id_len, name_len = _RECORD_LENGTHS.unpack_from(data, offset)
+            offset += _RECORD_LENGTHS.size
+            student_id = data[offset:offset + id_len].decode('utf-8')
+            offset += id_len
+            name = data[offset:offset + name_len].decode('utf-8')
+            offset += name_len
+            marks = list(data[offset:offset + num_assignment_cols])
+            offset += num_assignment_cols
+            total, rate = _RECORD_SUMMARY.unpack_from(data, offset)
+            offset += _RECORD_SUMMARY.size
+            students.append({
+                "id": student_id,
+                "name": name,
+                "marks": marks,
+                "total": total,
+                "rate": rate
+            })
+
+        if offset != len(data):
+            return None # Truncated or padded file; do not trust it
+    except (struct.error, UnicodeDecodeError):
+        return None
+    except Exception as e:
+        reporter.warning(f"Could not read binary cache '{sidecar_path}': {e}")
+        return None
+
+    reporter.info(f"Loaded {len(students)} student record(s) with {num_assignment_cols} assignment mark column(s) from binary cache '{sidecar_path}'.")
+    return students, num_assignment_cols
@@ -0,0 +1,120 @@
+"""
+Summary statistics of a roster for the `stats` action (and `serve`'s /stats).
+
+Everything is computed in one pass over the marks matrix: per assignment, the number of
+students who submitted (mark above 0) and the number of files (the marks themselves, which
+differ in count mode); per student, the number of assignments submitted. A student's rate
+is that total divided by the number of assignments, so rates take at most n + 1 distinct
+values: the pass only counts students per total in a `Counter`, and the median,
+percentiles and rate histogram are read off those counts without sorting the roster.
+
+Archive blocks (see `term_archive`) are summarized the same way from their session
+bitmaps: per-session counts are popcounts, and per-student totals come from one walk over
+the set bits.
+"""
+import math
+from collections import Counter
+from typing import List, Dict, Optional
+from .config import STATS_HISTOGRAM_BINS, STATS_PERCENTILES
+from .term_archive import block_attendance_counts
+
+
+def _value_at(sorted_counts: List[tuple], position: int) -> int:
+    """Returns the total at 0-based `position` in the sorted multiset given as (total, count) pairs."""
+    for total, count in sorted_counts:
+        if position < count:
+            return total
+        position -= count
+    raise IndexError(position)
+
+
+def _percentile(sorted_counts: List[tuple], num_students: int, percent: float) -> float:
+    """Linearly interpolated percentile (as in numpy's default), over totals."""
+    position = percent / 100 * (num_students - 1)
+    low, high = math.floor(position), math.ceil(position)
+    low_value = _value_at(sorted_counts, low)
+    if high == low:
+        return low_value
+    return low_value + (_value_at(sorted_counts, high) - low_value) * (position - low)
+
+
+def summarize(num_students: int, num_assignments: int, submitted: List[int], files: List[int],
+              totals: Counter, assignment_names: Optional[List[str]] = None) -> Dict:
+    """
+    Builds the summary from the single-pass counts.
+
+    Args:
+        num_students (int): Number of students.
+        num_assignments (int): Number of assignments (the rate denominator).
+        submitted (List[int]): Per assignment, students with a mark above 0.
+        files (List[int]): Per assignment, the sum of the marks (files in count mode).
+        totals (Counter): Number of students per number of assignments submitted.
+        assignment_names (Optional[List[str]]): Folder name per assignment, if recorded.
+
+    Returns:
+        Dict: 'students', 'assignments' (per assignment: 'assignment', 'name', 'submitted',
+              'missing', 'files', 'rate'), 'rate' ('mean', 'median', 'min', 'max' and
+              'p<N>' percentiles) and 'histogram' (per bin: 'from', 'to', 'students').
+    """
+    summary = {
+        "students": num_students,
+        "assignments": [
+            {
+                "assignment": f"A{i+1}",
+                "name": assignment_names[i] if assignment_names else None,
+                "submitted": submitted[i],
+                "missing": num_students - submitted[i],
+                "files": files[i],
+                "rate": submitted[i] / num_students if num_students else 0.0,
+            }
+            for i in range(num_assignments)
+        ],
+        "rate": {},
+        "histogram": [],
+    }
+    if not num_students or not num_assignments:
+        return summary
+
+    sorted_counts = sorted(totals.items())
+    to_rate = lambda total: total / num_assignments
+    summary["rate"] = {
+        "mean": to_rate(sum(total * count for total, count in sorted_counts) / num_students),
+        "min": to_rate(sorted_counts[0][0]),
+        "median": to_rate(_percentile(sorted_counts, num_students, 50)),
+        "max": to_rate(sorted_counts[-1][0]),
+    }
+    for percent in STATS_PERCENTILES:
+        summary["rate"][f"p{percent}"] = to_rate(_percentile(sorted_counts, num_students, percent))
+
+    # Equal-width rate bins; the last one includes a rate of exactly 1
+    bins = [0] * STATS_HISTOGRAM_BINS
+    for total, count in sorted_counts:
+        bins[min(total * STATS_HISTOGRAM_BINS // num_assignments, STATS_HISTOGRAM_BINS - 1)] += count
+    summary["histogram"] = [
+        {"from": i / STATS_HISTOGRAM_BINS, "to": (i + 1) / STATS_HISTOGRAM_BINS, "students": count}
+        for i, count in enumerate(bins)
+    ]
+    return summary
+
+
+def roster_statistics(students: List[Dict], num_assignment_cols: int, assignment_names: Optional[List[str]] = None) -> Dict:
+    """Summarizes a loaded roster in one pass over its marks (see `summarize`)."""
+    submitted = [0] * num_assignment_cols
+    files = [0] * num_assignment_cols
+    totals = Counter()
+    for student in students:
+        total = 0
+        for i, mark in enumerate(student['marks'][:num_assignment_cols]):
+            if mark > 0:
+                submitted[i] += 1
+                files[i] += mark
+                total += 1
+        totals[total] += 1
+    return summarize(len(students), num_assignment_cols, submitted, files, totals, assignment_names)
+
+
+def archive_block_statistics(block: Dict) -> Dict:
+    """Summarizes one archive block from its session bitmaps (see `summarize`)."""
+    submitted = [bin(bitmap).count('1') for bitmap in block['sessions']]
+    return summarize(len(block['codes']), len(block['sessions']), submitted, list(submitted),
+                     Counter(block_attendance_counts(block)))
@@ -0,0 +1,201 @@
+"""
+Compact index of the student IDs seen in the last submission scan.
+
+`process` writes `<namelist><SCAN_INDEX_SUFFIX>` after scanning: for every assignment
+column, the sorted IDs extracted from its submission files (including IDs that were not
+on the roster) with their file counts, plus the sorted IDs that were on the roster at
+scan time. `reconcile` uses it to back-fill students added to the namelist since then:
+it memory-maps the index and binary-searches only the new students' IDs, without
+touching the submissions directory.
+
+Layout (little-endian):
+    Header:     magic 'APSI', version (uint16), id width (uint16),
+                number of assignments (uint32), number of roster IDs (uint32)
+    Directory:  per assignment: ID count (uint32), column (uint16), folder name length
+                (uint16), folder name (UTF-8)
+    Roster:     roster IDs, sorted, each NUL padded to the id width
+    Per assignment, in directory order:
+                sorted records of ID (NUL padded) and file count (uint8, saturating at 255)
+"""
+import mmap
+import os
+import struct
+from typing import List, Dict, Tuple, Optional
+from .config import SCAN_INDEX_SUFFIX
+from .reporting import Reporter
+
+SCAN_INDEX_MAGIC = b'APSI'
+SCAN_INDEX_VERSION = 1
+
+_HEADER = struct.Struct('<4sHHII')
+_DIRECTORY_ENTRY = struct.Struct('<IHH')
+
+# Extracted IDs and how many files carried them, per (folder name, column)
+ScannedIds = Dict[Tuple[str, int], Dict[str, int]]
+
+
+def get_scan_index_path(namelist_path: str) -> str:
+    """Returns the path of the scan index belonging to a namelist file."""
+    return namelist_path + SCAN_INDEX_SUFFIX
+
+
+def _bisect(buffer, start: int, count: int, record_size: int, key: bytes) -> Optional[int]:
+    """Binary search for `key` among `count` sorted records; returns the record offset or None."""
+    key_width = len(key)
+    low, high = 0, count
+    while low < high:
+        middle = (low + high) // 2
+        offset = start + middle * record_size
+        candidate = buffer[offset:offset + key_width]
+        if candidate < key:
+            low = middle + 1
+        elif candidate > key:
+            high = middle
+        else:
+            return offset
+    return None
+
+
+def write_scan_index(namelist_path: str, roster_ids: List[str], scanned: ScannedIds, reporter: Reporter) -> bool:
+    """
+    Writes the scan index of a namelist, replacing any previous index.
+
+    Args:
+        namelist_path (str): Path of the namelist the index belongs to.
+        roster_ids (List[str]): IDs on the roster at scan time.
+        scanned (ScannedIds): Extracted IDs and file counts per (folder name, column).
+        reporter (Reporter): Reporter instance for logging.
+
+    Returns:
+        bool: True if the index was written.
+    """
+    index_path = get_scan_index_path(namelist_path)
+    encoded_roster = sorted({student_id.encode('utf-8') for student_id in roster_ids})
+    encoded_scans = [
+        (folder_name.encode('utf-8'), column, sorted((student_id.encode('utf-8'), count) for student_id, count in ids.items()))
+        for (folder_name, column), ids in sorted(scanned.items(), key=lambda item: item[0][1])
+    ]
+    id_width = max(
+        [len(i) for i in encoded_roster] + [len(i) for _, _, records in encoded_scans for i, _ in records],
+        default=0
+    )
+
+    chunks = [_HEADER.pack(SCAN_INDEX_MAGIC, SCAN_INDEX_VERSION, id_width, len(encoded_scans), len(encoded_roster))]
+    for folder_bytes, column, records in encoded_scans:
+        chunks.append(_DIRECTORY_ENTRY.pack(len(records), column, len(folder_bytes)))
+        chunks.append(folder_bytes)
+    chunks.extend(student_id.ljust(id_width, b'\0') for student_id in encoded_roster)
+    for _, _, records in encoded_scans:
+        for student_id, count in records:
+            chunks.append(student_id.ljust(id_width, b'\0'))
+            chunks.append(bytes((min(count, 255),)))
+
+    temp_path = index_path + '.tmp'
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(b''.join(chunks))
+        os.replace(temp_path, index_path)
+    except OSError as e:
+        reporter.error(f"Failed to write scan index '{index_path}': {e}")
+        return False
+    reporter.info(f"Saved scan index of {len(encoded_scans)} assignment(s) to {index_path}")
+    return True
+
+
+class ScanIndex:
+    """
+    Read-only view of a scan index, memory-mapped. Lookups binary-search the sorted
+    ID arrays, so each costs O(log n) regardless of how many IDs were scanned.
+    Use as a context manager to release the mapping.
+    """
+
+    def __init__(self, index_path: str):
+        self._file = open(index_path, 'rb')
+        try:
+            self._buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError: # Empty file
+            self._file.close()
+            raise
+        magic, version, self.id_width, num_assignments, self._roster_count = _HEADER.unpack_from(self._buffer, 0)
+        if magic != SCAN_INDEX_MAGIC or version != SCAN_INDEX_VERSION:
+            self.close()
+            raise ValueError("not a scan index file (bad magic or version)")
+
+        offset = _HEADER.size
+        directory = []
+        for _ in range(num_assignments):
+            count, column, name_length = _DIRECTORY_ENTRY.unpack_from(self._buffer, offset)
+            offset += _DIRECTORY_ENTRY.size
+            directory.append((self._buffer[offset:offset + name_length].decode('utf-8'), column, count))
+            offset += name_length
+        self._roster_offset = offset
+        offset += self._roster_count * self.id_width
+
+        # (folder name, column, offset of the first record, number of records)
+        self.assignments = []
+        for folder_name, column, count in directory:
+            self.assignments.append((folder_name, column, offset, count))
+            offset += count * (self.id_width + 1)
+        if offset > len(self._buffer):
+            self.close()
+            raise ValueError("scan index is truncated")
+
+    def _key(self, student_id: str) -> Optional[bytes]:
+        key = student_id.encode('utf-8')
+        return key.ljust(self.id_width, b'\0') if len(key) <= self.id_width else None
+
+    def was_on_roster(self, student_id: str) -> bool:
+        """Returns True if `student_id` was on the roster when the index was written."""
+        key = self._key(student_id)
+        return key is not None and _bisect(self._buffer, self._roster_offset, self._roster_count, self.id_width, key) is not None
+
+    def submissions_for(self, student_id: str) -> List[Tuple[str, int, int]]:
+        """Returns (folder name, column, file count) of every assignment `student_id` submitted to."""
+        key = self._key(student_id)
+        if key is None:
+            return []
+        found = []
+        record_size = self.id_width + 1
+        for folder_name, column, start, count in self.assignments:
+            offset = _bisect(self._buffer, start, count, record_size, key)
+            if offset is not None:
+                found.append((folder_name, column, self._buffer[offset + self.id_width]))
+        return found
+
+    def scanned_ids(self) -> ScannedIds:
+        """Returns the complete contents of the index as a `ScannedIds` mapping."""
+        record_size = self.id_width + 1
+        scanned = {}
+        for folder_name, column, start, count in self.assignments:
+            ids = {}
+            for offset in range(start, start + count * record_size, record_size):
+                ids[self._buffer[offset:offset + self.id_width].rstrip(b'\0').decode('utf-8')] = self._buffer[offset + self.id_width]
+            scanned[(folder_name, column)] = ids
+        return scanned
+
+    def close(self):
+        self._buffer.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def open_scan_index(namelist_path: str, reporter: Reporter) -> Optional[ScanIndex]:
+    """
+    Opens the scan index of a namelist.
+
+    Returns:
+        Optional[ScanIndex]: The index, or None if it does not exist or cannot be read.
+    """
+    index_path = get_scan_index_path(namelist_path)
+    if not os.path.exists(index_path):
+        return None
+    try:
+        return ScanIndex(index_path)
+    except (OSError, ValueError, struct.error) as e:
+        reporter.warning(f"Could not read scan index '{index_path}': {e}")
+        return None
@@ -0,0 +1,202 @@
+"""
+Local HTTP/JSON query service over a roster kept in memory.
+
+`serve` loads the namelist once and answers read-only requests from memory:
+
+    GET /students/<id or name>                        -- students matched like `query`
+    GET /students?where=EXPR&sort=KEYS&limit=K&offset=N  -- filtered view, like `view`
+    GET /stats                                        -- per-assignment counts and rate distribution
+    GET /health                                       -- roster size and load time
+
+With `--courses DIR`, every namelist file in DIR is served as a course, under
+`/courses/<file name>/stats`, `/courses/<file name>/students...`, from a memory-bounded
+roster cache (see `roster_cache`); `/health` then reports the cache's counters.
+
+Every response is JSON; errors are {"error": message} with a 4xx status, or 500 for an
+unexpected failure while answering.
+
+A background thread checks the roster's file stamp every `SERVE_POLL_INTERVAL` seconds
+and, when it changed, loads the new roster into a fresh, complete snapshot. The snapshot
+is swapped in with a single reference assignment, and each request reads the reference
+once, so concurrent readers see either the old or the new roster, never a mix. A load
+during which the files changed again is discarded and retried on the next check.
+"""
+import json
+import os
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import List, Dict, Optional
+from urllib.parse import urlsplit, parse_qs, unquote
+from . import file_operations
+from . import view_filter
+from .config import SERVE_POLL_INTERVAL
+from .reporting import Reporter
+from .roster_cache import RosterSnapshot, RosterCache, load_snapshot
+from .roster_stats import roster_statistics
+
+
+def _student_json(student: Dict, num_assignment_cols: int) -> Dict:
+    return {
+        "id": student['id'],
+        "name": student['name'],
+        "marks": student['marks'][:num_assignment_cols],
+        "total": student['total'],
+        "rate": student['rate'],
+    }
+
+
+class RosterService:
+    """
+    Holds the current roster snapshot of one namelist and hot-reloads it when it changes or,
+    with `courses_dir`, serves every namelist in that directory through a roster cache.
+    """
+
+    def __init__(self, namelist_file: Optional[str], store: str, reporter: Reporter,
+                 courses_dir: Optional[str] = None, cache: Optional[RosterCache] = None):
+        self.namelist_file = namelist_file
+        self.store = store
+        self.reporter = reporter
+        self.courses_dir = courses_dir
+        self.cache = cache
+        self.snapshot: Optional[RosterSnapshot] = None
+        self._stop = threading.Event()
+
+    def reload_if_changed(self) -> bool:
+        """Loads a new snapshot if the roster's stamp changed. Returns True if one was swapped in."""
+        stamp = file_operations.roster_stamp(self.namelist_file, self.store, self.reporter)
+        current = self.snapshot
+        if stamp is None or (current is not None and stamp == current.stamp):
+            return False
+        snapshot = load_snapshot(self.namelist_file, self.store, self.reporter)
+        if snapshot is None:
+            if current is not None:
+                self.reporter.warning("Keeping the previous roster; retrying on the next check.")
+            return False
+        self.snapshot = snapshot # Atomic swap
+        self.reporter.info(f"Serving {len(snapshot.students)} student(s) from '{self.namelist_file}'.")
+        return True
+
+    def _watch(self):
+        while not self._stop.wait(SERVE_POLL_INTERVAL):
+            try:
+                self.reload_if_changed()
+            except Exception as e: # Keep serving the last good snapshot
+                self.reporter.error(f"Failed to reload '{self.namelist_file}': {e}")
+
+    def start_watching(self) -> threading.Thread:
+        thread = threading.Thread(target=self._watch, name="roster-reload", daemon=True)
+        thread.start()
+        return thread
+
+    def stop_watching(self):
+        self._stop.set()
+
+    def handle(self, path: str, query: Dict[str, List[str]]):
+        """Answers one request. Returns (status, JSON-able body)."""
+        path = path.rstrip("/") or "/"
+        if self.cache is not None:
+            return self._handle_course_request(path, query)
+        snapshot = self.snapshot # Read the reference once: the whole request sees one roster
+        if snapshot is None:
+            return 503, {"error": "no roster loaded"}
+        if path == "/health":
+            return 200, {"status": "ok", "namelist": self.namelist_file, "students": len(snapshot.students),
+                         "assignments": snapshot.num_assignment_cols, "loaded_at": snapshot.loaded_at}
+        return _answer(snapshot, path, query)
+
+    def _handle_course_request(self, path: str, query: Dict[str, List[str]]):
+        """Answers /courses/<course>/... from the roster cache, and /health and /cache."""
+        if path in ("/health", "/cache"):
+            return 200, {"status": "ok", "courses_dir": self.courses_dir, "cache": self.cache.stats()}
+        parts = path.split("/", 3) # '', 'courses', course, rest
+        if len(parts) < 4 or parts[1] != "courses":
+            return 404, {"error": f"unknown endpoint '{path}' (expected /courses/<course>/...)"}
+        course = unquote(parts[2])
+        namelist_file = os.path.join(self.courses_dir, course)
+        if course in ("", ".", "..") or os.path.basename(course) != course or not os.path.isfile(namelist_file):
+            return 404, {"error": f"unknown course '{course}'"}
+        snapshot = self.cache.get(namelist_file, self.store, self.reporter)
+        if snapshot is None:
+            return 503, {"error": f"course '{course}' has no roster that can be loaded"}
+        return _answer(snapshot, "/" + parts[3], query)
+
+
+def _answer(snapshot: RosterSnapshot, path: str, query: Dict[str, List[str]]):
+    """Answers a roster endpoint (/stats, /students, /students/<id or name>) from one snapshot."""
+    n = snapshot.num_assignment_cols
+    if path == "/stats":
+        return 200, roster_statistics(snapshot.students, n)
+    if path.startswith("/students/"):
+        identifier = unquote(path[len("/students/"):])
+        matches = snapshot.lookup.resolve(identifier) if identifier else []
+        if not matches:
+            return 404, {"error": f"no student found with ID or name matching '{identifier}'"}
+        return 200, {"query": identifier, "matches": [_student_json(s, n) for s in matches]}
+    if path == "/students":
+        try:
+            offset = int(query.get("offset", ["0"])[0])
+            limit = int(query["limit"][0]) if "limit" in query else None
+            if offset < 0:
+                raise ValueError("the offset must not be negative")
+            selected = view_filter.select_students(
+                snapshot.students, n, query.get("where", [None])[0], query.get("sort", [None])[0],
+                offset + limit if limit is not None else None
+            )
+        except (ValueError, TypeError, ZeroDivisionError) as e: # Bad parameters, or a filter failing on some row
+            return 400, {"error": str(e)}
+        page = selected[offset:]
+        return 200, {"count": len(page), "students": [_student_json(s, n) for s in page]}
+    return 404, {"error": f"unknown endpoint '{path}'"}
+
+
+def _make_handler(service: RosterService):
+    class RosterRequestHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlsplit(self.path)
+            try:
+                status, body = service.handle(url.path, parse_qs(url.query))
+            except Exception as e:
+                service.reporter.error(f"Request '{self.path}' failed: {type(e).__name__}: {e}")
+                status, body = 500, {"error": f"internal error: {type(e).__name__}"}
+            payload = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            service.reporter.info(f"{self.address_string()} {format % args}")
+
+    return RosterRequestHandler
+
+
+def run_server(namelist_file: str, store: str, host: str, port: int, reporter: Reporter,
+               courses_dir: Optional[str] = None, cache_bytes: Optional[int] = None):
+    """Loads the roster (or prepares the course roster cache) and serves until interrupted."""
+    if courses_dir is not None:
+        if not os.path.isdir(courses_dir):
+            reporter.error(f"Courses directory not found: {courses_dir}")
+            return
+        service = RosterService(None, store, reporter, courses_dir, RosterCache(cache_bytes))
+    else:
+        service = RosterService(namelist_file, store, reporter)
+        service.reload_if_changed()
+        if service.snapshot is None:
+            reporter.error("Cannot serve: No student data loaded.")
+            return
+    try:
+        httpd = ThreadingHTTPServer((host, port), _make_handler(service))
+    except OSError as e:
+        reporter.error(f"Cannot listen on {host}:{port}: {e}")
+        return
+    if courses_dir is None:
+        service.start_watching() # Course rosters are checked against their stamps on every request
+    reporter.info(f"Listening on http://{host}:{httpd.server_address[1]}/ (Ctrl-C to stop).")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.stop_watching()
+        httpd.server_close()
@@ -0,0 +1,260 @@
+"""
+Sharded namelist storage.
+
+A sharded roster is a set of ordinary TSV namelist files, one per student ID prefix,
+described by a manifest file with one `prefix<tab>shard file` line per shard (shard paths
+are relative to the manifest). Scan results are routed to shards by a dictionary lookup on
+the ID prefix; statistics and saves then run per shard in a process pool, and a query for
+a single ID only has to load the shard holding that ID.
+"""
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Tuple, Optional
+from . import processing
+from .config import SHARD_PREFIX_LENGTH
+from .reporting import Reporter
+from .tsv_namelist import get_compression_suffix, open_namelist_file, iter_namelist_lines, load_student_data, save_student_data, write_lines_atomically
+
+# (student_id, assignment_index, folder name, file path)
+RoutedSubmission = Tuple[str, int, str, str]
+
+
+def shard_prefix(student_id: str, prefix_length: int) -> str:
+    """Returns the shard key (ID prefix) of a student ID."""
+    return student_id[:prefix_length]
+
+
+def read_shard_manifest(manifest_path: str, reporter: Reporter) -> Optional[Dict[str, str]]:
+    """
+    Reads a shard manifest.
+
+    Args:
+        manifest_path (str): Path to the manifest file.
+        reporter (Reporter): Reporter instance for logging.
+
+    Returns:
+        Optional[Dict[str, str]]: Mapping of ID prefix to shard file path (resolved against the
+                                  manifest's directory), in manifest order, or None on errors.
+    """
+    if not os.path.exists(manifest_path):
+        reporter.error(f"Shard manifest not found: {manifest_path}")
+        return None
+
+    base_dir = os.path.dirname(manifest_path)
+    shards = {}
+    try:
+        with open_namelist_file(manifest_path) as f:
+            for i, line_content in enumerate(f):
+                line_content = line_content.strip()
+                if not line_content: continue
+                parts = line_content.split('\t')
+                if len(parts) != 2:
+                    reporter.warning(f"Skipping malformed line {i+1} in shard manifest '{manifest_path}'. Content: '{line_content}'")
+                    continue
+                shards[parts[0]] = os.path.join(base_dir, parts[1])
+    except Exception as e:
+        reporter.error(f"Failed to read shard manifest '{manifest_path}': {e}")
+        return None
+    if len({len(prefix) for prefix in shards}) > 1:
+        reporter.warning(f"Shard manifest '{manifest_path}' mixes ID prefix lengths; routing uses the longest.")
+    return shards
+
+
+def manifest_prefix_length(shards: Dict[str, str]) -> int:
+    """Returns the ID prefix length a manifest routes by."""
+    return max((len(prefix) for prefix in shards), default=SHARD_PREFIX_LENGTH)
+
+
+def _shard_file_path(manifest_path: str, prefix: str) -> str:
+    # Shards of a compressed manifest are compressed the same way
+    compression = get_compression_suffix(manifest_path) or ''
+    stem = os.path.splitext(manifest_path[:len(manifest_path) - len(compression)])[0]
+    return f"{stem}.{prefix}.txt{compression}"
+
+
+def load_sharded_data(manifest_path: str, reporter: Reporter) -> Tuple[List[Dict], int]:
+    """
+    Loads and concatenates every shard of a sharded roster, in manifest order.
+    Shards with fewer mark columns are padded to the widest shard.
+
+    Args:
+        manifest_path (str): Path to the shard manifest.
+        reporter (Reporter): Reporter instance for logging.
+
+    Returns:
+        Tuple[List[Dict], int]: A list of student data dictionaries and the number of
+                                assignment mark columns.
+    """
+    shards = read_shard_manifest(manifest_path, reporter)
+    if not shards:
+        return [], 0
+    students = []
+    num_assignment_cols = 0
+    for prefix, shard_path in shards.items():
+        shard_students, shard_cols = load_student_data(shard_path, reporter)
+        students.extend(shard_students)
+        num_assignment_cols = max(num_assignment_cols, shard_cols)
+    for student in students:
+        if len(student['marks']) < num_assignment_cols:
+            student['marks'].extend([0] * (num_assignment_cols - len(student['marks'])))
+    return students, num_assignment_cols
+
+
+def load_shard_for_id(manifest_path: str, student_id: str, reporter: Reporter) -> Optional[Tuple[List[Dict], int]]:
+    """
+    Loads only the shard that would hold `student_id`.
+
+    Returns:
+        Optional[Tuple[List[Dict], int]]: The shard's student data and mark column count, or
+                                          None if no shard covers the ID's prefix.
+    """
+    shards = read_shard_manifest(manifest_path, reporter)
+    if not shards:
+        return None
+    shard_path = shards.get(shard_prefix(student_id, manifest_prefix_length(shards)))
+    if shard_path is None:
+        return None
+    reporter.info(f"Loading shard '{shard_path}' for ID '{student_id}'.")
+    return load_student_data(shard_path, reporter)
+
+
+def save_sharded_data(manifest_path: str, students: List[Dict], reporter: Reporter, num_assignment_marks_to_write: int) -> bool:
+    """
+    Saves a roster as shards by ID prefix and (re)writes the manifest. An existing manifest's
+    prefix length is kept; otherwise `config.SHARD_PREFIX_LENGTH` is used.
+
+    Args:
+        manifest_path (str): Path to the shard manifest.
+        students (List[Dict]): List of student data dictionaries.
+        reporter (Reporter): Reporter instance for logging.
+        num_assignment_marks_to_write (int): The number of assignment mark columns to write.
+
+    Returns:
+        bool: True if every shard and the manifest were saved.
+    """
+    existing = read_shard_manifest(manifest_path, reporter) if os.path.exists(manifest_path) else None
+    prefix_length = manifest_prefix_length(existing) if existing else SHARD_PREFIX_LENGTH
+    shards = dict(existing or {})
+
+    routed = {}
+    for student in students:
+        routed.setdefault(shard_prefix(student['id'], prefix_length), []).append(student)
+    for prefix in routed:
+        if prefix not in shards:
+            shards[prefix] = _shard_file_path(manifest_path, prefix)
+
+    saved = True
+    for prefix, shard_path in shards.items():
+        saved = save_student_data(shard_path, routed.get(prefix, []), reporter, num_assignment_marks_to_write) and saved
+
+    base_dir = os.path.dirname(manifest_path)
+    manifest_lines = (f"{prefix}\t{os.path.relpath(path, base_dir or '.')}\n" for prefix, path in sorted(shards.items()))
+    try:
+        write_lines_atomically(manifest_path, manifest_lines, reporter)
+    except Exception as e:
+        reporter.error(f"Failed to write shard manifest '{manifest_path}': {e}")
+        return False
+    if saved:
+        reporter.info(f"Saved {len(students)} student record(s) in {len(shards)} shard(s) listed in {manifest_path}")
+    return saved
+
+
+def route_submissions(submissions: List[RoutedSubmission], shards: Dict[str, str]) -> Tuple[Dict[str, List[RoutedSubmission]], List[RoutedSubmission]]:
+    """
+    Routes scanned submissions to the shard responsible for their student ID.
+
+    Returns:
+        Tuple[Dict[str, List[RoutedSubmission]], List[RoutedSubmission]]: Submissions per shard
+            file path, and the submissions whose ID prefix has no shard.
+    """
+    prefix_length = manifest_prefix_length(shards)
+    per_shard = {path: [] for path in shards.values()}
+    unrouted = []
+    for submission in submissions:
+        shard_path = shards.get(shard_prefix(submission[0], prefix_length))
+        if shard_path is None:
+            unrouted.append(submission)
+        else:
+            per_shard[shard_path].append(submission)
+    return per_shard, unrouted
+
+
+def _is_blank(shard_path: str) -> bool:
+    """Checks whether a shard file is missing or holds only blank lines."""
+    try:
+        return not any(line.strip() for line in iter_namelist_lines(shard_path))
+    except FileNotFoundError:
+        return True
+    except Exception:
+        return False # Unreadable content is not blank
+
+
+def process_shard(shard_path: str, submissions: List[RoutedSubmission], num_assignment_cols: int,
+                  reset_columns: List[int], count_mode: bool = False) -> Dict:
+    """
+    Applies routed submissions to one shard, recalculates its statistics and saves it.
+    Runs in a worker process, so it takes and returns only plain data.
+
+    Args:
+        shard_path (str): Path to the shard's namelist file.
+        submissions (List[RoutedSubmission]): Submissions routed to this shard.
+        num_assignment_cols (int): Number of mark columns every shard must have.
+        reset_columns (List[int]): Mark columns to clear before marking (re-marked columns).
+        count_mode (bool): Store the number of files per student and assignment instead of 1.
+
+    Returns:
+        Dict: 'accepted' (submissions that were marked), 'unknown' (submissions whose student
+              is not in the shard), 'students' (number of records in the shard) and 'error'
+              (None, or why the shard was not processed; it is then not saved either).
+    """
+    reporter = Reporter()
+    students, shard_cols = load_student_data(shard_path, reporter)
+    if not students:
+        # Nothing to mark, and saving would truncate a shard whose rows all failed to parse
+        error = None if _is_blank(shard_path) else f"No student data loaded from shard '{shard_path}'; left it untouched."
+        return {"accepted": [], "unknown": [] if error else list(submissions), "students": 0, "error": error}
+    processing.ensure_mark_capacity(students, num_assignment_cols, reporter)
+    for assignment_index in reset_columns:
+        for student in students:
+            student['marks'][assignment_index] = 0
+
+    students_dict = {student['id']: student for student in students}
+    accepted = []
+    unknown = []
+    for submission in submissions:
+        student_record = students_dict.get(submission[0])
+        if student_record is None:
+            unknown.append(submission)
+        elif count_mode:
+            accepted.append(submission)
+        elif processing.mark_submission(student_record, submission[1], num_assignment_cols, reporter):
+            accepted.append(submission)
+    if count_mode:
+        counts_per_assignment = {}
+        for student_id, assignment_index, _, _ in accepted:
+            counts_per_assignment.setdefault(assignment_index, []).append(student_id)
+        for assignment_index, student_ids in counts_per_assignment.items():
+            processing.record_submission_counts(students_dict, assignment_index, Counter(student_ids), num_assignment_cols, reporter)
+
+    processing.calculate_final_statistics(students, num_assignment_cols, num_assignment_cols, reporter)
+    if not save_student_data(shard_path, students, reporter, num_assignment_cols):
+        return {"accepted": [], "unknown": [], "students": len(students), "error": f"Failed to save shard '{shard_path}'."}
+    return {"accepted": accepted, "unknown": unknown, "students": len(students), "error": None}
+
+
+def process_shards_in_parallel(per_shard: Dict[str, List[RoutedSubmission]], num_assignment_cols: int,
+                               reset_columns: List[int], max_workers: Optional[int],
+                               count_mode: bool = False) -> Dict[str, Dict]:
+    """
+    Runs `process_shard` for every shard in a process pool.
+
+    Returns:
+        Dict[str, Dict]: The result of `process_shard` per shard file path.
+    """
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            shard_path: pool.submit(process_shard, shard_path, submissions, num_assignment_cols, reset_columns, count_mode)
+            for shard_path, submissions in per_shard.items()
+        }
+        return {shard_path: future.result() for shard_path, future in futures.items()}
@@ -0,0 +1,176 @@
+"""
+Interactive shell that keeps a roster loaded between commands.
+
+`shell` loads the namelist once, builds the in-memory ID and name lookup of `query
+--from-file`, and then answers commands against that state, so each command costs only
+its own work, not interpreter startup, imports and a namelist parse:
+
+    query ID_OR_NAME       -- student details, matched like `query`
+    view [options]         -- the table, with the options of `view` (--where, --sort, ...)
+    filter EXPR            -- shorthand for `view --where EXPR`
+    process [options]      -- the `process` action against the shell's namelist
+    use NAMELIST           -- switch to another namelist (e.g. another course)
+    cache                  -- roster cache counters
+    reload                 -- reload the roster if it changed
+
+Rosters are held in a `RosterCache`: before every command the shell looks the current
+namelist up in the cache, which compares the roster's file stamp (size and modification
+time) with the one it loaded and reloads only if the namelist changed on disk, whether
+through `process` in the shell or any other writer. Switching between namelists with
+`use` keeps recently used rosters loaded, within the cache's memory budget.
+"""
+import cmd
+import shlex
+from typing import Optional
+from .config import STORE_FORMATS
+from .reporting import Reporter, display_student_details
+from .roster_cache import RosterCache, RosterSnapshot
+
+
+class AttendanceShell(cmd.Cmd):
+    """Command loop over one roster held in memory."""
+
+    intro = "Attendance shell. Type 'help' for commands, 'exit' to leave."
+    prompt = "attendance> "
+
+    def __init__(self, namelist_file: str, store: str, reporter: Reporter, cache: Optional[RosterCache] = None):
+        super().__init__()
+        self.namelist_file = namelist_file
+        self.store = store
+        self.reporter = reporter
+        self.cache = cache if cache is not None else RosterCache()
+        self.snapshot: Optional[RosterSnapshot] = None
+
+    @property
+    def students(self):
+        return self.snapshot.students if self.snapshot is not None else []
+
+    @property
+    def num_assignment_cols(self) -> int:
+        return self.snapshot.num_assignment_cols if self.snapshot is not None else 0
+
+    def ensure_loaded(self) -> bool:
+        """Fetches the current roster from the cache (reloading it if it changed on disk). Returns True if one is loaded."""
+        previous = self.snapshot
+        self.snapshot = self.cache.get(self.namelist_file, self.store, self.reporter)
+        if self.snapshot is None:
+            self.reporter.error(f"No student data loaded from '{self.namelist_file}'.")
+            return False
+        if previous is not None and self.snapshot is not previous and self.snapshot.stamp != previous.stamp:
+            self.reporter.info(f"'{self.namelist_file}' changed on disk; reloaded.")
+        return True
+
+    def _parse(self, action: str, arg: str, extra: list = ()):
+        """Parses `arg` with the command-line parser of `action`; returns None on a usage error."""
+        from .main import build_parser
+
+        try:
+            return build_parser().parse_args([action, self.namelist_file] + shlex.split(arg) + list(extra))
+        except ValueError as e: # Unbalanced quotes
+            self.reporter.error(str(e))
+        except SystemExit: # argparse already printed the usage error
+            pass
+        return None
+
+    def onecmd(self, line):
+        """Runs one command; an unexpected error is reported and ends only that command, not the shell."""
+        try:
+            return super().onecmd(line)
+        except Exception as e:
+            self.reporter.error(f"Command failed: {type(e).__name__}: {e}")
+            return False
+
+    def emptyline(self):
+        pass # Do not repeat the last command (which may be 'process')
+
+    def do_query(self, arg):
+        """query ID_OR_NAME -- show a student by exact ID, or every student whose name contains the text."""
+        identifier = " ".join(shlex.split(arg)) if arg.strip() else ""
+        if not identifier:
+            self.reporter.error("Usage: query ID_OR_NAME")
+            return
+        if not self.ensure_loaded():
+            return
+        matches = self.snapshot.lookup.resolve(identifier)
+        if not matches:
+            self.reporter.warning(f"No student found with ID or name matching '{identifier}'.")
+            return
+        if len(matches) > 1:
+            self.reporter.info(f"Found {len(matches)} students matching '{identifier}'. Displaying all:")
+        for student in matches:
+            display_student_details(student, self.num_assignment_cols, self.reporter)
+
+    def do_view(self, arg):
+        """view [--where EXPR] [--sort KEYS] [--limit K] [--page N] [--page-size M] -- show the table."""
+        from .main import display_roster_view
+
+        args = self._parse("view", arg)
+        if args is not None and self.ensure_loaded():
+            display_roster_view(self.students, self.num_assignment_cols, args, self.reporter)
+
+    def do_filter(self, arg):
+        """filter EXPR -- show the students matching a filter expression (same as view --where EXPR)."""
+        if not arg.strip():
+            self.reporter.error("Usage: filter EXPR")
+            return
+        self.do_view(f"--where {shlex.quote(arg.strip())}")
+
+    def do_process(self, arg):
+        """process [submissions_root_dir] [options] -- run 'process' on the shell's namelist (see 'process -h')."""
+        args = self._parse("process", arg, extra=["--store", self.store])
+        if args is not None:
+            args.func(args, self.reporter)
+
+    def do_use(self, arg):
+        """use NAMELIST [--store FORMAT] -- switch to another namelist (e.g. another course); rosters stay cached."""
+        try:
+            words = shlex.split(arg)
+        except ValueError as e:
+            self.reporter.error(str(e))
+            return
+        store = self.store
+        if len(words) == 3 and words[1] == "--store" and words[2] in STORE_FORMATS:
+            store = words[2]
+        elif len(words) != 1:
+            self.reporter.error(f"Usage: use NAMELIST [--store {{{','.join(STORE_FORMATS)}}}]")
+            return
+        previous = (self.namelist_file, self.store, self.snapshot)
+        self.namelist_file, self.store, self.snapshot = words[0], store, None
+        if self.ensure_loaded():
+            self.reporter.info(f"Using {len(self.students)} student(s) from '{self.namelist_file}'.")
+        else:
+            self.namelist_file, self.store, self.snapshot = previous
+
+    def do_cache(self, arg):
+        """cache -- show the roster cache's memory use and hit/miss/eviction counters."""
+        stats = self.cache.stats()
+        print(f"  Rosters cached: {stats['rosters']} ({stats['bytes'] / (1 << 20):.1f} of {stats['max_bytes'] / (1 << 20):.0f} MB)")
+        print(f"  Hits: {stats['hits']}  Misses: {stats['misses']} (stale: {stats['stale']})  Evictions: {stats['evictions']}")
+
+    def do_reload(self, arg):
+        """reload -- reload the roster from disk."""
+        if self.ensure_loaded():
+            self.reporter.info(f"Loaded {len(self.students)} student(s) from '{self.namelist_file}'.")
+
+    def do_exit(self, arg):
+        """exit -- leave the shell."""
+        return True
+
+    do_quit = do_exit
+
+    def do_EOF(self, arg):
+        """Ctrl-D -- leave the shell."""
+        print()
+        return True
+
+
+def run_shell(namelist_file: str, store: str, reporter: Reporter, cache_bytes: Optional[int] = None):
+    """Loads the roster and runs the interactive shell until 'exit' or end of input."""
+    shell = AttendanceShell(namelist_file, store, reporter, RosterCache(cache_bytes))
+    if not shell.ensure_loaded():
+        return
+    reporter.info(f"Loaded {len(shell.students)} student(s) from '{namelist_file}'.")
+    try:
+        shell.cmdloop()
+    except KeyboardInterrupt:
+        print()
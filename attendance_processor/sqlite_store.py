@@ -0,0 +1,384 @@
+"""
+SQLite storage backend for the roster, using only the standard library `sqlite3` module.
+
+The store keeps three indexed tables:
+    students     -- one row per student, in namelist order, with the computed Total and Rate.
+    assignments  -- one row per assignment mark column, with the folder it was filled from.
+    submissions  -- one row per non-zero mark cell, with the submission file that produced it.
+
+Marks that are 0 are not stored. Saving runs in a single transaction and writes each
+assignment's marks with `executemany`.
+
+`view` filters, sorts and limits in SQL (see `select_sqlite_students`): the filter
+expression is type-checked by `view_filter` and translated to a WHERE clause over a
+roster view with the columns id, name, total, rate and A1..An, where total and rate are
+recomputed from the submissions table as `view` recomputes them for a loaded roster.
+Division and modulo are not translated (SQLite returns NULL where Python raises on a
+division by zero, and its % differs for negative operands), nor is equality between text
+and a number (SQLite would convert the number to text); such filters are evaluated in Python.
+"""
+import ast
+import os
+import sqlite3
+from contextlib import closing
+from typing import List, Dict, Tuple, Optional
+from . import view_filter
+from .reporting import Reporter
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS students (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    total INTEGER NOT NULL DEFAULT 0,
+    rate REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_students_position ON students(position);
+CREATE INDEX IF NOT EXISTS idx_students_name ON students(name COLLATE NOCASE);
+
+CREATE TABLE IF NOT EXISTS assignments (
+    position INTEGER PRIMARY KEY,
+    folder TEXT
+);
+
+CREATE TABLE IF NOT EXISTS submissions (
+    student_id TEXT NOT NULL REFERENCES students(id) ON DELETE CASCADE,
+    assignment_position INTEGER NOT NULL REFERENCES assignments(position),
+    mark INTEGER NOT NULL,
+    source_path TEXT,
+    PRIMARY KEY (student_id, assignment_position)
+);
+CREATE INDEX IF NOT EXISTS idx_submissions_assignment ON submissions(assignment_position);
+"""
+
+
+def _connect(db_path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def _rows_to_students(conn: sqlite3.Connection, student_rows: List[Tuple], num_assignment_cols: int) -> List[Dict]:
+    """Builds student dictionaries for `student_rows` and fills their marks from the submissions table."""
+    students = []
+    by_id = {}
+    for student_id, name, total, rate in student_rows:
+        student = {"id": student_id, "name": name, "marks": [0] * num_assignment_cols, "total": total, "rate": rate}
+        students.append(student)
+        by_id[student_id] = student
+
+    if len(by_id) == 1:
+        mark_rows = conn.execute(
+            "SELECT student_id, assignment_position, mark FROM submissions WHERE student_id = ?",
+            (next(iter(by_id)),)
+        )
+    else:
+        mark_rows = conn.execute("SELECT student_id, assignment_position, mark FROM submissions")
+    for student_id, position, mark in mark_rows:
+        student = by_id.get(student_id)
+        if student is not None and 0 <= position < num_assignment_cols:
+            student['marks'][position] = mark
+    return students
+
+
+def _count_assignment_columns(conn: sqlite3.Connection) -> int:
+    (max_position,) = conn.execute("SELECT MAX(position) FROM assignments").fetchone()
+    return max_position + 1 if max_position is not None else 0
+
+
+def load_sqlite_data(db_path: str, reporter: Reporter) -> Tuple[List[Dict], int]:
+    """
+    Loads all student data from a SQLite store, in namelist order.
+
+    Args:
+        db_path (str): Path to the SQLite database file.
+        reporter (Reporter): Reporter instance for logging.
+
+    Returns:
+        Tuple[List[Dict], int]: A list of student data dictionaries and the number of
+                                assignment mark columns. Returns an empty list and 0 on errors.
+    """
+    if not os.path.exists(db_path):
+        reporter.error(f"SQLite store not found: {db_path}")
+        return [], 0
+
+    try:
+        with closing(_connect(db_path)) as conn:
+            num_assignment_cols = _count_assignment_columns(conn)
+            student_rows = conn.execute("SELECT id, name, total, rate FROM students ORDER BY position").fetchall()
+            students = _rows_to_students(conn, student_rows, num_assignment_cols)
+    except sqlite3.Error as e:
+        reporter.error(f"Failed to read SQLite store '{db_path}': {e}")
+        return [], 0
+
+    reporter.info(f"Namelist structure: Expecting {num_assignment_cols} assignment mark column(s) (SQLite store).")
+    if not students:
+        reporter.warning(f"No student data could be loaded from '{db_path}'.")
+    return students, num_assignment_cols
+
+
+def load_assignment_names(db_path: str, reporter: Reporter) -> Optional[List[str]]:
+    """
+    Returns the folder recorded for each assignment column, or None if the store does not
+    exist or any column has no folder recorded.
+
+    Args:
+        db_path (str): Path to the SQLite database file.
+        reporter (Reporter): Reporter instance for logging.
+    """
+    if not os.path.exists(db_path):
+        return None
+    try:
+        with closing(_connect(db_path)) as conn:
+            rows = conn.execute("SELECT position, folder FROM assignments ORDER BY position").fetchall()
+    except sqlite3.Error as e:
+        reporter.warning(f"Could not read assignment names from SQLite store '{db_path}': {e}")
+        return None
+    if not rows or any(folder is None for _, folder in rows) or rows[-1][0] != len(rows) - 1:
+        return None
+    return [folder for _, folder in rows]
+
+
+def query_sqlite_students(db_path: str, identifier: str, reporter: Reporter) -> Tuple[List[Dict], int]:
+    """
+    Looks up students in a SQLite store, evaluating the match in SQL: an exact
+    (case-insensitive) ID match is returned on its own; otherwise all students whose
+    name contains `identifier` (case-insensitive) are returned.
+
+    Args:
+        db_path (str): Path to the SQLite database file.
+        identifier (str): Student ID or name fragment.
+        reporter (Reporter): Reporter instance for logging.
+
+    Returns:
+        Tuple[List[Dict], int]: The matching student data dictionaries and the number of
+                                assignment mark columns.
+    """
+    if not os.path.exists(db_path):
+        reporter.error(f"SQLite store not found: {db_path}")
+        return [], 0
+
+    term = identifier.lower()
+    try:
+        with closing(_connect(db_path)) as conn:
+            num_assignment_cols = _count_assignment_columns(conn)
+            student_rows = conn.execute(
+                "SELECT id, name, total, rate FROM students WHERE lower(id) = ? ORDER BY position LIMIT 1", (term,)
+            ).fetchall()
+            if not student_rows:
+                student_rows = conn.execute(
+                    "SELECT id, name, total, rate FROM students WHERE instr(lower(name), ?) > 0 ORDER BY position", (term,)
+                ).fetchall()
+            students = _rows_to_students(conn, student_rows, num_assignment_cols)
+    except sqlite3.Error as e:
+        reporter.error(f"Failed to query SQLite store '{db_path}': {e}")
+        return [], 0
+    return students, num_assignment_cols
+
+
+_SQL_ARITHMETIC = {ast.Add: "+", ast.Sub: "-", ast.Mult: "*"}
+_SQL_COMPARISONS = {ast.Eq: "=", ast.NotEq: "<>", ast.Lt: "<", ast.LtE: "<=", ast.Gt: ">", ast.GtE: ">="}
+
+
+class _NotTranslatable(Exception):
+    """Raised for a filter element that has no SQL translation with the same result."""
+
+
+def _sql_truth(node: ast.AST, num_assignment_cols: int, params: Dict) -> str:
+    """Translates `node` as a truth value: like Python, text is true when it is not empty."""
+    sql = _sql_expression(node, num_assignment_cols, params)
+    if view_filter.expression_type(node, num_assignment_cols) == view_filter.TEXT_TYPE:
+        return f"({sql} <> '')"
+    return sql
+
+
+def _sql_expression(node: ast.AST, num_assignment_cols: int, params: Dict) -> str:
+    """Translates a type-checked filter node to SQL over the roster view, binding constants into `params`."""
+    if isinstance(node, ast.BoolOp):
+        joiner = " AND " if isinstance(node.op, ast.And) else " OR "
+        return "(" + joiner.join(_sql_truth(value, num_assignment_cols, params) for value in node.values) + ")"
+
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+        return f"(NOT {_sql_truth(node.operand, num_assignment_cols, params)})"
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+        return f"(-{_sql_expression(node.operand, num_assignment_cols, params)})"
+
+    if isinstance(node, ast.BinOp) and type(node.op) in _SQL_ARITHMETIC:
+        left, right = _sql_expression(node.left, num_assignment_cols, params), _sql_expression(node.right, num_assignment_cols, params)
+        if view_filter.expression_type(node, num_assignment_cols) == view_filter.TEXT_TYPE:
+            return f"({left} || {right})"
+        return f"({left} {_SQL_ARITHMETIC[type(node.op)]} {right})"
+
+    if isinstance(node, ast.Compare):
+        # a < b < c is (a < b) and (b < c); b is bound once and referenced twice
+        operands = [node.left] + node.comparators
+        types = [view_filter.expression_type(operand, num_assignment_cols) for operand in operands]
+        sqls = [_sql_expression(operand, num_assignment_cols, params) for operand in operands]
+        terms = []
+        for i, op in enumerate(node.ops):
+            left, right = sqls[i], sqls[i + 1]
+            if isinstance(op, ast.In):
+                terms.append(f"(instr({right}, {left}) > 0)")
+            elif isinstance(op, ast.NotIn):
+                terms.append(f"(instr({right}, {left}) = 0)")
+            elif type(op) in _SQL_COMPARISONS and (types[i] == view_filter.TEXT_TYPE) == (types[i + 1] == view_filter.TEXT_TYPE):
+                terms.append(f"({left} {_SQL_COMPARISONS[type(op)]} {right})")
+            else:
+                raise _NotTranslatable(ast.unparse(node))
+        return "(" + " AND ".join(terms) + ")"
+
+    if isinstance(node, ast.Name):
+        return f'"{view_filter.resolve_column(node.id, num_assignment_cols)}"'
+
+    if isinstance(node, ast.Constant):
+        if isinstance(node.value, int) and not -(1 << 63) <= node.value < (1 << 63):
+            raise _NotTranslatable(ast.unparse(node)) # Python integers are unbounded, SQLite's are 64-bit
+        name = f"p{len(params)}"
+        params[name] = node.value
+        return f":{name}"
+
+    raise _NotTranslatable(ast.unparse(node))
+
+
+def _roster_view_sql(num_assignment_cols: int) -> str:
+    """Returns a SELECT of every student's id, name, position, total, rate and A1..An marks."""
+    pivots = "".join(
+        f", MAX(CASE WHEN assignment_position = {i} THEN mark END) AS a{i}" for i in range(num_assignment_cols)
+    )
+    marks = "".join(f', COALESCE(m.a{i}, 0) AS "A{i+1}"' for i in range(num_assignment_cols))
+    rate = f"COALESCE(m.total, 0) * 1.0 / {num_assignment_cols}" if num_assignment_cols else "0.0"
+    return (
+        f"SELECT s.id AS id, s.name AS name, s.position AS position, COALESCE(m.total, 0) AS total, {rate} AS rate{marks} "
+        f"FROM students s LEFT JOIN (SELECT student_id, SUM(mark > 0) AS total{pivots} FROM submissions "
+        f"WHERE assignment_position < {num_assignment_cols} GROUP BY student_id) m ON m.student_id = s.id"
+    )
+
+
+def select_sqlite_students(db_path: str, where: Optional[str], sort: Optional[str], limit: Optional[int],
+                           reporter: Reporter) -> Optional[Tuple[List[Dict], int, int]]:
+    """
+    Selects the rows for `view` in SQL: filtered by `where`, ordered by `sort` (ties and
+    unsorted rows in namelist order) and cut to `limit`, like `view_filter.select_students`
+    on a loaded roster with recomputed totals and rates.
+
+    Args:
+        db_path (str): Path to the SQLite database file.
+        where (Optional[str]): Filter expression (see `view_filter`).
+        sort (Optional[str]): Sort specification (see `view_filter.parse_sort_spec`).
+        limit (Optional[int]): Maximum number of rows.
+        reporter (Reporter): Reporter instance for logging.
+
+    Returns:
+        Optional[Tuple[List[Dict], int, int]]: The selected student data dictionaries, the
+            number of assignment mark columns and the number of students in the store (an
+            empty list and zeros on errors), or None if the filter uses an element that is
+            not translated to SQL; the caller then filters the loaded roster in Python.
+
+    Raises:
+        ValueError: If the filter expression or sort specification is invalid.
+    """
+    if limit is not None and limit < 0:
+        raise ValueError("the limit must not be negative")
+    if not os.path.exists(db_path):
+        reporter.error(f"SQLite store not found: {db_path}")
+        return [], 0, 0
+
+    try:
+        with closing(_connect(db_path)) as conn:
+            num_assignment_cols = _count_assignment_columns(conn)
+            params = {}
+            query = f"SELECT * FROM ({_roster_view_sql(num_assignment_cols)})"
+            if where:
+                tree = view_filter.parse_filter(where)
+                view_filter.expression_type(tree, num_assignment_cols)
+                try:
+                    query += f" WHERE {_sql_truth(tree, num_assignment_cols, params)}"
+                except _NotTranslatable as e:
+                    reporter.info(f"Filter element '{e}' is evaluated in Python, not in SQL.")
+                    return None
+            order = [f'"{column}"' + (" DESC" if descending else "")
+                     for column, descending in (view_filter.parse_sort_spec(sort, num_assignment_cols) if sort else [])]
+            query += " ORDER BY " + ", ".join(order + ["position"])
+            if limit is not None:
+                query += " LIMIT :limit"
+                params["limit"] = limit
+
+            students = [
+                {"id": row[0], "name": row[1], "marks": list(row[5:]), "total": row[3], "rate": row[4]}
+                for row in conn.execute(query, params)
+            ]
+            (roster_size,) = conn.execute("SELECT COUNT(*) FROM students").fetchone()
+    except sqlite3.Error as e:
+        reporter.error(f"Failed to query SQLite store '{db_path}': {e}")
+        return [], 0, 0
+    reporter.info(f"Selected {len(students)} of {roster_size} student(s) in SQL.")
+    return students, num_assignment_cols, roster_size
+
+
+def save_sqlite_data(db_path: str, students: List[Dict], reporter: Reporter, num_assignment_marks_to_write: int,
+                     assignment_names: Optional[List[str]] = None,
+                     submission_sources: Optional[Dict[Tuple[str, int], str]] = None) -> bool:
+    """
+    Saves the roster to a SQLite store in one transaction, creating the store if needed.
+    Students no longer in the roster are removed; marks are upserted per assignment with `executemany`.
+
+    Args:
+        db_path (str): Path to the SQLite database file.
+        students (List[Dict]): List of student data dictionaries.
+        reporter (Reporter): Reporter instance for logging.
+        num_assignment_marks_to_write (int): The number of assignment mark columns to store.
+        assignment_names (Optional[List[str]]): Folder names of the assignment columns, by position.
+        submission_sources (Optional[Dict[Tuple[str, int], str]]): Submission file path that produced
+            the mark of (student ID, assignment index), for marks recorded in this run.
+
+    Returns:
+        bool: True if the transaction was committed.
+    """
+    submission_sources = submission_sources or {}
+    assignment_names = assignment_names or []
+    try:
+        with closing(_connect(db_path)) as conn:
+            with conn: # One transaction: committed on success, rolled back on error
+                conn.executemany(
+                    "INSERT INTO students (id, name, position, total, rate) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT(id) DO UPDATE SET name = excluded.name, position = excluded.position, "
+                    "total = excluded.total, rate = excluded.rate",
+                    ((s['id'], s['name'], position, s['total'], s['rate']) for position, s in enumerate(students))
+                )
+                conn.execute("CREATE TEMP TABLE IF NOT EXISTS current_ids (id TEXT PRIMARY KEY)")
+                conn.execute("DELETE FROM current_ids")
+                conn.executemany("INSERT OR IGNORE INTO current_ids (id) VALUES (?)", ((s['id'],) for s in students))
+                conn.execute("DELETE FROM students WHERE id NOT IN (SELECT id FROM current_ids)")
+
+                conn.executemany(
+                    "INSERT INTO assignments (position, folder) VALUES (?, ?) "
+                    "ON CONFLICT(position) DO UPDATE SET folder = COALESCE(excluded.folder, assignments.folder)",
+                    ((i, assignment_names[i] if i < len(assignment_names) else None) for i in range(num_assignment_marks_to_write))
+                )
+                conn.execute("DELETE FROM submissions WHERE assignment_position >= ?", (num_assignment_marks_to_write,))
+                conn.execute("DELETE FROM assignments WHERE position >= ?", (num_assignment_marks_to_write,))
+
+                for position in range(num_assignment_marks_to_write):
+                    marked = []
+                    unmarked = []
+                    for s in students:
+                        mark = s['marks'][position] if position < len(s['marks']) else 0
+                        if mark:
+                            marked.append((s['id'], position, mark, submission_sources.get((s['id'], position))))
+                        else:
+                            unmarked.append((s['id'], position))
+                    conn.executemany(
+                        "INSERT INTO submissions (student_id, assignment_position, mark, source_path) VALUES (?, ?, ?, ?) "
+                        "ON CONFLICT(student_id, assignment_position) DO UPDATE SET mark = excluded.mark, "
+                        "source_path = COALESCE(excluded.source_path, submissions.source_path)",
+                        marked
+                    )
+                    conn.executemany(
+                        "DELETE FROM submissions WHERE student_id = ? AND assignment_position = ?", unmarked
+                    )
+        reporter.info(f"Successfully saved student data to SQLite store {db_path}")
+    except sqlite3.Error as e:
+        reporter.error(f"Failed to save student data to SQLite store '{db_path}': {e}")
+        return False
+    return True
@@ -0,0 +1,298 @@
+"""
+Multi-term columnar archive of finished namelists.
+
+An archive holds any number of (term, course) blocks in one binary file. Student IDs
+are dictionary-encoded once for the whole archive, and each block stores its roster
+as an array of dictionary codes plus one packed bitmap per session (bit i is set if
+the block's i-th student submitted). Aggregates then reduce to popcounts and bit walks
+over the bitmaps, with no text parsing.
+
+Layout (little-endian):
+    Header:      magic 'APTA', version (uint16), number of IDs (uint32), number of blocks (uint32)
+    Dictionary:  per ID: id length (uint16), name length (uint16), id (UTF-8), name (UTF-8)
+    Per block:   term length (uint16), course length (uint16), number of students (uint32),
+                 number of sessions (uint32), term (UTF-8), course (UTF-8),
+                 student codes (uint32 each), then one bitmap of ceil(students / 8) bytes
+                 per session
+"""
+import os
+import struct
+import sys
+from array import array
+from typing import List, Dict, Optional
+from .reporting import Reporter
+
+TERM_ARCHIVE_MAGIC = b'APTA'
+TERM_ARCHIVE_VERSION = 1
+
+_HEADER = struct.Struct('<4sHII')
+_DICTIONARY_ENTRY = struct.Struct('<HH')
+_BLOCK_HEADER = struct.Struct('<HHII')
+
+
+def _bitmap_size(num_students: int) -> int:
+    return (num_students + 7) // 8
+
+
+def _set_bits(bitmap: int):
+    """Yields the positions of the set bits of `bitmap`, lowest first."""
+    while bitmap:
+        lowest = bitmap & -bitmap
+        yield lowest.bit_length() - 1
+        bitmap ^= lowest
+
+
+def new_archive() -> Dict:
+    """Returns an empty archive."""
+    return {"ids": [], "names": [], "blocks": []}
+
+
+def load_archive(archive_path: str, reporter: Reporter) -> Optional[Dict]:
+    """
+    Loads an archive file.
+
+    Args:
+        archive_path (str): Path to the archive file.
+        reporter (Reporter): Reporter instance for logging.
+
+    Returns:
+        Optional[Dict]: The archive ('ids' and 'names' by dictionary code, and 'blocks', each
+                        with 'term', 'course', 'codes' and 'sessions' bitmaps as ints), or
+                        None if it does not exist or cannot be read.
+    """
+    if not os.path.exists(archive_path):
+        reporter.error(f"Archive not found: {archive_path}")
+        return None
+    try:
+        with open(archive_path, 'rb') as f:
+            data = memoryview(f.read())
+        magic, version, num_ids, num_blocks = _HEADER.unpack_from(data, 0)
+        if magic != TERM_ARCHIVE_MAGIC or version != TERM_ARCHIVE_VERSION:
+            raise ValueError("not an attendance archive (bad magic or version)")
+
+        archive = new_archive()
+        offset = _HEADER.size
+        for _ in range(num_ids):
+            id_length, name_length = _DICTIONARY_ENTRY.unpack_from(data, offset)
+            offset += _DICTIONARY_ENTRY.size
+            archive['ids'].append(bytes(data[offset:offset + id_length]).decode('utf-8'))
+            offset += id_length
+            archive['names'].append(bytes(data[offset:offset + name_length]).decode('utf-8'))
+            offset += name_length
+
+        for _ in range(num_blocks):
+            term_length, course_length, num_students, num_sessions = _BLOCK_HEADER.unpack_from(data, offset)
+            offset += _BLOCK_HEADER.size
+            term = bytes(data[offset:offset + term_length]).decode('utf-8')
+            offset += term_length
+            course = bytes(data[offset:offset + course_length]).decode('utf-8')
+            offset += course_length
+            codes = array('I')
+            codes.frombytes(data[offset:offset + num_students * codes.itemsize])
+            if sys.byteorder != 'little':
+                codes.byteswap()
+            offset += num_students * codes.itemsize
+            size = _bitmap_size(num_students)
+            sessions = []
+            for _ in range(num_sessions):
+                sessions.append(int.from_bytes(data[offset:offset + size], 'little'))
+                offset += size
+            archive['blocks'].append({"term": term, "course": course, "codes": codes, "sessions": sessions})
+    except (OSError, ValueError, struct.error) as e:
+        reporter.error(f"Failed to read archive '{archive_path}': {e}")
+        return None
+    return archive
+
+
+def save_archive(archive_path: str, archive: Dict, reporter: Reporter) -> bool:
+    """
+    Writes an archive file, replacing it atomically.
+
+    Returns:
+        bool: True if the archive was written.
+    """
+    chunks = [_HEADER.pack(TERM_ARCHIVE_MAGIC, TERM_ARCHIVE_VERSION, len(archive['ids']), len(archive['blocks']))]
+    for student_id, name in zip(archive['ids'], archive['names']):
+        id_bytes, name_bytes = student_id.encode('utf-8'), name.encode('utf-8')
+        chunks.append(_DICTIONARY_ENTRY.pack(len(id_bytes), len(name_bytes)))
+        chunks.append(id_bytes + name_bytes)
+    for block in archive['blocks']:
+        term_bytes, course_bytes = block['term'].encode('utf-8'), block['course'].encode('utf-8')
+        chunks.append(_BLOCK_HEADER.pack(len(term_bytes), len(course_bytes), len(block['codes']), len(block['sessions'])))
+        chunks.append(term_bytes + course_bytes)
+        codes = array('I', block['codes'])
+        if sys.byteorder != 'little':
+            codes.byteswap()
+        chunks.append(codes.tobytes())
+        size = _bitmap_size(len(block['codes']))
+        chunks.extend(bitmap.to_bytes(size, 'little') for bitmap in block['sessions'])
+
+    temp_path = archive_path + '.tmp'
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(b''.join(chunks))
+        os.replace(temp_path, archive_path)
+    except OSError as e:
+        reporter.error(f"Failed to write archive '{archive_path}': {e}")
+        return False
+    reporter.info(f"Saved archive of {len(archive['blocks'])} term/course block(s) and {len(archive['ids'])} student(s) to {archive_path}")
+    return True
+
+
+def roster_bitmaps(students: List[Dict], num_assignment_cols: int) -> List[int]:
+    """Returns one bitmap per mark column, with bit i set if the i-th student's mark is above 0."""
+    bitmaps = [bytearray(_bitmap_size(len(students))) for _ in range(num_assignment_cols)]
+    for position, student in enumerate(students):
+        byte, bit = position >> 3, 1 << (position & 7)
+        for column, mark in enumerate(student['marks'][:num_assignment_cols]):
+            if mark > 0:
+                bitmaps[column][byte] |= bit
+    return [int.from_bytes(bitmap, 'little') for bitmap in bitmaps]
+
+
+def missing_positions(enrolled: int, submitted: int):
+    """Yields the positions of enrolled students who did not submit (the set bits of enrolled & ~submitted)."""
+    return _set_bits(enrolled & ~submitted)
+
+
+def ingest_roster(archive: Dict, term: str, course: str, students: List[Dict], num_assignment_cols: int) -> bool:
+    """
+    Adds a finished roster to the archive as the block of (`term`, `course`), replacing an
+    existing block of the same term and course. A session counts as attended for any mark above 0.
+
+    Returns:
+        bool: True if an existing block was replaced.
+    """
+    code_of = {student_id: code for code, student_id in enumerate(archive['ids'])}
+    codes = array('I')
+    for student in students:
+        code = code_of.get(student['id'])
+        if code is None:
+            code = code_of[student['id']] = len(archive['ids'])
+            archive['ids'].append(student['id'])
+            archive['names'].append(student['name'])
+        else:
+            archive['names'][code] = student['name'] # Keep the most recently ingested name
+        codes.append(code)
+
+    block = {"term": term, "course": course, "codes": codes, "sessions": roster_bitmaps(students, num_assignment_cols)}
+    for i, existing in enumerate(archive['blocks']):
+        if existing['term'] == term and existing['course'] == course:
+            archive['blocks'][i] = block
+            return True
+    archive['blocks'].append(block)
+    return False
+
+
+def select_blocks(archive: Dict, terms: Optional[List[str]] = None, courses: Optional[List[str]] = None) -> List[Dict]:
+    """Returns the blocks of the given terms and courses (all if not given)."""
+    return [
+        block for block in archive['blocks']
+        if (not terms or block['term'] in terms) and (not courses or block['course'] in courses)
+    ]
+
+
+def student_attendance(archive: Dict, blocks: List[Dict]) -> List[Dict]:
+    """
+    Aggregates attendance per student over `blocks`.
+
+    Returns:
+        List[Dict]: Per student (in dictionary order) with 'id', 'name', 'terms' (number of
+                    blocks enrolled in), 'attended', 'sessions' and 'rate'.
+    """
+    attended = {}
+    sessions = {}
+    enrolled = {}
+    for block in blocks:
+        codes = block['codes']
+        for code in codes:
+            sessions[code] = sessions.get(code, 0) + len(block['sessions'])
+            enrolled[code] = enrolled.get(code, 0) + 1
+        for bitmap in block['sessions']:
+            for position in _set_bits(bitmap):
+                code = codes[position]
+                attended[code] = attended.get(code, 0) + 1
+    return [
+        {
+            "id": archive['ids'][code],
+            "name": archive['names'][code],
+            "terms": enrolled[code],
+            "attended": attended.get(code, 0),
+            "sessions": sessions[code],
+            "rate": attended.get(code, 0) / sessions[code] if sessions[code] else 0.0,
+        }
+        for code in sorted(sessions)
+    ]
+
+
+def block_attendance_counts(block: Dict) -> List[int]:
+    """Returns the number of sessions attended by each student of a block, in block order."""
+    counts = [0] * len(block['codes'])
+    for bitmap in block['sessions']:
+        for position in _set_bits(bitmap):
+            counts[position] += 1
+    return counts
+
+
+def session_averages(blocks: List[Dict]) -> List[Dict]:
+    """
+    Aggregates attendance per session over `blocks`, using a popcount per session bitmap.
+
+    Returns:
+        List[Dict]: Per block and session: 'term', 'course', 'session' (1-based), 'attended',
+                    'enrolled' and 'rate'.
+    """
+    averages = []
+    for block in blocks:
+        enrolled = len(block['codes'])
+        for i, bitmap in enumerate(block['sessions']):
+            attended = bin(bitmap).count('1')
+            averages.append({
+                "term": block['term'],
+                "course": block['course'],
+                "session": i + 1,
+                "attended": attended,
+                "enrolled": enrolled,
+                "rate": attended / enrolled if enrolled else 0.0,
+            })
+    return averages
+
+
+def session_number_averages(blocks: List[Dict]) -> List[Dict]:
+    """
+    Aggregates attendance per session number across all `blocks` (e.g. "week 3 over five years").
+
+    Returns:
+        List[Dict]: Per session number (1-based): 'session', 'blocks', 'attended', 'enrolled' and 'rate'.
+    """
+    combined = {}
+    for average in session_averages(blocks):
+        entry = combined.setdefault(average['session'], {"session": average['session'], "blocks": 0, "attended": 0, "enrolled": 0})
+        entry['blocks'] += 1
+        entry['attended'] += average['attended']
+        entry['enrolled'] += average['enrolled']
+    for entry in combined.values():
+        entry['rate'] = entry['attended'] / entry['enrolled'] if entry['enrolled'] else 0.0
+    return [combined[session] for session in sorted(combined)]
+
+
+def term_summaries(blocks: List[Dict]) -> List[Dict]:
+    """
+    Summarizes each block.
+
+    Returns:
+        List[Dict]: Per block: 'term', 'course', 'students', 'sessions', 'attended' and 'rate'.
+    """
+    summaries = []
+    for block in blocks:
+        attended = sum(bin(bitmap).count('1') for bitmap in block['sessions'])
+        possible = len(block['codes']) * len(block['sessions'])
+        summaries.append({
+            "term": block['term'],
+            "course": block['course'],
+            "students": len(block['codes']),
+            "sessions": len(block['sessions']),
+            "attended": attended,
+            "rate": attended / possible if possible else 0.0,
+        })
+    return summaries
@@ -0,0 +1,414 @@
+"""
+Reading and writing of TSV namelist files.
+
+The helpers shared by every module that touches namelist text: transparent compression
+('.gz', '.bz2', '.xz'), detection of the optional header row, streaming parsing of
+student rows, and atomic writes. This module depends only on `config` and `reporting`,
+so storage backends (`sharding`, `merging`, ...) can import it at module level without
+importing `file_operations`, which dispatches to those backends.
+"""
+import bz2
+import gzip
+import lzma
+import os
+import shutil
+import tempfile
+from typing import List, Dict, Tuple, Optional, Iterable, Iterator
+from .config import SAVE_BUFFER_SIZE, NAMELIST_HEADER_LEADING, NAMELIST_HEADER_TRAILING
+from .reporting import Reporter
+
+_COMPRESSED_OPENERS = {'.gz': gzip.open, '.bz2': bz2.open, '.xz': lzma.open}
+
+def get_compression_suffix(filepath: str) -> Optional[str]:
+    """Returns the compression suffix ('.gz', '.bz2' or '.xz') of a path, or None if it is not compressed."""
+    suffix = os.path.splitext(filepath)[1].lower()
+    return suffix if suffix in _COMPRESSED_OPENERS else None
+
+def open_namelist_file(filepath: str, mode: str = 'r'):
+    """
+    Opens a namelist (or manifest) file in text mode, transparently decompressing or
+    compressing it when its name ends in '.gz', '.bz2' or '.xz'.
+
+    Args:
+        filepath (str): Path of the file.
+        mode (str): 'r', 'w' or 'a'.
+
+    Returns:
+        A text file object reading or writing UTF-8.
+    """
+    compression = get_compression_suffix(filepath)
+    if compression is None:
+        return open(filepath, mode, encoding='utf-8')
+    return _COMPRESSED_OPENERS[compression](filepath, mode + 't', encoding='utf-8')
+
+def iter_namelist_lines(filepath: str) -> Iterator[str]:
+    """Yields the lines of a (possibly compressed) namelist file one at a time."""
+    with open_namelist_file(filepath) as f:
+        for line in f:
+            yield line
+
+def _open_existing_content(filepath: str, compression: Optional[str]):
+    """Opens the (decompressed) content of an existing file for binary reading, or returns None."""
+    if not os.path.isfile(filepath):
+        return None
+    try:
+        return open(filepath, 'rb') if compression is None else _COMPRESSED_OPENERS[compression](filepath, 'rb')
+    except OSError:
+        return None
+
+def _open_compressed_writer(raw_file, compression: Optional[str]):
+    """Wraps a binary file object in a compressor for `compression` (None: no compression)."""
+    if compression == '.gz':
+        return gzip.GzipFile(fileobj=raw_file, mode='wb', mtime=0) # mtime=0 keeps output reproducible
+    if compression == '.bz2':
+        return bz2.BZ2File(raw_file, 'wb')
+    if compression == '.xz':
+        return lzma.LZMAFile(raw_file, 'wb')
+    return raw_file
+
+def is_header_row(parts: List[str]) -> bool:
+    """Checks whether the split fields of a namelist line form the optional header row."""
+    return tuple(parts[:len(NAMELIST_HEADER_LEADING)]) == NAMELIST_HEADER_LEADING
+
+def read_namelist_header(filepath: str, reporter: Reporter) -> Optional[List[str]]:
+    """
+    Reads the optional header row of a namelist file, which names the assignment folder
+    recorded in each mark column: `ID<tab>Name<tab><folder>...<tab>Total<tab>Rate`.
+
+    Args:
+        filepath (str): Path to the namelist.txt file.
+        reporter (Reporter): Reporter instance for logging.
+
+    Returns:
+        Optional[List[str]]: The assignment folder names in column order, or None if the
+                             file has no header row (or cannot be read).
+    """
+    if not os.path.exists(filepath):
+        return None
+    try:
+        with open_namelist_file(filepath) as f:
+            for line_content in f:
+                line_content = line_content.strip()
+                if not line_content: continue
+                parts = line_content.split('\t')
+                if not is_header_row(parts):
+                    return None
+                names = parts[len(NAMELIST_HEADER_LEADING):]
+                if tuple(names[-len(NAMELIST_HEADER_TRAILING):]) == NAMELIST_HEADER_TRAILING:
+                    names = names[:-len(NAMELIST_HEADER_TRAILING)]
+                return names
+    except Exception as e:
+        reporter.warning(f"Could not read header row of '{filepath}': {e}")
+    return None
+
+def mark_field_count(parts: List[str]) -> int:
+    """Returns the number of assignment mark fields in the split fields of a student row."""
+    if len(parts) >= 4:
+        try:
+            float(parts[-1]) # Rate
+            int(parts[-2])   # Total
+            return len(parts) - 4
+        except ValueError:
+            pass
+    return len(parts) - 2
+
+def peek_mark_column_count(filepath: str, reporter: Reporter) -> Optional[int]:
+    """
+    Returns the number of assignment mark columns of a namelist from its first data line
+    only, without loading the file. Returns 0 if the file is missing or empty, and None
+    (after reporting the error) if it cannot be read or decoded.
+    """
+    if not os.path.exists(filepath):
+        return 0
+    try:
+        with open_namelist_file(filepath) as f:
+            for line_content in f:
+                parts = line_content.strip().split('\t')
+                if len(parts) < 2 or is_header_row(parts):
+                    continue
+                return mark_field_count(parts)
+    except (OSError, UnicodeDecodeError, EOFError, lzma.LZMAError) as e:
+        reporter.error(f"Could not read namelist file '{filepath}': {e}")
+        return None
+    return 0
+
+def iter_student_data(filepath: str, reporter: Reporter, structure: Optional[Dict] = None) -> Iterator[Dict]:
+    """
+    Streams the student records of a namelist file one at a time (see `load_student_data`
+    for the accepted line formats). Malformed lines are reported and skipped.
+
+    Args:
+        filepath (str): Path to the namelist.txt file (which must exist).
+        reporter (Reporter): Reporter instance for logging.
+        structure (Optional[Dict]): If given, receives 'saw_any_line' (whether the file had any
+                                    line) and 'num_assignment_cols' (the number of mark columns,
+                                    set once the first valid line has been read).
+
+    Yields:
+        Dict: Student data dictionaries, in file order.
+    """
+    structure = structure if structure is not None else {}
+    structure.setdefault('saw_any_line', False)
+    num_assignment_mark_columns_expected = -1
+    first_valid_line_processed = False
+    # Lines are streamed (through the decompressor for .gz/.bz2/.xz files), never read in full
+    for i, line_content in enumerate(iter_namelist_lines(filepath)):
+        structure['saw_any_line'] = True
+        line_content = line_content.strip()
+        if not line_content: continue
+
+        parts = line_content.split('\t')
+
+        if not first_valid_line_processed and is_header_row(parts):
+            continue # Header row naming the assignment columns
+
+        if len(parts) < 2:
+            reporter.warning(f"Skipping malformed line {i+1} in '{filepath}': Not enough parts for ID and Name. Content: '{line_content}'")
+            continue
+
+        student_id = parts[0]
+        name = parts[1]
+        
+        current_line_assignment_mark_strings = []
+        current_line_num_assignment_marks = 0
+        loaded_total = 0 # Default if not found or not in updated format
+        loaded_rate = 0.0 # Default
+
+        is_updated_format = False
+        # Check if the line format includes Total and Rate (previously updated file)
+        # Format: ID, Name, [AssignmentMarks...], Total, Rate. Minimum 4 parts.
+        if len(parts) >= 4:
+            try:
+                # Attempt to parse last two parts as Total (int) and Rate (float)
+                float(parts[-1])  # Potential Rate
+                int(parts[-2])    # Potential Total
+                is_updated_format = True
+            except ValueError:
+                is_updated_format = False # Does not match Total/Rate format
+
+        if is_updated_format:
+            # Format: ID, Name, [AssignmentMarks...], Total, Rate
+            current_line_assignment_mark_strings = parts[2:-2]
+            current_line_num_assignment_marks = len(current_line_assignment_mark_strings)
+            try:
+                loaded_total = int(parts[-2])
+                loaded_rate = float(parts[-1])
+            except ValueError: # Should be rare due to prior check but as safeguard
+                reporter.warning(f"Line {i+1} in '{filepath}': Error parsing pre-existing Total/Rate despite format detection. Using defaults. Content: '{line_content}'")
+                is_updated_format = False # Treat as original format if parsing Total/Rate fails
+                current_line_assignment_mark_strings = parts[2:] # Re-evaluate assignment marks
+                current_line_num_assignment_marks = len(current_line_assignment_mark_strings)
+                loaded_total = 0
+                loaded_rate = 0.0
+        else:
+            # Original format: ID, Name, [AssignmentMarks...] or just ID, Name
+            current_line_assignment_mark_strings = parts[2:]
+            current_line_num_assignment_marks = len(current_line_assignment_mark_strings)
+        
+        if not first_valid_line_processed:
+            num_assignment_mark_columns_expected = current_line_num_assignment_marks
+            structure['num_assignment_cols'] = num_assignment_mark_columns_expected
+            reporter.info(f"Namelist structure: Expecting {num_assignment_mark_columns_expected} assignment mark column(s).")
+            if is_updated_format and num_assignment_mark_columns_expected >= 0:
+                reporter.info("Detected 'Total' and 'Rate' columns; these values will be loaded.")
+            first_valid_line_processed = True
+        elif current_line_num_assignment_marks != num_assignment_mark_columns_expected:
+            reporter.warning(
+                f"Skipping line {i+1} in '{filepath}': Inconsistent number of assignment mark columns. "
+                f"Expected {num_assignment_mark_columns_expected}, found {current_line_num_assignment_marks}. Content: '{line_content}'"
+            )
+            continue
+        
+        try:
+            # Parse only the actual assignment mark strings
+            assignment_marks = [int(m_str) for m_str in current_line_assignment_mark_strings]
+        except ValueError:
+            reporter.warning(f"Skipping malformed line {i+1} in '{filepath}' due to non-integer value in assignment mark columns. Content: '{line_content}'")
+            continue
+        
+        final_assignment_marks = assignment_marks[:num_assignment_mark_columns_expected] + \
+                                 [0] * (num_assignment_mark_columns_expected - len(assignment_marks))
+
+        yield {
+            "id": student_id,
+            "name": name,
+            "marks": final_assignment_marks,
+            "total": loaded_total, # Store loaded total
+            "rate": loaded_rate    # Store loaded rate
+        }
+
+def load_student_data(filepath: str, reporter: Reporter) -> Tuple[List[Dict], int]:
+    """
+    Loads student data from the namelist file.
+    Each student is represented as a dictionary.
+    Determines the number of actual mark columns from the file,
+    correctly handling files previously updated with Total and Rate columns.
+    If Total and Rate are present, they are loaded.
+    An optional header row (see `read_namelist_header`) is skipped.
+
+    Args:
+        filepath (str): Path to the namelist.txt file.
+        reporter (Reporter): Reporter instance for logging.
+
+    Returns:
+        Tuple[List[Dict], int]: A list of student data dictionaries and
+                                the number of actual assignment mark columns found.
+                                Returns an empty list and 0 if errors occur.
+    """
+    if not os.path.exists(filepath):
+        reporter.error(f"Namelist file not found: {filepath}")
+        return [], 0
+
+    structure = {}
+    try:
+        students = list(iter_student_data(filepath, reporter, structure))
+        num_assignment_mark_columns_expected = structure.get('num_assignment_cols', -1)
+        first_valid_line_processed = num_assignment_mark_columns_expected != -1
+
+        if not structure['saw_any_line']:
+            reporter.warning(f"Namelist file '{filepath}' is empty.")
+            return [], 0
+
+        if not first_valid_line_processed:
+            reporter.error(f"Could not determine a consistent assignment mark column structure from '{filepath}'. All lines may be malformed.")
+            return [], 0
+        
+        if not students and first_valid_line_processed:
+             reporter.warning(f"No valid student data loaded from '{filepath}' after initial structure detection.")
+        elif not students:
+            reporter.warning(f"No student data could be loaded from '{filepath}'.")
+
+    except Exception as e:
+        reporter.error(f"An unexpected error occurred while reading or parsing namelist file '{filepath}': {e}")
+        return [], 0
+    
+    return students, num_assignment_mark_columns_expected if num_assignment_mark_columns_expected != -1 else 0
+
+def write_lines_atomically(filepath: str, lines: Iterable[str], reporter: Reporter) -> bool:
+    """
+    Writes text lines to `filepath` without ever leaving a partially written file behind.
+    The new content is first compared, line by line, with the existing file's content; if
+    they are identical, nothing is written and `filepath` (including its modification time)
+    is left untouched. Otherwise, from the first difference on, the lines go through a large
+    buffer into a temporary file in the same directory (after the unchanged prefix, copied
+    from the existing file), which is fsynced and then moved over `filepath` with `os.replace`.
+    Paths ending in '.gz', '.bz2' or '.xz' are written compressed; the comparison is made on
+    the decompressed content.
+
+    Args:
+        filepath (str): Path of the file to (re)write.
+        lines (Iterable[str]): Lines to write, each including its line terminator.
+        reporter (Reporter): Reporter instance for logging.
+
+    Returns:
+        bool: True if `filepath` was replaced, False if the content was unchanged.
+
+    Raises:
+        OSError: If the temporary file cannot be written or moved into place.
+    """
+    compression = get_compression_suffix(filepath)
+    lines = iter(lines)
+    matched = 0    # Bytes of the new content identical to the start of the existing content
+    pending = None # Encoded line that differs from the existing content, not written yet
+    existing = _open_existing_content(filepath, compression)
+    if existing is not None:
+        try:
+            with existing:
+                for line in lines:
+                    pending = line.encode('utf-8')
+                    if existing.read(len(pending)) != pending:
+                        break
+                    matched += len(pending)
+                    pending = None
+                else:
+                    if not existing.read(1):
+                        return False
+        except (OSError, EOFError, lzma.LZMAError):
+            pass # An unreadable existing file is simply replaced
+
+    directory = os.path.dirname(os.path.abspath(filepath))
+    fd, temp_path = tempfile.mkstemp(prefix='.' + os.path.basename(filepath) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb', buffering=SAVE_BUFFER_SIZE) as raw_file:
+            f = _open_compressed_writer(raw_file, compression)
+            if matched:
+                src = _open_existing_content(filepath, compression)
+                if src is None:
+                    raise OSError(f"'{filepath}' disappeared while it was being rewritten")
+                with src:
+                    remaining = matched
+                    while remaining:
+                        chunk = src.read(min(remaining, 1 << 20))
+                        if not chunk:
+                            raise OSError(f"'{filepath}' changed while it was being rewritten")
+                        f.write(chunk)
+                        remaining -= len(chunk)
+            if pending is not None:
+                f.write(pending)
+            for line in lines:
+                f.write(line.encode('utf-8'))
+            if f is not raw_file:
+                f.close() # Flushes the compressor; the underlying file stays open
+            raw_file.flush()
+            os.fsync(raw_file.fileno())
+
+        # mkstemp creates the file with mode 0600; keep the existing file's mode, or use the umask default
+        if os.path.exists(filepath):
+            shutil.copymode(filepath, temp_path)
+        else:
+            umask = os.umask(0)
+            os.umask(umask)
+            os.chmod(temp_path, 0o666 & ~umask)
+        os.replace(temp_path, filepath)
+        return True
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+def save_student_data(filepath: str, students: List[Dict], reporter: Reporter, num_assignment_marks_to_write: int,
+                      assignment_names: Optional[List[str]] = None) -> bool:
+    """
+    Saves the updated student data back to the namelist file, replacing it atomically.
+    Includes assignment marks, total submissions, and submission rate.
+    If the new content is identical to the file on disk, the file is not rewritten.
+
+    Args:
+        filepath (str): Path to the namelist.txt file.
+        students (List[Dict]): List of student data dictionaries.
+        reporter (Reporter): Reporter instance for logging.
+        num_assignment_marks_to_write (int): The number of individual assignment mark columns to write.
+                                       This should be the number of mark columns determined at load time.
+        assignment_names (Optional[List[str]]): If given, a header row naming the assignment folder of
+                                                each mark column is written first. Unnamed columns are
+                                                called A1, A2, ...
+
+    Returns:
+        bool: True if the file holds the data (written, or already identical), False on errors.
+    """
+    def format_lines():
+        if assignment_names is not None:
+            names = [assignment_names[i] if i < len(assignment_names) else f"A{i+1}" for i in range(num_assignment_marks_to_write)]
+            yield "\t".join(list(NAMELIST_HEADER_LEADING) + names + list(NAMELIST_HEADER_TRAILING)) + "\n"
+        for student in students:
+            line_parts = [student['id'], student['name']]
+
+            # Ensure student's marks list for output is exactly num_assignment_marks_to_write long
+            marks_for_output = student['marks'][:num_assignment_marks_to_write]
+            if len(marks_for_output) < num_assignment_marks_to_write:
+                marks_for_output.extend([0] * (num_assignment_marks_to_write - len(marks_for_output)))
+
+            line_parts.extend(str(m) for m in marks_for_output)
+            line_parts.append(str(student['total']))
+            line_parts.append(f"{student['rate']:.2f}") # Format rate to 2 decimal places
+            yield "\t".join(line_parts) + "\n"
+
+    try:
+        if write_lines_atomically(filepath, format_lines(), reporter):
+            reporter.info(f"Successfully saved updated student data to {filepath}")
+        else:
+            reporter.info(f"Student data unchanged; left {filepath} untouched.")
+    except Exception as e:
+        reporter.error(f"Failed to save student data to '{filepath}': {e}")
+        return False
+    return True
@@ -0,0 +1,172 @@
+"""
+On-disk cache of rendered `view` and `query` output.
+
+Rendering the fancy_grid table of a large roster costs far more than copying the
+finished text, and the same view is often asked for many times while the namelist does
+not change. Each rendered output is stored in `<namelist><VIEW_CACHE_SUFFIX>/` under a key
+hashing together:
+
+    the content digest of the roster's files  -- taken from the parsed-roster sidecar when
+                                                 its recorded size and mtime still match,
+                                                 so a hit does not read the namelist
+    the action and its render options         -- e.g. --where/--sort/--limit/--page, or the
+                                                 queried identifier
+    VIEW_CACHE_VERSION                        -- bumped when the rendering changes
+
+A repeated request is streamed straight from its entry without loading the roster. A
+rendering is stored only if it succeeded and the roster's files did not change while it
+was produced. Hits refresh an entry's modification time; entries older than
+`VIEW_CACHE_MAX_AGE_SECONDS` are dropped, and then the least recently used ones until the
+cache is within `VIEW_CACHE_MAX_BYTES`.
+"""
+import contextlib
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from typing import Dict, Callable, Optional, Tuple
+from . import file_operations
+from . import roster_sidecar
+from .config import VIEW_CACHE_SUFFIX, VIEW_CACHE_MAX_BYTES, VIEW_CACHE_MAX_AGE_SECONDS
+from .reporting import Reporter
+
+VIEW_CACHE_VERSION = 1
+
+# (cache directory, entry key, roster stamp the key was computed for)
+ViewCacheKey = Tuple[str, str, tuple]
+
+
+def get_view_cache_dir(namelist_path: str) -> str:
+    """Returns the directory of the rendered view cache belonging to a namelist file."""
+    return namelist_path + VIEW_CACHE_SUFFIX
+
+
+def _roster_digest(stamp: tuple) -> bytes:
+    digest = hashlib.blake2b(digest_size=16)
+    for path, _, _ in stamp:
+        recorded = roster_sidecar.read_recorded_digest(path)
+        digest.update(recorded if recorded is not None else roster_sidecar.compute_file_digest(path))
+    return digest.digest()
+
+
+def view_cache_key(namelist_file: str, store: str, action: str, options: Dict, reporter: Reporter) -> Optional[ViewCacheKey]:
+    """
+    Computes the cache key of a rendering of `action` with `options` over the roster's current content.
+
+    Returns:
+        Optional[ViewCacheKey]: The key, or None if the roster's files cannot be read.
+    """
+    stamp = file_operations.roster_stamp(namelist_file, store, reporter)
+    if stamp is None:
+        return None
+    try:
+        content = _roster_digest(stamp)
+    except OSError:
+        return None
+    description = json.dumps([VIEW_CACHE_VERSION, store, action, options], sort_keys=True).encode('utf-8')
+    key = hashlib.blake2b(content + description, digest_size=16).hexdigest()
+    return get_view_cache_dir(namelist_file), key, stamp
+
+
+def replay_cached_view(cache_key: ViewCacheKey, reporter: Reporter) -> bool:
+    """Streams a cached rendering to stdout. Returns False on a miss (or an expired entry)."""
+    cache_dir, key, _ = cache_key
+    entry_path = os.path.join(cache_dir, key)
+    try:
+        if time.time() - os.stat(entry_path).st_mtime > VIEW_CACHE_MAX_AGE_SECONDS:
+            os.unlink(entry_path)
+            return False
+        with open(entry_path, 'r', encoding='utf-8') as f:
+            reporter.info("Rendered output unchanged since the last run; replaying it from the view cache.")
+            sys.stdout.flush()
+            shutil.copyfileobj(f, sys.stdout)
+        os.utime(entry_path) # Most recently used
+    except OSError:
+        return False
+    return True
+
+
+class _Tee:
+    """Text stream writing to stdout and to a cache entry at the same time."""
+
+    def __init__(self, stream, entry):
+        self._stream = stream
+        self._entry = entry
+
+    def write(self, text: str) -> int:
+        self._entry.write(text)
+        return self._stream.write(text)
+
+    def flush(self):
+        self._stream.flush()
+
+
+def render_and_cache(cache_key: ViewCacheKey, render: Callable[[], bool], namelist_file: str, store: str,
+                     reporter: Reporter) -> bool:
+    """
+    Runs `render`, which prints a view and returns True on success, while recording its
+    output; a successful rendering is stored in the cache under `cache_key`.
+
+    Returns:
+        bool: What `render` returned.
+    """
+    cache_dir, key, stamp = cache_key
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(prefix='.render.', dir=cache_dir)
+    except OSError as e:
+        reporter.warning(f"View cache unavailable ('{cache_dir}'): {e}")
+        return render()
+
+    stored = False
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as entry:
+            with contextlib.redirect_stdout(_Tee(sys.stdout, entry)):
+                ok = render()
+        # Only keep renderings of the roster the key was computed for
+        if ok and file_operations.roster_stamp(namelist_file, store, reporter) == stamp:
+            os.replace(temp_path, os.path.join(cache_dir, key))
+            stored = True
+    finally:
+        if not stored and os.path.exists(temp_path):
+            os.unlink(temp_path)
+    if stored:
+        evict_view_cache(cache_dir)
+    return ok
+
+
+def evict_view_cache(cache_dir: str, max_bytes: int = VIEW_CACHE_MAX_BYTES, max_age: float = VIEW_CACHE_MAX_AGE_SECONDS) -> int:
+    """
+    Drops cache entries older than `max_age` seconds, then the least recently used ones
+    until the entries fit in `max_bytes`.
+
+    Returns:
+        int: The number of entries removed.
+    """
+    entries = []
+    try:
+        with os.scandir(cache_dir) as it:
+            for dir_entry in it:
+                if dir_entry.is_file() and not dir_entry.name.startswith('.'):
+                    st = dir_entry.stat()
+                    entries.append((st.st_mtime, st.st_size, dir_entry.path))
+    except OSError:
+        return 0
+
+    now = time.time()
+    entries.sort() # Oldest first
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for mtime, size, path in entries:
+        if now - mtime <= max_age and total <= max_bytes:
+            break
+        try:
+            os.unlink(path)
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+    return removed
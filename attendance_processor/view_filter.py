@@ -0,0 +1,291 @@
+"""
+Filtering, sorting and top-k selection of roster rows for `view`.
+
+Filter expressions are a small, safe subset of Python expressions over the roster's
+columns, for example `rate < 0.5 and A3 == 0` or `"smith" in name`:
+
+    columns      -- id, name, total, rate and A1..An (names are case-insensitive)
+    literals     -- numbers and strings
+    operators    -- comparisons (including chained ones and `in` / `not in`), `and`, `or`,
+                    `not`, unary minus and + - * / %
+
+An expression is parsed, validated and type-checked once (text and numbers cannot be
+ordered against each other, `in` needs text, arithmetic needs numbers) into a tree of
+column operations, which is then evaluated column-wise: every node yields one list of
+values for the whole roster, so each operator runs as a single pass over its operand
+columns. Errors that depend on the data, such as a division by zero, are reported as
+ValueError like invalid expressions.
+
+`--sort` keys are column names, with a leading '-' for descending order. With `--limit k`
+only the k first rows in sort order are selected, through a bounded heap of size k
+(`heapq.nsmallest`) rather than a full sort of the roster.
+"""
+import ast
+import heapq
+import operator
+from itertools import islice
+from typing import List, Dict, Callable, Optional, Tuple
+
+_COMPARISONS = {
+    ast.Eq: operator.eq, ast.NotEq: operator.ne,
+    ast.Lt: operator.lt, ast.LtE: operator.le,
+    ast.Gt: operator.gt, ast.GtE: operator.ge,
+    ast.In: lambda a, b: a in b, ast.NotIn: lambda a, b: a not in b,
+}
+_ARITHMETIC = {
+    ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul,
+    ast.Div: operator.truediv, ast.Mod: operator.mod,
+}
+
+# Evaluates a compiled node over the roster's columns, yielding one value per row
+ColumnOperation = Callable[[Dict[str, list], int], list]
+
+# Static value types of expression nodes
+NUMBER_TYPE, TEXT_TYPE, BOOL_TYPE = "number", "text", "bool"
+_ORDERINGS = (ast.Lt, ast.LtE, ast.Gt, ast.GtE)
+
+
+def column_type(column: str) -> str:
+    """Returns the value type of a canonical roster column."""
+    return TEXT_TYPE if column in ("id", "name") else NUMBER_TYPE
+
+
+def _is_numeric(value_type: str) -> bool:
+    return value_type in (NUMBER_TYPE, BOOL_TYPE) # bool is an int in Python arithmetic
+
+
+def roster_columns(students_list: List[Dict], num_assignment_cols: int) -> Dict[str, list]:
+    """Returns the roster as columns: 'id', 'name', 'total', 'rate' and 'A1'..'An'."""
+    columns = {
+        "id": [s['id'] for s in students_list],
+        "name": [s['name'] for s in students_list],
+        "total": [s.get('total', 0) for s in students_list],
+        "rate": [s.get('rate', 0.0) for s in students_list],
+    }
+    for i in range(num_assignment_cols):
+        columns[f"A{i+1}"] = [s['marks'][i] if i < len(s['marks']) else 0 for s in students_list]
+    return columns
+
+
+def resolve_column(name: str, num_assignment_cols: int) -> str:
+    """Returns the canonical name of a roster column, matching case-insensitively."""
+    lowered = name.lower()
+    if lowered in ("id", "name", "total", "rate"):
+        return lowered
+    if lowered.startswith("a") and lowered[1:].isdigit() and 1 <= int(lowered[1:]) <= num_assignment_cols:
+        return f"A{int(lowered[1:])}"
+    raise ValueError(f"unknown column '{name}' (expected id, name, total, rate or A1..A{num_assignment_cols})")
+
+
+def expression_type(node: ast.AST, num_assignment_cols: int) -> str:
+    """
+    Returns the value type of a parsed expression node, checking that every operator gets
+    operands it accepts (so that, for example, `name > 3` is rejected before evaluation).
+
+    Raises:
+        ValueError: If an element is unsupported or an operator is applied to the wrong types.
+    """
+    if isinstance(node, ast.BoolOp): # Evaluates to a truth value per row, not to an operand
+        for value in node.values:
+            expression_type(value, num_assignment_cols)
+        return BOOL_TYPE
+
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+        expression_type(node.operand, num_assignment_cols)
+        return BOOL_TYPE
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+        operand = expression_type(node.operand, num_assignment_cols)
+        if not _is_numeric(operand):
+            raise ValueError(f"cannot negate text in '{ast.unparse(node)}'")
+        return NUMBER_TYPE
+
+    if isinstance(node, ast.BinOp) and type(node.op) in _ARITHMETIC:
+        left, right = expression_type(node.left, num_assignment_cols), expression_type(node.right, num_assignment_cols)
+        if isinstance(node.op, ast.Add) and left == right == TEXT_TYPE:
+            return TEXT_TYPE # Concatenation
+        if not (_is_numeric(left) and _is_numeric(right)):
+            raise ValueError(f"arithmetic needs numbers in '{ast.unparse(node)}'")
+        return NUMBER_TYPE
+
+    if isinstance(node, ast.Compare) and all(type(op) in _COMPARISONS for op in node.ops):
+        operands = [node.left] + node.comparators
+        types = [expression_type(operand, num_assignment_cols) for operand in operands]
+        for i, op in enumerate(node.ops):
+            left, right = types[i], types[i + 1]
+            pair = f"{ast.unparse(operands[i])} {'in' if isinstance(op, (ast.In, ast.NotIn)) else 'vs.'} {ast.unparse(operands[i + 1])}"
+            if isinstance(op, (ast.In, ast.NotIn)) and not left == right == TEXT_TYPE:
+                raise ValueError(f"'in' needs text on both sides ({pair})")
+            if isinstance(op, _ORDERINGS) and (left == TEXT_TYPE) != (right == TEXT_TYPE):
+                raise ValueError(f"cannot order text against a number ({pair})")
+        return BOOL_TYPE
+
+    if isinstance(node, ast.Name):
+        return column_type(resolve_column(node.id, num_assignment_cols))
+
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float, str)) and not isinstance(node.value, bool):
+        return TEXT_TYPE if isinstance(node.value, str) else NUMBER_TYPE
+
+    raise ValueError(f"unsupported expression element '{ast.unparse(node)}'")
+
+
+def _compile_node(node: ast.AST, num_assignment_cols: int) -> ColumnOperation:
+    if isinstance(node, ast.BoolOp):
+        operands = [_compile_node(value, num_assignment_cols) for value in node.values]
+        combine = all if isinstance(node.op, ast.And) else any
+        return lambda columns, n: [combine(row) for row in zip(*(operand(columns, n) for operand in operands))]
+
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.Not, ast.USub)):
+        operand = _compile_node(node.operand, num_assignment_cols)
+        if isinstance(node.op, ast.Not):
+            return lambda columns, n: [not value for value in operand(columns, n)]
+        return lambda columns, n: [-value for value in operand(columns, n)]
+
+    if isinstance(node, ast.BinOp) and type(node.op) in _ARITHMETIC:
+        op = _ARITHMETIC[type(node.op)]
+        left, right = _compile_node(node.left, num_assignment_cols), _compile_node(node.right, num_assignment_cols)
+        return lambda columns, n: list(map(op, left(columns, n), right(columns, n)))
+
+    if isinstance(node, ast.Compare) and all(type(op) in _COMPARISONS for op in node.ops):
+        # a < b < c is (a < b) and (b < c), as in Python
+        operands = [_compile_node(operand, num_assignment_cols) for operand in [node.left] + node.comparators]
+        ops = [_COMPARISONS[type(op)] for op in node.ops]
+
+        def compare(columns, n):
+            values = [operand(columns, n) for operand in operands]
+            result = [True] * n
+            for op, lefts, rights in zip(ops, values, values[1:]):
+                result = [r and op(a, b) for r, a, b in zip(result, lefts, rights)]
+            return result
+        return compare
+
+    if isinstance(node, ast.Name):
+        column = resolve_column(node.id, num_assignment_cols)
+        return lambda columns, n: columns[column]
+
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float, str)) and not isinstance(node.value, bool):
+        value = node.value
+        return lambda columns, n: [value] * n
+
+    raise ValueError(f"unsupported expression element '{ast.unparse(node)}'")
+
+
+def parse_filter(expression: str) -> ast.AST:
+    """Parses a filter expression into its AST body. Raises ValueError if it is not valid Python."""
+    try:
+        return ast.parse(expression, mode='eval').body
+    except SyntaxError as e:
+        raise ValueError(f"invalid expression: {e.msg}") from None
+
+
+def compile_filter(expression: str, num_assignment_cols: int) -> ColumnOperation:
+    """
+    Parses, validates and type-checks a filter expression once.
+
+    Returns:
+        ColumnOperation: Function of (columns, number of rows) returning one truth value per
+            row. It raises ValueError, not ZeroDivisionError or TypeError, when the expression
+            fails on some row (e.g. `rate / total` for a student with no submissions).
+
+    Raises:
+        ValueError: If the expression is not valid Python, uses anything outside the
+                    supported subset, or applies an operator to the wrong types.
+    """
+    tree = parse_filter(expression)
+    expression_type(tree, num_assignment_cols)
+    operation = _compile_node(tree, num_assignment_cols)
+
+    def evaluate(columns, n):
+        try:
+            return operation(columns, n)
+        except ZeroDivisionError:
+            raise ValueError(f"division by zero while evaluating '{expression}'") from None
+        except TypeError as e: # Not expected after type checking; still no traceback for the user
+            raise ValueError(f"cannot evaluate '{expression}': {e}") from None
+    return evaluate
+
+
+class _Descending:
+    """Sort key wrapper inverting the order of any comparable value."""
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+
+def parse_sort_spec(sort_spec: str, num_assignment_cols: int) -> List[Tuple[str, bool]]:
+    """
+    Parses a comma-separated list of column names, each optionally prefixed with '-' for
+    descending order (e.g. "rate,-total,name"), into (canonical column, descending) pairs.
+
+    Raises:
+        ValueError: If a column name is unknown.
+    """
+    keys = []
+    for part in sort_spec.split(','):
+        part = part.strip()
+        keys.append((resolve_column(part.lstrip('-+'), num_assignment_cols), part.startswith('-')))
+    return keys
+
+
+def compile_sort_key(sort_spec: str, num_assignment_cols: int) -> Callable[[Dict], tuple]:
+    """
+    Builds a sort key from a sort specification (see `parse_sort_spec`).
+
+    Raises:
+        ValueError: If a column name is unknown.
+    """
+    getters = []
+    for column, descending in parse_sort_spec(sort_spec, num_assignment_cols):
+        if column.startswith('A'):
+            i = int(column[1:]) - 1
+            getter = lambda s, i=i: s['marks'][i] if i < len(s['marks']) else 0
+        else:
+            getter = lambda s, column=column: s.get(column, 0)
+        if descending:
+            getters.append(lambda s, getter=getter: _Descending(getter(s)))
+        else:
+            getters.append(getter)
+    return lambda s: tuple(getter(s) for getter in getters)
+
+
+def select_students(students_list: List[Dict], num_assignment_cols: int, where: Optional[str] = None,
+                    sort: Optional[str] = None, limit: Optional[int] = None) -> List[Dict]:
+    """
+    Selects the roster rows to display. Totals and rates must be up to date.
+
+    Args:
+        students_list (List[Dict]): The roster.
+        num_assignment_cols (int): Number of assignment mark columns.
+        where (Optional[str]): Filter expression; rows for which it is false are dropped.
+        sort (Optional[str]): Sort specification (see `compile_sort_key`).
+        limit (Optional[int]): Maximum number of rows; with `sort`, the first rows in sort
+                               order are found with a bounded heap.
+
+    Returns:
+        List[Dict]: The selected rows, in sort order (roster order without `sort`).
+
+    Raises:
+        ValueError: If the filter expression or sort specification is invalid.
+    """
+    if limit is not None and limit < 0:
+        raise ValueError("the limit must not be negative")
+    # Compile both up front so that a bad --sort is reported before any work is done
+    row_filter = compile_filter(where, num_assignment_cols) if where else None
+    sort_key = compile_sort_key(sort, num_assignment_cols) if sort else None
+
+    rows = students_list
+    if row_filter is not None:
+        mask = row_filter(roster_columns(students_list, num_assignment_cols), len(students_list))
+        rows = [student for student, keep in zip(students_list, mask) if keep]
+
+    if sort_key is None:
+        return list(islice(rows, limit)) if limit is not None else list(rows)
+    if limit is not None:
+        return heapq.nsmallest(limit, rows, key=sort_key) # O(N log k), stable
+    return sorted(rows, key=sort_key)
@@ -0,0 +1,57 @@
+"""Shared helpers for the behaviour tests: small namelists, submission trees and CLI runs."""
+import os
+import pytest
+from attendance_processor.main import build_parser
+from attendance_processor.reporting import Reporter
+
+ROSTER = [
+    ("20240001", "Alice Smith"),
+    ("20240002", "Bob Jones"),
+    ("20240003", "Carol Smithers"),
+    ("30240004", "Dan Smith"),
+]
+
+
+def write_namelist(path, rows):
+    """Writes a TSV namelist; each row is (id, name) or (id, name, marks...)."""
+    with open(path, 'w', encoding='utf-8') as f:
+        for row in rows:
+            f.write("\t".join(str(field) for field in row) + "\n")
+    return str(path)
+
+
+def read_rows(path):
+    """Returns the lines of a namelist split into fields."""
+    with open(path, encoding='utf-8') as f:
+        return [line.rstrip('\n').split('\t') for line in f if line.strip()]
+
+
+def make_submissions(root, folders):
+    """Creates `root/<folder>/<file>` for every file name of every folder; returns `root`."""
+    for folder, files in folders.items():
+        os.makedirs(os.path.join(root, folder), exist_ok=True)
+        for name in files:
+            with open(os.path.join(root, folder, name), 'w', encoding='utf-8') as f:
+                f.write(f"# {name}\n")
+    return str(root)
+
+
+def run_action(*argv):
+    """Runs one CLI action in-process, as `python -m attendance_processor.main ARGV...`."""
+    args = build_parser().parse_args([str(arg) for arg in argv])
+    return args.func(args, Reporter())
+
+
+@pytest.fixture
+def namelist(tmp_path):
+    """A four-student TSV namelist without marks."""
+    return write_namelist(tmp_path / "namelist.txt", ROSTER)
+
+
+@pytest.fixture
+def submissions(tmp_path):
+    """Two assignment folders: Alice and Carol submitted the first, Carol and Dan the second."""
+    return make_submissions(tmp_path / "submissions", {
+        "a1": ["20240001_main.py", "20240003_main.py"],
+        "a2": ["20240003_main.py", "30240004_main.py"],
+    })
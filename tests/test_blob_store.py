@@ -0,0 +1,43 @@
+import os
+from attendance_processor import blob_store
+from attendance_processor.reporting import Reporter
+from .conftest import make_submissions, run_action
+
+
+def test_archive_keeps_same_named_files_in_subfolders_apart(namelist, tmp_path):
+    submissions = make_submissions(tmp_path / "submissions", {
+        "a1": ["20240001_main.py"], os.path.join("a1", "part1"): ["20240003_main.py"], os.path.join("a1", "part2"): ["20240003_main.py"],
+    })
+    with open(os.path.join(submissions, "a1", "part2", "20240003_main.py"), 'w', encoding='utf-8') as f:
+        f.write("# a different file\n")
+    store = str(tmp_path / "store")
+
+    run_action("process", namelist, submissions, "--archive", store)
+    run_action("process", namelist, submissions, "--archive", store) # Unchanged files: same index
+
+    index = blob_store.load_blob_index(store, Reporter())
+    assert sorted(index) == [
+        ("20240001", 0, "20240001_main.py"), ("20240003", 0, "part1/20240003_main.py"), ("20240003", 0, "part2/20240003_main.py"),
+    ]
+    assert len({blob_hash for _, blob_hash in index.values()}) == 3
+
+
+def test_file_changed_after_hashing_is_stored_under_its_real_hash(namelist, tmp_path, monkeypatch):
+    submissions = make_submissions(tmp_path / "submissions", {"a1": ["20240001_main.py"]})
+    path = os.path.join(submissions, "a1", "20240001_main.py")
+    hash_before_change = blob_store._hash_file_or_none
+
+    def hash_then_change(filepath):
+        blob_hash = hash_before_change(filepath)
+        with open(filepath, 'w', encoding='utf-8') as f:
+            f.write("# edited after hashing\n")
+        return blob_hash
+    monkeypatch.setattr(blob_store, "_hash_file_or_none", hash_then_change)
+    store = str(tmp_path / "store")
+
+    run_action("process", namelist, submissions, "--archive", store)
+
+    (_, blob_hash), = blob_store.load_blob_index(store, Reporter()).values()
+    assert blob_hash == blob_store.hash_file(path)
+    assert blob_store.hash_file(blob_store.get_blob_path(store, blob_hash)) == blob_hash
+    assert [name for _, _, files in os.walk(os.path.join(store, "objects")) for name in files] == [blob_hash[2:]]
@@ -0,0 +1,63 @@
+import os
+from attendance_processor import fixed_width
+from attendance_processor.reporting import Reporter
+
+
+def _student(student_id, name, marks):
+    return {"id": student_id, "name": name, "marks": list(marks), "total": sum(1 for m in marks if m), "rate": sum(1 for m in marks if m) / len(marks)}
+
+
+def _roster():
+    return [_student("20240001", "Alice Smith", [1, 0]), _student("20240002", "Bob Jones", [0, 0])]
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "namelist.fw")
+    assert fixed_width.save_fixed_width_data(path, _roster(), Reporter(), 2)
+    students, num_cols = fixed_width.load_fixed_width_data(path, Reporter())
+    assert num_cols == 2
+    assert students == _roster()
+
+
+def test_in_place_update_writes_only_changed_cells(tmp_path, capsys):
+    path = str(tmp_path / "namelist.fw")
+    fixed_width.save_fixed_width_data(path, _roster(), Reporter(), 2)
+    inode = os.stat(path).st_ino
+    updated = [_student("20240001", "Alice Smith", [1, 1]), _student("20240002", "Bob Jones", [0, 0])]
+
+    assert fixed_width.update_fixed_width_data(path, updated, Reporter(), 2)
+
+    assert os.stat(path).st_ino == inode
+    assert "1 mark cell(s) in 1 record(s)" in capsys.readouterr().out
+    assert fixed_width.load_fixed_width_data(path, Reporter())[0] == updated
+
+
+def test_in_place_update_keeps_renames(tmp_path):
+    path = str(tmp_path / "namelist.fw")
+    fixed_width.save_fixed_width_data(path, _roster(), Reporter(), 2)
+    renamed = [_student("20240001", "Alice Jones", [1, 0]), _student("20240002", "Bob Jones", [0, 0])]
+
+    assert fixed_width.update_fixed_width_data(path, renamed, Reporter(), 2)
+
+    assert fixed_width.load_fixed_width_data(path, Reporter())[0] == renamed
+
+
+def test_rename_longer_than_name_field_rewrites_file(tmp_path, capsys):
+    path = str(tmp_path / "namelist.fw")
+    fixed_width.save_fixed_width_data(path, _roster(), Reporter(), 2)
+    renamed = [_student("20240001", "Alice Smith-Montgomery", [1, 0]), _student("20240002", "Bob", [0, 0])]
+
+    assert fixed_width.update_fixed_width_data(path, renamed, Reporter(), 2)
+
+    assert "rewriting fixed-width file" in capsys.readouterr().out
+    assert fixed_width.load_fixed_width_data(path, Reporter())[0] == renamed
+
+
+def test_new_student_rewrites_file(tmp_path):
+    path = str(tmp_path / "namelist.fw")
+    fixed_width.save_fixed_width_data(path, _roster(), Reporter(), 2)
+    grown = _roster() + [_student("20240003", "Carol Smithers", [1, 1])]
+
+    assert fixed_width.update_fixed_width_data(path, grown, Reporter(), 2)
+
+    assert fixed_width.load_fixed_width_data(path, Reporter())[0] == grown
@@ -0,0 +1,53 @@
+from attendance_processor import history, tsv_namelist
+from attendance_processor.reporting import Reporter
+from .conftest import make_submissions, read_rows, run_action
+
+
+def _marks(namelist):
+    return {row[0]: row[2:-2] for row in read_rows(namelist)}
+
+
+def _versions(namelist):
+    return [(v['version'], v['action']) for v in history.load_history(namelist, Reporter())]
+
+
+def _fail_to_write(*args, **kwargs):
+    raise OSError("disk full")
+
+
+def test_undo_restores_the_previous_version(namelist, submissions):
+    run_action("process", namelist, submissions)
+    after_first = _marks(namelist)
+    make_submissions(submissions, {"a2": ["20240002_main.py"]})
+    run_action("process", namelist, submissions)
+    assert _marks(namelist)["20240002"] == ["0", "1"]
+
+    run_action("undo", namelist)
+
+    assert _marks(namelist) == after_first
+    assert [action for _, action in _versions(namelist)][-1].startswith("undo to version")
+
+
+def test_failed_save_records_no_version(namelist, submissions, monkeypatch, capsys):
+    run_action("process", namelist, submissions)
+    versions = _versions(namelist)
+    monkeypatch.setattr(tsv_namelist, "write_lines_atomically", _fail_to_write)
+    make_submissions(submissions, {"a2": ["20240002_main.py"]})
+    run_action("process", namelist, submissions)
+
+    assert "no history version is recorded" in capsys.readouterr().out
+    assert _versions(namelist) == versions
+    assert _marks(namelist)["20240002"] == ["0", "0"]
+
+
+def test_failed_undo_records_no_version(namelist, submissions, monkeypatch, capsys):
+    run_action("process", namelist, submissions)
+    make_submissions(submissions, {"a2": ["20240002_main.py"]})
+    run_action("process", namelist, submissions)
+    versions = _versions(namelist)
+
+    monkeypatch.setattr(tsv_namelist, "write_lines_atomically", _fail_to_write)
+    run_action("undo", namelist)
+
+    assert "Could not restore roster version" in capsys.readouterr().out
+    assert _versions(namelist) == versions
@@ -0,0 +1,70 @@
+import os
+from datetime import datetime
+from attendance_processor import journal
+from attendance_processor.reporting import Reporter
+from .conftest import run_action
+
+
+def _journal_lines(namelist):
+    with open(journal.get_journal_path(namelist), encoding='utf-8') as f:
+        return f.readlines()
+
+
+def test_process_journals_each_submission_once(namelist, submissions, capsys, monkeypatch):
+    run_action("process", namelist, submissions, "--journal")
+    assert len(_journal_lines(namelist)) == 4
+    assert os.path.exists(journal.get_journal_keys_path(namelist))
+    capsys.readouterr()
+    scans = []
+    iter_lines = journal._iter_journal_lines
+    monkeypatch.setattr(journal, "_iter_journal_lines", lambda path, start=0: scans.append(start) or iter_lines(path, start))
+
+    run_action("process", namelist, submissions, "--journal")
+
+    assert 0 not in scans # Only the key index is consulted, the journal is not rescanned
+
+    assert "Appended 0 new event(s)" in capsys.readouterr().out
+    assert len(_journal_lines(namelist)) == 4
+    assert journal.count_uncompacted_events(namelist) == 4
+
+
+def test_key_index_catches_up_with_the_journal(namelist, submissions, tmp_path):
+    run_action("process", namelist, submissions, "--journal")
+    lines = _journal_lines(namelist)
+    # An append the key index never saw (a run interrupted before updating it)
+    extra = str(tmp_path / "late.py")
+    event = ("20240002", 0, "a1", extra, 1.0)
+    with open(journal.get_journal_path(namelist), 'a', encoding='utf-8') as f:
+        f.write("\t".join(["run", "now", "20240002", "0", "a1", "1.000000", extra]) + "\n")
+
+    assert journal.append_journal_events(namelist, [event], "run2", Reporter()) == 0
+    assert journal.append_journal_events(namelist, [event[:4] + (2.0,)], "run2", Reporter()) == 1
+    assert len(_journal_lines(namelist)) == len(lines) + 2
+    assert journal.count_uncompacted_events(namelist) == len(lines) + 2
+
+
+def test_lost_key_index_is_rebuilt(namelist, submissions):
+    run_action("process", namelist, submissions, "--journal")
+    with open(journal.get_journal_keys_path(namelist), 'wb') as f:
+        f.write(b"not a database")
+
+    run_action("process", namelist, submissions, "--journal")
+
+    assert len(_journal_lines(namelist)) == 4
+
+
+def test_replay_as_of_uses_compacted_index_and_tail(namelist, submissions):
+    run_action("process", namelist, submissions, "--journal", "--compact-journal")
+    assert journal.count_uncompacted_events(namelist) == 0
+    late = os.path.join(submissions, "a1", "20240002_main.py")
+    with open(late, 'w', encoding='utf-8') as f:
+        f.write("# late\n")
+    os.utime(late, (4102444800, 4102444800)) # 2100-01-01
+    run_action("process", namelist, submissions, "--journal")
+    assert journal.count_uncompacted_events(namelist) == 1
+
+    now = journal.replay_journal_as_of(namelist, datetime.now(), Reporter())
+    future = journal.replay_journal_as_of(namelist, datetime(2100, 1, 2), Reporter())
+
+    assert now == {"20240001": {0: 1}, "20240003": {0: 1, 1: 1}, "30240004": {1: 1}}
+    assert future == dict(now, **{"20240002": {0: 1}})
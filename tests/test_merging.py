@@ -0,0 +1,63 @@
+from attendance_processor import merging
+from attendance_processor.reporting import Reporter
+from .conftest import read_rows, run_action, write_namelist
+
+
+def test_merge_joins_on_id_and_ors_marks(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(merging, "MERGE_RUN_SIZE", 1) # Sort the unsorted input in several runs
+    first = write_namelist(tmp_path / "ta1.txt", [
+        ("20240001", "Alice Smith", 1, 0, 1, "0.50"), ("20240002", "Bob Jones", 0, 0, 0, "0.00"),
+    ])
+    second = write_namelist(tmp_path / "ta2.txt", [
+        ("20240003", "Carol Smithers", 0, 1, 1, "0.50"), ("20240002", "Robert Jones", 0, 1, 1, "0.50"),
+        ("20240001", "Alice Smith", 0, 1, 1, "0.50"),
+    ])
+    output = str(tmp_path / "merged.txt")
+
+    summary = merging.merge_namelists([first, second], output, Reporter())
+
+    assert summary == {"students": 3, "conflicts": 1, "partial": 1}
+    assert read_rows(output) == [
+        ["20240001", "Alice Smith", "1", "1", "2", "1.00"],
+        ["20240002", "Bob Jones", "0", "1", "1", "0.50"],
+        ["20240003", "Carol Smithers", "0", "1", "1", "0.50"],
+    ]
+    assert "is not sorted by student ID" in capsys.readouterr().out
+
+
+def test_merge_matches_columns_by_header_and_keeps_counts(tmp_path):
+    first = write_namelist(tmp_path / "ta1.txt", [
+        ("ID", "Name", "week1", "week2", "Total", "Rate"), ("20240001", "Alice Smith", 2, 0, 1, "0.50"),
+    ])
+    second = write_namelist(tmp_path / "ta2.txt", [
+        ("ID", "Name", "week2", "week3", "Total", "Rate"), ("20240001", "Alice Smith", 3, 1, 2, "1.00"),
+    ])
+    output = str(tmp_path / "merged.txt")
+
+    run_action("merge", output, first, second, "--count")
+
+    assert read_rows(output) == [
+        ["ID", "Name", "week1", "week2", "week3", "Total", "Rate"],
+        ["20240001", "Alice Smith", "2", "3", "1", "3", "1.00"],
+    ]
+
+
+def test_merge_skips_rows_with_more_marks_than_the_header_names(tmp_path, capsys):
+    first = write_namelist(tmp_path / "ta1.txt", [
+        ("ID", "Name", "w1", "w2", "Total", "Rate"),
+        ("20240001", "Alice Smith", 1, 0, 1, 1, "0.67"), ("20240002", "Bob Jones", 0, 0, 1, 1, "0.33"),
+    ])
+    second = write_namelist(tmp_path / "ta2.txt", [
+        ("ID", "Name", "w1", "w2", "Total", "Rate"), ("20240001", "Alice Smith", 0, 1, 1, "0.50"),
+    ])
+    output = str(tmp_path / "merged.txt")
+
+    run_action("merge", output, first, second)
+
+    out = capsys.readouterr().out
+    assert "Skipping student '20240001' in '" + first + "'" in out
+    assert "Skipping student '20240002' in '" + first + "'" in out
+    assert read_rows(output) == [
+        ["ID", "Name", "w1", "w2", "Total", "Rate"],
+        ["20240001", "Alice Smith", "0", "1", "1", "0.50"],
+    ]
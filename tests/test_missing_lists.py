@@ -0,0 +1,31 @@
+import csv
+import json
+import pytest
+from .conftest import run_action, write_namelist
+
+
+@pytest.fixture
+def marked_namelist(tmp_path):
+    return write_namelist(tmp_path / "namelist.txt", [
+        ("20240001", "Alice Smith", 1, 0, 1, "0.50"), ("20240002", "Bob Jones", 0, 0, 0, "0.00"),
+        ("20240003", "Carol Smithers", 1, 1, 2, "1.00"),
+    ])
+
+
+def test_missing_csv_is_the_only_stdout(marked_namelist, capsys):
+    run_action("missing", marked_namelist)
+
+    captured = capsys.readouterr()
+    assert list(csv.reader(captured.out.splitlines())) == [
+        ["Assignment", "Folder", "ID", "Name"],
+        ["A1", "", "20240002", "Bob Jones"],
+        ["A2", "", "20240001", "Alice Smith"], ["A2", "", "20240002", "Bob Jones"],
+    ]
+    assert "Missing per assignment: A1 1, A2 2" in captured.err
+
+
+def test_missing_json_lines_with_filter(marked_namelist, capsys):
+    run_action("missing", marked_namelist, "--format", "json", "--where", "'Smith' in name", "--assignment", "A2")
+
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [(line['assignment'], [s['id'] for s in line['students']]) for line in lines] == [("A2", ["20240001"])]
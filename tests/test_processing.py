@@ -0,0 +1,10 @@
+from attendance_processor import processing
+from attendance_processor.reporting import Reporter
+
+
+def test_ensure_mark_capacity_pads_to_the_required_columns():
+    students = [{"id": "1", "name": "A", "marks": [1, 0, 1]}, {"id": "2", "name": "B", "marks": [1, 1, 1, 1, 0]}]
+
+    assert processing.ensure_mark_capacity(students, 4, Reporter()) == 1
+
+    assert [s['marks'] for s in students] == [[1, 0, 1, 0], [1, 1, 1, 1, 0]]
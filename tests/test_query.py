@@ -0,0 +1,64 @@
+import csv
+import json
+import os
+import pytest
+from attendance_processor import query_index, tsv_namelist
+from attendance_processor.reporting import Reporter
+from .conftest import run_action, write_namelist
+
+
+@pytest.fixture
+def marked_namelist(tmp_path):
+    return write_namelist(tmp_path / "namelist.txt", [
+        ("20240001", "Alice Smith", 1, 0, 1, "0.50"), ("20240002", "Bob Jones", 1, 1, 2, "1.00"),
+    ])
+
+
+def test_batch_query_jsonl_is_the_only_stdout(marked_namelist, tmp_path, capsys):
+    ids = tmp_path / "ids.txt"
+    ids.write_text("20240002\nnobody\n", encoding='utf-8')
+
+    run_action("query", marked_namelist, "--from-file", ids, "--format", "jsonl", "--no-cache")
+
+    captured = capsys.readouterr()
+    lines = [json.loads(line) for line in captured.out.splitlines()]
+    assert [(line['query'], [m['id'] for m in line['matches']]) for line in lines] == [("20240002", ["20240002"]), ("nobody", [])]
+    assert "1 of 2 identifier(s) matched no student" in captured.err
+
+
+def test_batch_query_tsv_is_the_only_stdout(marked_namelist, tmp_path, capsys):
+    ids = tmp_path / "ids.txt"
+    ids.write_text("Smith\n", encoding='utf-8')
+
+    run_action("query", marked_namelist, "--from-file", ids, "--format", "tsv", "--no-cache")
+
+    rows = list(csv.reader(capsys.readouterr().out.splitlines(), delimiter='\t'))
+    assert rows == [["Query", "ID", "Name", "A1", "A2", "Total", "Rate"], ["Smith", "20240001", "Alice Smith", "1", "0", "1", "0.50"]]
+
+
+@pytest.mark.parametrize("rows", [
+    [("20240001", "Alice Smith"), ("20240002", "Bob Jones", 1, 1, 2, "1.00"), ("20240003", "Carol Smithers")],
+    [("20240001", "Alice Smith", 1, 0, 1, "0.50"), ("20240002", "Bob Jones", 1), ("20240003", "Carol Smithers", 0, "x"),
+     ("20240004", "Dan Smith", 0, 1, 1, "0.50")],
+    [("ID", "Name", "a1", "Total", "Rate"), ("20240001", "Alice Smith", 1, 1, "1.00"), ("20240002", "Bob Jones", 0, 0, "0.00")],
+])
+def test_query_index_finds_the_students_the_loader_loads(tmp_path, rows):
+    namelist = write_namelist(tmp_path / "namelist.txt", rows)
+    loaded, num_cols = tsv_namelist.load_student_data(namelist, Reporter())
+
+    for identifier in ["20240001", "20240002", "20240003", "20240004", "Smith", "Jones"]:
+        indexed = query_index.query_indexed_students(namelist, identifier, Reporter())
+        exact = [s for s in loaded if s['id'] == identifier]
+        expected = exact or [s for s in loaded if identifier.lower() in s['name'].lower()]
+        assert indexed == (expected, num_cols), identifier
+
+
+def test_indexed_query_does_not_digest_the_namelist(marked_namelist, monkeypatch, capsys):
+    def fail(path):
+        raise AssertionError(f"query digested '{path}'")
+    monkeypatch.setattr("attendance_processor.roster_sidecar.compute_file_digest", fail)
+
+    for _ in range(2):
+        run_action("query", str(marked_namelist), "20240002")
+        assert "Bob Jones" in capsys.readouterr().out
+    assert not os.path.exists(marked_namelist + ".vcache")
@@ -0,0 +1,33 @@
+from .conftest import ROSTER, make_submissions, read_rows, run_action, write_namelist
+
+
+def _marks(namelist):
+    return {row[0]: row[2:4] for row in read_rows(namelist)}
+
+
+def test_reconcile_back_fills_new_students(tmp_path):
+    namelist = write_namelist(tmp_path / "namelist.txt", ROSTER[:2])
+    submissions = make_submissions(tmp_path / "submissions", {
+        "a1": ["20240001_main.py", "20240003_main.py", "20240003_test.py"], "a2": ["20240003_main.py"],
+    })
+    run_action("process", namelist, submissions)
+    with open(namelist, 'a', encoding='utf-8') as f:
+        f.write("20240003\tCarol Smithers\t0\t0\t0\t0.00\n")
+
+    run_action("reconcile", namelist)
+
+    assert _marks(namelist) == {"20240001": ["1", "0"], "20240002": ["0", "0"], "20240003": ["1", "1"]}
+
+
+def test_reconcile_back_fills_counts_in_count_mode(tmp_path):
+    namelist = write_namelist(tmp_path / "namelist.txt", ROSTER[:2])
+    submissions = make_submissions(tmp_path / "submissions", {
+        "a1": ["20240001_main.py", "20240003_main.py", "20240003_test.py"], "a2": ["20240003_main.py"],
+    })
+    run_action("process", namelist, submissions, "--count")
+    with open(namelist, 'a', encoding='utf-8') as f:
+        f.write("20240003\tCarol Smithers\t0\t0\t0\t0.00\n")
+
+    run_action("reconcile", namelist, "--count")
+
+    assert _marks(namelist)["20240003"] == ["2", "1"]
@@ -0,0 +1,75 @@
+import io
+import pytest
+from tabulate import tabulate
+from attendance_processor.reporting import Reporter, display_attendance_table
+
+
+def student(id, name, marks, rate):
+    return {'id': id, 'name': name, 'marks': marks, 'total': sum(marks), 'rate': rate}
+
+
+ROSTERS = {
+    "numeric ids, padded and wide names": [
+        student("20240001", "Alice Smith", [1, 0], 0.5),
+        student(" 20240002 ", " pad ", [1, 1], 1.0),
+        student("20240003", "张伟", [0, 0], 0.0),
+        student("30240004", "Zoë  O'Neil ", [0, 1], 0.5),
+        student("30240005", "山田 太郎", [1, 1], 1.0),
+    ],
+    "float-looking ids and names": [
+        student("1.5", "3.25", [1, 0], 0.5),
+        student("20240002", " 7 ", [1, 1], 1.0),
+        student("1e3", "0.125", [0, 0], 0.0),
+    ],
+    "mixed ids": [
+        student("A1", "1.5", [1], 1.0),
+        student(" 20240002", "Bob", [0], 0.0),
+        student("２０２４", "Dan", [1], 1.0),
+    ],
+}
+
+
+def tabulated(students, num_assignment_cols):
+    """The table tabulate renders for `students`, as a list of lines."""
+    headers = ["ID", "Name"] + [f"A{i+1}" for i in range(num_assignment_cols)] + ["Total", "Rate"]
+    rows = [[s['id'], s['name'], *s['marks'], s['total'], f"{s['rate']:.2f} ({s['rate']*100:.0f} %)"] for s in students]
+    return tabulate(rows, headers=headers, tablefmt="fancy_grid", stralign="left", numalign="center").splitlines()
+
+
+def rendered(capsys, students, num_assignment_cols, **paging):
+    log = io.StringIO()
+    shown = display_attendance_table(students, num_assignment_cols, Reporter(stream=log), **paging)
+    lines = capsys.readouterr().out.splitlines()
+    if shown:
+        assert "Bottom Line" in lines.pop()
+    return shown, lines, log.getvalue()
+
+
+@pytest.mark.parametrize("name", ROSTERS)
+def test_table_matches_tabulate(capsys, name):
+    students = ROSTERS[name]
+    shown, lines, _ = rendered(capsys, students, len(students[0]['marks']))
+    assert shown
+    assert lines == tabulated(students, len(students[0]['marks']))
+
+
+@pytest.mark.parametrize("name", ROSTERS)
+def test_pages_are_slices_of_the_tabulate_table(capsys, name):
+    students = ROSTERS[name]
+    num_assignment_cols = len(students[0]['marks'])
+    full = tabulated(students, num_assignment_cols)
+    head, separator, body, bottom = full[:3], full[4], full[3:-1:2], full[-1]
+    page_size = 2
+    num_pages = (len(students) + page_size - 1) // page_size
+
+    for page in range(1, num_pages + 1):
+        shown, lines, _ = rendered(capsys, students, num_assignment_cols, page=page, page_size=page_size)
+        page_rows = body[(page - 1) * page_size:page * page_size]
+        expected = head + [line for row in page_rows for line in (separator, row)][1:] + [bottom]
+        assert shown
+        assert lines == expected
+
+    shown, lines, log = rendered(capsys, students, num_assignment_cols, page=num_pages + 1, page_size=page_size)
+    assert not shown
+    assert lines == []
+    assert f"Page {num_pages + 1} is past the end" in log
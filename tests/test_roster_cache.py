@@ -0,0 +1,79 @@
+import os
+import pytest
+from attendance_processor.reporting import Reporter
+from attendance_processor.roster_cache import RosterCache, load_snapshot
+from .conftest import ROSTER, write_namelist
+
+
+@pytest.fixture
+def namelists(tmp_path):
+    """Three namelists, 'a', 'b' and 'c', with one, two and three students."""
+    return {
+        name: write_namelist(tmp_path / f"{name}.txt", [(sid, student, 1, 1, "1.00") for sid, student in ROSTER[:count]])
+        for name, count in (("a", 1), ("b", 2), ("c", 3))
+    }
+
+
+@pytest.fixture
+def sizes(namelists):
+    """Estimated snapshot sizes, once the parsed-roster sidecars the cache loads from exist."""
+    for path in namelists.values():
+        load_snapshot(path, 'tsv', Reporter())
+    return {name: load_snapshot(path, 'tsv', Reporter()).size_bytes for name, path in namelists.items()}
+
+
+def cached_rosters(cache):
+    return [path for path, _ in cache._entries]
+
+
+def test_least_recently_used_roster_is_evicted_first(namelists, sizes):
+    cache = RosterCache(max_bytes=sum(sizes.values()) - 1) # Room for any two of the three
+    reporter = Reporter()
+
+    cache.get(namelists["a"], 'tsv', reporter)
+    cache.get(namelists["b"], 'tsv', reporter)
+    cache.get(namelists["a"], 'tsv', reporter) # 'a' is now more recently used than 'b'
+    cache.get(namelists["c"], 'tsv', reporter)
+
+    assert cached_rosters(cache) == [namelists["a"], namelists["c"]]
+    assert cache.stats() == {
+        "rosters": 2, "bytes": sizes["a"] + sizes["c"], "max_bytes": sum(sizes.values()) - 1,
+        "hits": 1, "misses": 3, "stale": 0, "evictions": 1,
+    }
+
+    cache.get(namelists["b"], 'tsv', reporter) # Reloaded, evicting 'a'
+    assert cached_rosters(cache) == [namelists["c"], namelists["b"]]
+    assert (cache.stats()["misses"], cache.stats()["evictions"]) == (4, 2)
+
+
+def test_roster_larger_than_the_budget_is_returned_but_not_cached(namelists, sizes, capsys):
+    cache = RosterCache(max_bytes=sizes["c"] - 1)
+    reporter = Reporter()
+
+    assert cache.get(namelists["a"], 'tsv', reporter) is not None
+    for _ in range(2):
+        snapshot = cache.get(namelists["c"], 'tsv', reporter)
+        assert [s['id'] for s in snapshot.students] == [sid for sid, _ in ROSTER[:3]]
+    assert "exceeds the roster cache budget" in capsys.readouterr().out
+
+    assert cached_rosters(cache) == [namelists["a"]]
+    stats = cache.stats()
+    assert (stats["bytes"], stats["hits"], stats["misses"], stats["evictions"]) == (sizes["a"], 0, 3, 0)
+
+
+def test_changed_namelist_is_reloaded(namelists, sizes):
+    cache = RosterCache(max_bytes=sum(sizes.values()))
+    reporter = Reporter()
+    first = cache.get(namelists["b"], 'tsv', reporter)
+    assert cache.get(namelists["b"], 'tsv', reporter) is first
+
+    mtime_ns = os.stat(namelists["b"]).st_mtime_ns
+    write_namelist(namelists["b"], [(sid, student, 0, 0, "0.00") for sid, student in ROSTER[:2]]) # Same size
+    os.utime(namelists["b"], ns=(mtime_ns + 1_000_000, mtime_ns + 1_000_000))
+    reloaded = cache.get(namelists["b"], 'tsv', reporter)
+
+    assert reloaded is not first
+    assert [s['marks'] for s in reloaded.students] == [[0], [0]]
+    stats = cache.stats()
+    assert (stats["rosters"], stats["bytes"]) == (1, reloaded.size_bytes)
+    assert (stats["hits"], stats["misses"], stats["stale"], stats["evictions"]) == (1, 2, 1, 0)
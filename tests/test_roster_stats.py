@@ -0,0 +1,16 @@
+import json
+from .conftest import run_action, write_namelist
+
+
+def test_stats_json_is_the_only_stdout(tmp_path, capsys):
+    namelist = write_namelist(tmp_path / "namelist.txt", [
+        ("20240001", "Alice Smith", 1, 0, 1, "0.50"), ("20240002", "Bob Jones", 1, 1, 2, "1.00"),
+    ])
+
+    run_action("stats", namelist, "--json")
+
+    captured = capsys.readouterr()
+    stats = json.loads(captured.out)
+    assert stats['students'] == 2
+    assert [(a['assignment'], a['submitted'], a['missing']) for a in stats['assignments']] == [("A1", 2, 0), ("A2", 1, 1)]
+    assert "[INFO] Stats action complete." in captured.err
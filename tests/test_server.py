@@ -0,0 +1,59 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+import pytest
+from attendance_processor import server
+from attendance_processor.reporting import Reporter
+from .conftest import write_namelist
+
+
+@pytest.fixture
+def service(tmp_path):
+    namelist = write_namelist(tmp_path / "namelist.txt", [
+        ("20240001", "Alice Smith", 1, 0, 1, "0.50"), ("20240002", "Bob Jones", 0, 0, 0, "0.00"),
+    ])
+    service = server.RosterService(namelist, 'tsv', Reporter())
+    service.reload_if_changed()
+    return service
+
+
+@pytest.fixture
+def base_url(service):
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), server._make_handler(service))
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _get(url):
+    try:
+        with urllib.request.urlopen(url) as response:
+            return response.status, json.load(response)
+    except urllib.error.HTTPError as e:
+        return e.code, json.load(e)
+
+
+def test_students_and_stats(base_url):
+    status, body = _get(f"{base_url}/students/Alice")
+    assert status == 200 and [m['id'] for m in body['matches']] == ["20240001"]
+    status, body = _get(f"{base_url}/students?where=A1%20%3D%3D%200")
+    assert status == 200 and [s['id'] for s in body['students']] == ["20240002"]
+    status, body = _get(f"{base_url}/stats")
+    assert status == 200 and body['assignments'][0]['submitted'] == 1
+
+
+@pytest.mark.parametrize("where", ["name%20%3E%203", "rate%20%2F%20total%20%3E%201", "rate%20%3E"])
+def test_bad_filters_are_400(base_url, where):
+    status, body = _get(f"{base_url}/students?where={where}")
+    assert status == 400 and body['error']
+
+
+def test_unexpected_errors_are_500(base_url, service, monkeypatch):
+    monkeypatch.setattr(server, "roster_statistics", lambda students, n: 1 / 0)
+    status, body = _get(f"{base_url}/stats")
+    assert status == 500 and "ZeroDivisionError" in body['error']
+    assert _get(f"{base_url}/health")[0] == 200
@@ -0,0 +1,73 @@
+import os
+from attendance_processor import file_operations, sharding
+from attendance_processor.reporting import Reporter
+from .conftest import read_rows, run_action, write_namelist
+
+
+def _shard_roster(namelist, tmp_path):
+    students, num_cols = file_operations.load_roster(namelist, 'tsv', Reporter())
+    manifest = str(tmp_path / "sharded.txt")
+    file_operations.save_roster(manifest, 'sharded', students, Reporter(), num_cols)
+    return manifest
+
+
+def test_sharded_process_marks_every_shard(namelist, submissions, tmp_path):
+    manifest = _shard_roster(namelist, tmp_path)
+    shards = sharding.read_shard_manifest(manifest, Reporter())
+    assert sorted(shards) == ["202400", "302400"]
+
+    run_action("process", manifest, submissions, "--store", "sharded", "--workers", "2")
+
+    students, num_cols = file_operations.load_roster(manifest, 'sharded', Reporter())
+    assert num_cols == 2
+    assert {s['id']: s['marks'] for s in students} == {
+        "20240001": [1, 0], "20240002": [0, 0], "20240003": [1, 1], "30240004": [0, 1],
+    }
+    assert {s['id']: s['total'] for s in students}["20240003"] == 2
+
+
+def test_sharded_process_leaves_unparseable_shard_untouched(namelist, submissions, tmp_path, capsys):
+    manifest = _shard_roster(namelist, tmp_path)
+    broken = sharding.read_shard_manifest(manifest, Reporter())["302400"]
+    write_namelist(broken, [("30240004", "Dan Smith", "x", "0")])
+    with open(broken, 'rb') as f:
+        before = f.read()
+
+    run_action("process", manifest, submissions, "--store", "sharded")
+
+    with open(broken, 'rb') as f:
+        assert f.read() == before
+    assert "No student data loaded from shard" in capsys.readouterr().out
+    other = sharding.read_shard_manifest(manifest, Reporter())["202400"]
+    assert [row[:4] for row in read_rows(other)] == [
+        ["20240001", "Alice Smith", "1", "0"], ["20240002", "Bob Jones", "0", "0"], ["20240003", "Carol Smithers", "1", "1"],
+    ]
+
+
+def test_sharded_process_stops_on_undecodable_shard(namelist, submissions, tmp_path, capsys):
+    manifest = _shard_roster(namelist, tmp_path)
+    broken = sharding.read_shard_manifest(manifest, Reporter())["302400"]
+    with open(broken, 'wb') as f:
+        f.write(b"\xff\xfe not utf-8\n")
+
+    run_action("process", manifest, submissions, "--store", "sharded")
+
+    assert "Cannot read every shard" in capsys.readouterr().out
+    with open(broken, 'rb') as f:
+        assert f.read() == b"\xff\xfe not utf-8\n"
+
+
+def test_empty_shard_stays_empty(tmp_path, submissions):
+    manifest = str(tmp_path / "sharded.txt")
+    file_operations.save_roster(manifest, 'sharded', [
+        {"id": "20240001", "name": "Alice Smith", "marks": [0, 0], "total": 0, "rate": 0.0},
+    ], Reporter(), 2)
+    empty = str(tmp_path / "sharded.302400.txt")
+    open(empty, 'w').close()
+    with open(manifest, 'a', encoding='utf-8') as f:
+        f.write(f"302400\t{os.path.basename(empty)}\n")
+
+    result = sharding.process_shard(empty, [("30240004", 1, "a2", "x.py")], 2, [])
+
+    assert result['error'] is None and result['unknown'] == [("30240004", 1, "a2", "x.py")]
+    assert os.path.getsize(empty) == 0
@@ -0,0 +1,30 @@
+from attendance_processor.reporting import Reporter
+from attendance_processor.roster_cache import RosterCache
+from attendance_processor.shell import AttendanceShell
+from .conftest import write_namelist
+
+
+def _shell(tmp_path):
+    namelist = write_namelist(tmp_path / "namelist.txt", [
+        ("20240001", "Alice Smith", 1, 0, 1, "0.50"), ("20240002", "Bob Jones", 0, 0, 0, "0.00"),
+    ])
+    shell = AttendanceShell(namelist, 'tsv', Reporter(), RosterCache())
+    assert shell.ensure_loaded()
+    return shell
+
+
+def test_bad_filter_does_not_end_the_session(tmp_path, capsys):
+    shell = _shell(tmp_path)
+    assert not shell.onecmd("filter rate / total > 1")
+    assert not shell.onecmd("filter name > 3")
+    assert "Cannot view table" in capsys.readouterr().out
+    assert not shell.onecmd("query Alice")
+    assert "20240001" in capsys.readouterr().out
+
+
+def test_unexpected_command_error_is_reported(tmp_path, capsys, monkeypatch):
+    shell = _shell(tmp_path)
+    monkeypatch.setattr(shell.snapshot.lookup, "resolve", lambda identifier: 1 / 0)
+    assert not shell.onecmd("query Alice")
+    assert "[ERROR] Command failed: ZeroDivisionError" in capsys.readouterr().out
+    assert shell.onecmd("exit")
@@ -0,0 +1,62 @@
+import pytest
+from attendance_processor import file_operations, processing, sqlite_store, view_filter
+from attendance_processor.reporting import Reporter
+from .conftest import run_action, write_namelist
+
+
+@pytest.fixture
+def store(tmp_path):
+    namelist = write_namelist(tmp_path / "namelist.txt", [
+        ("20240001", "Alice Smith", 1, 0, 2, 1, "0.50"),
+        ("20240002", "Bob Jones", 0, 0, 0, 0, "0.00"),
+        ("20240003", "Carol Smithers", 1, 1, 1, 3, "1.00"),
+        ("30240004", "Dan Smith", 0, 3, 0, 1, "0.33"),
+        ("30240005", "", 1, 0, 0, 1, "0.33"),
+    ])
+    db = str(tmp_path / "namelist.db")
+    run_action("convert", namelist, db, "--to", "sqlite")
+    return db
+
+
+def _python_selection(db, where, sort, limit):
+    students, num_cols = file_operations.load_roster(db, 'sqlite', Reporter())
+    processing.calculate_final_statistics(students, num_cols, num_cols, Reporter())
+    return view_filter.select_students(students, num_cols, where, sort, limit)
+
+
+@pytest.mark.parametrize("where, sort, limit", [
+    ("rate < 0.5 and A2 == 0", None, None),
+    ('"Smith" in name', "-total,name", None),
+    ("'Smith' not in name or not A1", None, 2),
+    ("0 < total < 3", "-rate", 1),
+    ("name", "name", None),
+    ("rate and not A2", None, None),
+    ("name + id == 'Bob Jones20240002'", None, None),
+    ("A2 * 2 - total >= 2 or -A1 < 0", "A2,-id", None),
+    ("(A1 > 0) + (A3 > 0) == 2", None, None),
+    (None, "-A2", 3),
+    (None, None, 2),
+])
+def test_sql_selection_matches_python(store, where, sort, limit):
+    selected, num_cols, roster_size = sqlite_store.select_sqlite_students(store, where, sort, limit, Reporter())
+
+    assert (num_cols, roster_size) == (3, 5)
+    assert selected == _python_selection(store, where, sort, limit)
+
+
+@pytest.mark.parametrize("where", ["rate / total > 1", "A1 % 2 == 1", "id == 20240001"])
+def test_untranslated_filters_fall_back_to_python(store, where):
+    assert sqlite_store.select_sqlite_students(store, where, None, None, Reporter()) is None
+
+
+def test_invalid_filters_are_rejected(store):
+    with pytest.raises(ValueError):
+        sqlite_store.select_sqlite_students(store, "name > 3", None, None, Reporter())
+
+
+def test_view_filters_in_sql(store, capsys):
+    run_action("view", store, "--store", "sqlite", "--where", "A2 > 0", "--no-cache")
+
+    out = capsys.readouterr().out
+    assert "Selected 2 of 5 student(s) in SQL." in out
+    assert "Carol Smithers" in out and "Dan Smith " in out and "Alice" not in out
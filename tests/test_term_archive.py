@@ -0,0 +1,18 @@
+import json
+from .conftest import run_action, write_namelist
+
+
+def test_trends_json_is_the_only_stdout(tmp_path, capsys):
+    namelist = write_namelist(tmp_path / "namelist.txt", [
+        ("20240001", "Alice Smith", 1, 0, 1, "0.50"), ("20240002", "Bob Jones", 1, 1, 2, "1.00"),
+    ])
+    archive = str(tmp_path / "archive.bin")
+    run_action("ingest", archive, namelist, "--term", "2024S1", "--course", "CS101")
+    capsys.readouterr()
+
+    run_action("trends", archive, "--by", "term", "--json")
+
+    captured = capsys.readouterr()
+    rows = json.loads(captured.out)
+    assert [(r['term'], r['course'], r['students'], r['attended']) for r in rows] == [("2024S1", "CS101", 2, 3)]
+    assert "[INFO] Trends action complete." in captured.err
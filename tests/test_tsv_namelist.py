@@ -0,0 +1,56 @@
+import os
+import pytest
+from attendance_processor import tsv_namelist
+from attendance_processor.reporting import Reporter
+
+LINES = ["20240001\tAlice Smith\t1\t0\t1\t0.50\n", "20240002\tBob Jones\t0\t0\t0\t0.00\n"]
+
+
+def _content(path):
+    with tsv_namelist.open_namelist_file(path) as f:
+        return f.read()
+
+
+def _no_temp_files(directory):
+    return [name for name in os.listdir(directory) if name.endswith('.tmp')] == []
+
+
+@pytest.mark.parametrize("name", ["namelist.txt", "namelist.txt.gz", "namelist.txt.xz"])
+def test_unchanged_content_is_not_written(tmp_path, monkeypatch, name):
+    path = str(tmp_path / name)
+    assert tsv_namelist.write_lines_atomically(path, LINES, Reporter())
+    os.utime(path, ns=(1_000_000_000, 1_000_000_000))
+
+    def no_temp_file(*args, **kwargs):
+        raise AssertionError("a temporary file was created")
+    monkeypatch.setattr(tsv_namelist.tempfile, "mkstemp", no_temp_file)
+
+    assert not tsv_namelist.write_lines_atomically(path, LINES, Reporter())
+    assert os.stat(path).st_mtime_ns == 1_000_000_000
+
+
+@pytest.mark.parametrize("name", ["namelist.txt", "namelist.txt.gz"])
+@pytest.mark.parametrize("new_lines", [LINES[:1], LINES + ["20240003\tCarol Smithers\t1\t1\t2\t1.00\n"], [LINES[1], LINES[0]], []])
+def test_changed_content_replaces_the_file(tmp_path, name, new_lines):
+    path = str(tmp_path / name)
+    tsv_namelist.write_lines_atomically(path, LINES, Reporter())
+
+    assert tsv_namelist.write_lines_atomically(path, new_lines, Reporter())
+
+    assert _content(path) == "".join(new_lines)
+    assert _no_temp_files(tmp_path)
+
+
+def test_failed_write_leaves_the_original_intact(tmp_path):
+    path = str(tmp_path / "namelist.txt")
+    tsv_namelist.write_lines_atomically(path, LINES, Reporter())
+
+    def failing_lines():
+        yield LINES[0]
+        yield "20240002\tBob Jones\t1\t0\t1\t0.50\n"
+        raise OSError("disk full")
+    with pytest.raises(OSError):
+        tsv_namelist.write_lines_atomically(path, failing_lines(), Reporter())
+
+    assert _content(path) == "".join(LINES)
+    assert _no_temp_files(tmp_path)
@@ -0,0 +1,41 @@
+import pytest
+from attendance_processor import view_filter
+from .conftest import run_action, write_namelist
+
+STUDENTS = [
+    {"id": "20240001", "name": "Alice Smith", "marks": [1, 0], "total": 1, "rate": 0.5},
+    {"id": "20240002", "name": "Bob Jones", "marks": [0, 0], "total": 0, "rate": 0.0},
+    {"id": "20240003", "name": "Carol Smithers", "marks": [1, 1], "total": 2, "rate": 1.0},
+]
+
+
+def _ids(where=None, sort=None, limit=None):
+    return [s['id'] for s in view_filter.select_students(STUDENTS, 2, where, sort, limit)]
+
+
+def test_filters_sorts_and_limits():
+    assert _ids("rate < 1 and A2 == 0") == ["20240001", "20240002"]
+    assert _ids('"Smith" in name') == ["20240001", "20240003"]
+    assert _ids(sort="-total,name", limit=2) == ["20240003", "20240001"]
+    assert _ids("0 < total < 2 or name == 'Bob Jones'") == ["20240001", "20240002"]
+
+
+@pytest.mark.parametrize("where", ["name > 3", "'a' in A1", "-name < 0", "name + 1 > 2", "__import__('os')", "rate >"])
+def test_invalid_expressions_are_rejected_before_evaluation(where):
+    with pytest.raises(ValueError):
+        view_filter.compile_filter(where, 2)
+
+
+@pytest.mark.parametrize("where", ["rate / total > 1", "A1 % total == 0"])
+def test_division_by_zero_is_a_value_error(where):
+    with pytest.raises(ValueError, match="division by zero"):
+        view_filter.select_students(STUDENTS, 2, where)
+
+
+def test_view_reports_bad_filters_instead_of_failing(tmp_path, capsys):
+    namelist = write_namelist(tmp_path / "namelist.txt", [
+        ("20240001", "Alice Smith", 1, 0, 1, "0.50"), ("20240002", "Bob Jones", 0, 0, 0, "0.00"),
+    ])
+    for where in ["name > 3", "rate / total > 1"]:
+        run_action("view", namelist, "--where", where, "--no-cache")
+        assert "[ERROR] Cannot view table" in capsys.readouterr().out